@@ -1,6 +1,7 @@
 import json
 import os
 import re
+import functools
 from jinja2 import Template
 import yaml
 import logging
@@ -8,10 +9,15 @@ from core.llm.llm import LLMClient
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=256)
+def compile_template(template_str: str) -> Template:
+    """Jinja2 模板编译结果按源码缓存，避免每次调用都重新解析"""
+    return Template(template_str)
+
 class BaseAgent:
     def __init__(self, agent_id: str, prompt_file: str):
         self.agent_id = agent_id
-        self.llm = LLMClient()
+        self.llm = LLMClient.get_instance()
 
         # 路径处理：基于当前文件物理位置，向上寻找 prompts
         current_file_path = os.path.abspath(__file__)
@@ -41,7 +47,7 @@ class BaseAgent:
 
     def render_prompt(self, template_str: str, **kwargs):
         if not template_str: return ""
-        return Template(template_str).render(**kwargs)
+        return compile_template(template_str).render(**kwargs)
 
     def parse_json_safely(self, text: str):
         """鲁棒的 JSON 解析器"""
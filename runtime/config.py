@@ -20,6 +20,22 @@ class Config:
     DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
     DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
     EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "AI-ModelScope/all-MiniLM-L6-v2")
+    # 批量向量化：单批最大条数 / 单批 Token 预算 (先到先触发)
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+    EMBED_TOKEN_BUDGET = int(os.getenv("EMBED_TOKEN_BUDGET", 16384))
+
+    # --- 本地缓存配置 ---
+    CACHE_DIR = os.getenv("CHIMERA_CACHE_DIR", "/tmp/chimera_cache")
+    # 向量缓存：按 (模型名, 内容哈希) 命中，ETL 与 Chat 共享
+    EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+    EMBED_CACHE_MAX_MB = int(os.getenv("EMBED_CACHE_MAX_MB", 1024))
+    EMBED_CACHE_HOT_SIZE = int(os.getenv("EMBED_CACHE_HOT_SIZE", 4096))
+    # VLM 描述缓存：按 (模型路径, 表格/插图模式, 缩放后图片哈希) 命中，未变的图表重复入库不再占用 GPU
+    VLM_CACHE_ENABLED = os.getenv("VLM_CACHE_ENABLED", "true").lower() == "true"
+    VLM_CACHE_MAX_MB = int(os.getenv("VLM_CACHE_MAX_MB", 256))
+    # 解析产出的表格/插图以原始像素驻留内存，进程内总量超过预算后溢写到磁盘
+    IMAGE_MEMORY_BUDGET_MB = int(os.getenv("IMAGE_MEMORY_BUDGET_MB", 512))
+    IMAGE_SPILL_DIR = os.getenv("IMAGE_SPILL_DIR", os.path.join(CACHE_DIR, "image_spill"))
 
     # --- 存储层配置 ---
 
@@ -33,6 +49,36 @@ class Config:
     # 2. Qdrant 配置
     QDRANT_HOST = os.getenv("QDRANT_HOST", "127.0.0.1")
     QDRANT_PORT = int(os.getenv("QDRANT_PORT", 26333))
+    QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 26334))
+    # 开启后 SDK 全部走 gRPC (HTTP/2 多路复用)，REST 检索路径关闭
+    QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+    # REST 连接池大小 (requests.Session)
+    QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", 16))
+    # 混合检索：dense 向量 + BM25 稀疏向量各自预取候选 (条数)，Qdrant 服务端 RRF 融合
+    HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    HYBRID_PREFETCH_LIMIT = int(os.getenv("HYBRID_PREFETCH_LIMIT", 50))
+    # 集合布局 (新建集合 / 迁移重建时生效)：量化 none | int8 | binary，量化向量常驻内存，
+    # 原始向量与 payload 落盘，HNSW 图参数，段数 (0 = Qdrant 默认)
+    QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+    QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    QDRANT_ON_DISK_VECTORS = os.getenv("QDRANT_ON_DISK_VECTORS", "false").lower() == "true"
+    QDRANT_ON_DISK_PAYLOAD = os.getenv("QDRANT_ON_DISK_PAYLOAD", "false").lower() == "true"
+    QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", 16))
+    QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100))
+    QDRANT_SEGMENTS = int(os.getenv("QDRANT_SEGMENTS", 0))
+    # 过滤字段 (kb_id / source_id / content_hash / kg_status) 的 payload 索引
+    QDRANT_PAYLOAD_INDEXES = os.getenv("QDRANT_PAYLOAD_INDEXES", "true").lower() == "true"
+    # 按租户建 HNSW 图 (m=0, payload_m=QDRANT_HNSW_M)：每个 kb_id 一张子图，带 kb_id 过滤的检索不再扫全局图；
+    # 不带 kb_id 过滤的检索会退化为全量扫描，适合所有检索都限定知识库的部署
+    QDRANT_TENANT_HNSW = os.getenv("QDRANT_TENANT_HNSW", "false").lower() == "true"
+    # 检索参数默认值 (可逐次覆盖)：hnsw_ef (0 = Qdrant 默认)、量化候选过采样倍数、是否用原始向量重打分
+    QDRANT_SEARCH_HNSW_EF = int(os.getenv("QDRANT_SEARCH_HNSW_EF", 0))
+    QDRANT_SEARCH_OVERSAMPLING = float(os.getenv("QDRANT_SEARCH_OVERSAMPLING", 2.0))
+    QDRANT_SEARCH_RESCORE = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+    # BM25 文档侧参数：词频饱和 k1、长度归一 b、平均切片长度 (词项数)
+    BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+    BM25_B = float(os.getenv("BM25_B", 0.75))
+    BM25_AVG_DOC_LEN = int(os.getenv("BM25_AVG_DOC_LEN", 256))
 
     # 3. Redis 配置
     REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
@@ -46,11 +92,69 @@ class Config:
     MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "chimera_minio_secret")
     # 桶名称要和 Go 端保持一致
     MINIO_BUCKET = os.getenv("MINIO_BUCKET", "chimera-docs")
+    # 小于该阈值的文件直接读入内存交给 Docling (DocumentStream)，更大的文件流式写入临时文件
+    MINIO_INMEMORY_MAX_MB = int(os.getenv("MINIO_INMEMORY_MAX_MB", 16))
+    # 流式下载的分块大小、断点续传次数
+    MINIO_PART_SIZE_MB = int(os.getenv("MINIO_PART_SIZE_MB", 8))
+    MINIO_DOWNLOAD_RETRIES = int(os.getenv("MINIO_DOWNLOAD_RETRIES", 3))
 
     ES_HOST = os.getenv("ES_HOST", "127.0.0.1")
     ES_PORT = int(os.getenv("ES_PORT", 29200))
 
     VLM_MODEL_PATH = os.getenv("VLM_MODEL_PATH", "/home/leon/IdeaProjects/Chimera/runtime/models/Qwen2-VL-7B-Int4")
+    # 批量视觉推理：单次 generate 提交的最大图片数 (表格 / 插图按文档攒批)
+    VLM_BATCH_SIZE = int(os.getenv("VLM_BATCH_SIZE", 8))
+
+    # --- 检索配置 ---
+    # 双路检索并发线程数 & 单路超时 (超时的支路降级为空结果)
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", 16))
+    # 超时的支路无法中断 (底层 HTTP / Nebula 调用返回前一直占用线程)：线程池额外预留的线程数
+    RETRIEVAL_ABANDON_HEADROOM = int(os.getenv("RETRIEVAL_ABANDON_HEADROOM", 8))
+    RETRIEVAL_BRANCH_TIMEOUT_MS = int(os.getenv("RETRIEVAL_BRANCH_TIMEOUT_MS", 3000))
+    # 查询扩展：原始问题 + 抽取实体最多共几路向量检索 (一次批量编码、一次 Qdrant 往返)，1 = 只检索原始问题
+    RETRIEVAL_MAX_QUERIES = int(os.getenv("RETRIEVAL_MAX_QUERIES", 5))
+
+    # --- 语义答案缓存 (RunAgent) ---
+    # 同一 kb_ids 集合下，问题向量与历史问题余弦相似度 >= 阈值时直接回放上次答案 (仅首轮对话，带历史的追问不走缓存)
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+    # 条目有效期；知识库重新同步时会立即失效，TTL 兜底 Prompt / 模型变更带来的偏差
+    SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 6 * 3600))
+    # 单个 kb_ids 集合下最多保留的答案条数 (超出淘汰最早写入的)
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2000))
+
+    # --- ETL Worker 并发配置 ---
+    # 同时执行的同步任务槽位数 (1 = 旧版串行行为)
+    # 各槽位共用进程内唯一的 SentenceTransformer (encode 串行，不额外占显存)，但每个槽位各有一条流水线的队列与图谱线程
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 1))
+    # 预取上限：已出队 + 已下载、等待空闲槽位的任务数
+    WORKER_PREFETCH = int(os.getenv("WORKER_PREFETCH", 2))
+    # Docling 解析进程池大小 (0 = 在当前进程内解析)
+    # 每个解析进程各自加载一份 Docling 版面 / 表格 / OCR 模型 (约 1~2 GB 内存)，按机器内存调大
+    PARSE_PROCESSES = int(os.getenv("PARSE_PROCESSES", 1))
+    # 分页并行解析：页数达到阈值的 PDF 按区间拆给多个解析进程 (0 = 关闭，整份转换)
+    PARSE_PAGES_PER_TASK = int(os.getenv("PARSE_PAGES_PER_TASK", 16))
+    PARSE_PAGE_PARALLEL_MIN_PAGES = int(os.getenv("PARSE_PAGE_PARALLEL_MIN_PAGES", 32))
+    # 解析档位 fast | balanced | accurate (数据源 config_json.parse_profile 可覆盖)
+    PARSE_PROFILE = os.getenv("PARSE_PROFILE", "balanced")
+    # 自适应 OCR：页面原生文本层不少于该字符数时直接抽取文本，不再 OCR
+    OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", 32))
+    # 解析进程 -> Worker 的流式切片缓冲 (条数)，满时解析进程暂停产出
+    PARSE_STREAM_BUFFER = int(os.getenv("PARSE_STREAM_BUFFER", 32))
+    # 各阶段队列深度指标的上报间隔 (秒)
+    WORKER_METRICS_INTERVAL = int(os.getenv("WORKER_METRICS_INTERVAL", 10))
+    # 单次同步内的流水线 (parse -> enrich -> embed -> upsert -> kg)：阶段间有界队列长度、enrich 阶段线程数
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 64))
+    PIPELINE_ENRICH_WORKERS = int(os.getenv("PIPELINE_ENRICH_WORKERS", 1))
+    # 图谱抽取：每批切片数、初始/最大并发批次数 (遇 429 自动减半，连续成功后逐步回升)、429 重试次数
+    KG_BATCH_SIZE = int(os.getenv("KG_BATCH_SIZE", 1))
+    KG_CONCURRENCY = int(os.getenv("KG_CONCURRENCY", 4))
+    KG_MAX_CONCURRENCY = int(os.getenv("KG_MAX_CONCURRENCY", 16))
+    KG_RATE_LIMIT_RETRIES = int(os.getenv("KG_RATE_LIMIT_RETRIES", 4))
+    # 可靠队列：租约 (可见性超时，秒)、最大重试次数、重试退避基数 (秒，指数增长)
+    TASK_VISIBILITY_TIMEOUT = int(os.getenv("TASK_VISIBILITY_TIMEOUT", 300))
+    TASK_MAX_RETRIES = int(os.getenv("TASK_MAX_RETRIES", 3))
+    TASK_RETRY_BACKOFF = int(os.getenv("TASK_RETRY_BACKOFF", 30))
 
 # --- 业务参数 ---
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 500))
@@ -0,0 +1,94 @@
+import time
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class OperationCancelled(Exception):
+    """调用方已取消请求，或已超过截止时间 (deadline)"""
+    pass
+
+class CancelToken:
+    """
+    协作式取消令牌：由 RPC 入口创建，逐层传给 Manager / Workflow / LLM 客户端
+    - 长循环在每个批次/分片之间调用 raise_if_cancelled()
+    - 持有上游连接的组件通过 on_cancel() 注册关闭回调，取消时立即断开在途请求
+    """
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        :param deadline: 截止时间 (time.monotonic() 时间戳)，None 表示不限时
+        """
+        self.deadline = deadline
+        self.reason = ""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self._context = None
+
+    @classmethod
+    def from_grpc_context(cls, context) -> "CancelToken":
+        """
+        绑定 gRPC ServicerContext：继承客户端 deadline，并在 RPC 终止 (取消/断开/超时) 时触发取消
+        """
+        remaining = context.time_remaining() if hasattr(context, "time_remaining") else None
+        token = cls(deadline=time.monotonic() + remaining if remaining is not None else None)
+        token._context = context
+        context.add_callback(lambda: token.cancel("rpc terminated"))
+        return token
+
+    def cancel(self, reason: str = "cancelled"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception as e:
+                logger.warning(f"⚠️ [Cancel] 取消回调执行失败: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消回调 (如关闭 HTTP 流)；若已取消则立即执行
+        :return: 注销函数，在途请求正常结束后调用
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return unregister
+        callback()
+        return lambda: None
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+            return True
+        if self._context is not None and not self._context.is_active():
+            self.cancel("rpc inactive")
+            return True
+        return False
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的剩余秒数，不限时返回 None"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelled(self.reason or "cancelled")
+
+def check_cancelled(token: Optional[CancelToken]):
+    """令牌可选时的便捷检查"""
+    if token is not None:
+        token.raise_if_cancelled()
@@ -26,6 +26,19 @@ class BaseConnector(ABC):
         """
         pass
 
+    def prefetch(self):
+        """
+        可选：在任务等待执行槽位时提前完成 I/O (如下载源文件)，由 Worker 预取线程调用
+        默认不做任何事，load() 需自行兼容未预取的情况
+        """
+        pass
+
+    def close(self):
+        """
+        可选：释放 prefetch 占用的资源 (任务被放弃、未执行 load 时调用)
+        """
+        pass
+
 # 🔥 核心重构：连接器工厂
 class ConnectorFactory:
     _registry: Dict[str, Type[BaseConnector]] = {}
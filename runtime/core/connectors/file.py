@@ -1,35 +1,61 @@
 import os
+import uuid
 import logging
 from .base import BaseConnector, DocumentChunk, ConnectorFactory  # 引入工厂
 from skills.doc_parser import DoclingParser
 from core.stores.minio_store import MinioStore
+from config import Config
 
 logger = logging.getLogger(__name__)
 
 class FileConnector(BaseConnector):
     def __init__(self, kb_id, source_id, config):
         super().__init__(kb_id, source_id, config)
-        # config 示例: {"storage_path": "kbs/1/xxx.pdf", "file_name": "manual.pdf"}
+        # config 示例: {"storage_path": "kbs/1/xxx.pdf", "file_name": "manual.pdf", "parse_profile": "fast"}
         self.storage_path = config.get("storage_path")
         self.file_name = config.get("file_name", "unknown.pdf")
+        # 解析档位 (fast / balanced / accurate)，未指定时使用全局 PARSE_PROFILE
+        self.parse_profile = config.get("parse_profile")
         self.minio = MinioStore()
+        # 多任务并发时同名文件不能共用临时路径
+        self.temp_path = f"/tmp/chimera_src_{uuid.uuid4().hex[:8]}_{os.path.basename(self.file_name)}"
+        self._downloaded = False
+        # 小文件直接以 bytes 交给 Docling (DocumentStream)，不落盘
+        self._data = None
 
-    def load(self):
+    def prefetch(self):
         """
-        流程: MinIO下载 -> 临时文件 -> Docling解析 -> Yield Chunk
+        提前下载 (Worker 预取阶段调用)，load() 时直接解析
+        小文件读入内存；大文件流式写入临时文件，峰值内存与文件大小无关
         """
-        temp_path = f"/tmp/{self.file_name}"
+        if self._downloaded:
+            return
+        logger.info(f"📥 [FileConnector] 下载文件: {self.storage_path}")
+        stat = self.minio.stat(self.storage_path)
+        if stat.size <= Config.MINIO_INMEMORY_MAX_MB * 1024 * 1024:
+            self._data = self.minio.download_file(self.storage_path)
+        else:
+            self.minio.download_to_file(self.storage_path, self.temp_path, stat=stat)
+        self._downloaded = True
+
+    def close(self):
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self._data = None
+        self._downloaded = False
 
+    def load(self):
+        """
+        流程: MinIO下载 (若未预取) -> 临时文件 -> Docling解析 (进程池，边解析边产出) -> Yield Chunk
+        """
+        chunks = None
         try:
             # 1. 从 MinIO 下载文件到本地临时目录
-            logger.info(f"📥 [FileConnector] 下载文件: {self.storage_path}")
-            data_bytes = self.minio.download_file(self.storage_path)
-
-            with open(temp_path, "wb") as f:
-                f.write(data_bytes)
+            self.prefetch()
 
             # 2. 调用 Docling 解析
-            chunks = DoclingParser.parse_and_chunk(temp_path, self.file_name)
+            source = self._data if self._data is not None else self.temp_path
+            chunks = DoclingParser.parse_in_pool(source, self.file_name, self.parse_profile)
 
             # 3. 转换为标准 DocumentChunk 并 Yield
             for chunk in chunks:
@@ -41,7 +67,10 @@ class FileConnector(BaseConnector):
                         "file_name": self.file_name,
                         "file_path": self.storage_path,
                         "source": "file",
-                        "breadcrumb": chunk["metadata"].get("breadcrumb", "")
+                        "breadcrumb": chunk["metadata"].get("breadcrumb", ""),
+                        # 表格截图 / 插图的内存句柄，交给下游 VLM 后由 ETLManager 释放
+                        "image": chunk["metadata"].get("image"),
+                        "is_table": chunk["metadata"].get("is_table", False)
                     }
                 )
 
@@ -49,9 +78,10 @@ class FileConnector(BaseConnector):
             logger.error(f"❌ FileConnector Error: {e}")
             raise e
         finally:
-            # 清理临时文件
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            # 提前结束 (取消 / 出错) 时先停止解析流 (释放尚未交出的切片图片)，再清理临时文件
+            if chunks is not None:
+                chunks.close()
+            self.close()
 
 # 🔥 核心重构：自动注册
 ConnectorFactory.register("file", FileConnector)
\ No newline at end of file
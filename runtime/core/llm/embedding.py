@@ -1,23 +1,175 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
 from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Callable, Optional
 from config import Config
-import logging
+from core.stores.local_cache import LocalKVCache
 
 class EmbeddingModel:
     _instance = None
+    _model_name = None
+    _cache = None
+    _init_lock = threading.Lock()
+    # 多个同步槽位 / 检索线程共用一个模型实例：SentenceTransformer.encode 不保证线程安全，逐批串行
+    _encode_lock = threading.Lock()
 
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            logging.info("📥 Loading Embedding Model...")
-            try:
-                # 生产环境可以用 modelscope 的 snapshot_download
-                cls._instance = SentenceTransformer(Config.EMBEDDING_MODEL_NAME)
-            except:
-                cls._instance = SentenceTransformer('all-MiniLM-L6-v2')
-            logging.info("✅ Embedding Model Loaded")
+            with cls._init_lock:
+                if cls._instance is None:
+                    logging.info("📥 Loading Embedding Model...")
+                    try:
+                        # 生产环境可以用 modelscope 的 snapshot_download
+                        model = SentenceTransformer(Config.EMBEDDING_MODEL_NAME)
+                        cls._model_name = Config.EMBEDDING_MODEL_NAME
+                    except:
+                        model = SentenceTransformer('all-MiniLM-L6-v2')
+                        cls._model_name = 'all-MiniLM-L6-v2'
+                    cls._instance = model
+                    logging.info("✅ Embedding Model Loaded")
         return cls._instance
 
+    @classmethod
+    def get_cache(cls) -> Optional[LocalKVCache]:
+        """
+        向量缓存 (懒加载)：key = 模型名 + 内容哈希，value = float32 原始字节
+        """
+        if cls._cache is None and Config.EMBED_CACHE_ENABLED:
+            try:
+                cls._cache = LocalKVCache(
+                    os.path.join(Config.CACHE_DIR, "embeddings.db"),
+                    max_bytes=Config.EMBED_CACHE_MAX_MB * 1024 * 1024,
+                    hot_size=Config.EMBED_CACHE_HOT_SIZE,
+                    name="EmbedCache"
+                )
+            except Exception as e:
+                logging.warning(f"⚠️ 向量缓存初始化失败，退化为直接编码: {e}")
+                Config.EMBED_CACHE_ENABLED = False
+        return cls._cache
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, float]:
+        """向量缓存命中统计 (hot_hits / disk_hits / misses / hit_rate ...)"""
+        return cls._cache.stats() if cls._cache else {}
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        # 与 DoclingParser 的 content_hash 保持一致 (md5)，未经 VLM 增强的切片可直接命中
+        return hashlib.md5(text.encode()).hexdigest()
+
     @staticmethod
     def encode(text: str):
+        return EmbeddingModel.encode_batch([text])[0]
+
+    @staticmethod
+    def encode_batch(texts: List[str], batch_size: int = None) -> List[List[float]]:
+        """
+        批量向量化：先查向量缓存，只对未命中的文本做一次 encode，
+        由 SentenceTransformer 内部按 batch_size 做 forward
+        """
+        if not texts:
+            return []
+
+        cache = EmbeddingModel.get_cache()
+        if cache is None:
+            return EmbeddingModel._encode_raw(texts, batch_size).tolist()
+
+        # 以实际加载的模型名做命名空间 (加载失败回退到默认模型时不会串用旧向量)
+        EmbeddingModel.get_instance()
+        keys = [f"{EmbeddingModel._model_name}:{EmbeddingModel.content_hash(t)}" for t in texts]
+        cached = cache.get_many(keys)
+
+        # 同一批内重复文本只编码一次
+        miss_idx = {}
+        for i, k in enumerate(keys):
+            if k not in cached and k not in miss_idx:
+                miss_idx[k] = i
+
+        if miss_idx:
+            miss_keys = list(miss_idx.keys())
+            vectors = EmbeddingModel._encode_raw([texts[miss_idx[k]] for k in miss_keys], batch_size)
+            fresh = {k: vec.astype(np.float32).tobytes() for k, vec in zip(miss_keys, vectors)}
+            cache.put_many(fresh.items())
+            cached.update(fresh)
+
+        return [np.frombuffer(cached[k], dtype=np.float32).tolist() for k in keys]
+
+    @staticmethod
+    def _encode_raw(texts: List[str], batch_size: int = None) -> np.ndarray:
         model = EmbeddingModel.get_instance()
-        return model.encode(text).tolist()
\ No newline at end of file
+        with EmbeddingModel._encode_lock:
+            return model.encode(
+                texts,
+                batch_size=batch_size or Config.EMBED_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        粗略估算 Token 数 (不走 tokenizer，避免额外开销)：
+        CJK 字符按 1 字 1 Token，其余按 4 字符 1 Token
+        """
+        if not text:
+            return 0
+        cjk = sum(1 for ch in text if '一' <= ch <= '鿿')
+        return cjk + (len(text) - cjk) // 4 + 1
+
+
+class EmbeddingBatcher:
+    """
+    向量化攒批器：按条数或 Token 预算攒够一批后，一次 encode 并交给下游 (如 QdrantStore.upsert_chunks)
+    point 结构与 upsert_chunks 一致，待编码文本取自 payload["content"]
+    """
+    def __init__(self, sink: Callable[[List[Dict[str, Any]]], None], batch_size: int = None, token_budget: int = None):
+        self.sink = sink
+        self.batch_size = batch_size or Config.EMBED_BATCH_SIZE
+        self.token_budget = token_budget or Config.EMBED_TOKEN_BUDGET
+        self._points: List[Dict[str, Any]] = []
+        self._tokens = 0
+        self.total_encoded = 0
+        self.busy_seconds = 0.0  # encode + 写入下游的累计耗时，用于计算吞吐
+
+    def __len__(self):
+        return len(self._points)
+
+    def add(self, point: Dict[str, Any]) -> int:
+        """
+        加入一个待编码的 point，满批时自动 flush
+        :return: 本次 flush 写出的条数 (未触发则为 0)
+        """
+        self._points.append(point)
+        self._tokens += EmbeddingModel.estimate_tokens(point["payload"].get("content", ""))
+        if len(self._points) >= self.batch_size or self._tokens >= self.token_budget:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """
+        编码并写出当前缓冲区 (向量优先原则：图谱写入前必须先调用)
+        """
+        if not self._points:
+            return 0
+        points, self._points, self._tokens = self._points, [], 0
+        start = time.perf_counter()
+
+        texts = [p["payload"].get("content", "") for p in points]
+        vectors = EmbeddingModel.encode_batch(texts, batch_size=self.batch_size)
+        for p, vec in zip(points, vectors):
+            p["vector"] = vec
+
+        self.sink(points)
+        self.total_encoded += len(points)
+        self.busy_seconds += time.perf_counter() - start
+        return len(points)
+
+    @property
+    def throughput(self) -> float:
+        """chunks/sec (仅统计 encode + 写入耗时)"""
+        return self.total_encoded / self.busy_seconds if self.busy_seconds else 0.0
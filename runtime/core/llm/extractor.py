@@ -10,7 +10,7 @@ logger = logging.getLogger(__name__)
 
 class KGExtractor:
     def __init__(self):
-        self.llm = LLMClient()
+        self.llm = LLMClient.get_instance()
         self._load_prompt()
 
     def _load_prompt(self):
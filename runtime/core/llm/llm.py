@@ -1,10 +1,26 @@
 from openai import OpenAI
 from config import Config
 import logging
+import threading
+from core.cancellation import CancelToken, OperationCancelled
 
 logger = logging.getLogger(__name__)
 
 class LLMClient:
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "LLMClient":
+        """
+        进程级共享客户端：OpenAI 客户端内部持有 httpx 连接池，线程安全，复用即可
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
     def __init__(self):
         self.client = OpenAI(
             api_key=Config.DEEPSEEK_API_KEY,
@@ -12,10 +28,11 @@ class LLMClient:
         )
         self.model_name = "deepseek-chat" # 或从 Config 读取
 
-    def stream_chat(self, query: str, system_prompt: str, history: list = None):
+    def stream_chat(self, query: str, system_prompt: str, history: list = None, cancel_token: CancelToken = None):
         """
         流式对话
         :param history: 格式 [{"role": "user", "content": "..."}]
+        :param cancel_token: 取消令牌；取消时立即关闭上游 HTTP 流，并以剩余 deadline 作为请求超时
         """
         messages = []
 
@@ -36,16 +53,29 @@ class LLMClient:
         # 3. 添加当前问题 (如果 query 已经在 prompts 里了，这里可以不加，取决于 prompts 策略)
         messages.append({"role": "user", "content": query})
 
+        response, unregister = None, None
         try:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            extra = {}
+            if cancel_token and cancel_token.remaining() is not None:
+                extra["timeout"] = cancel_token.remaining()
+
             response = self.client.chat.completions.create(
                 model=self.model_name,
                 messages=messages,
                 stream=True,
                 temperature=0.3,
                 stream_options={"include_usage": True},
+                **extra
             )
+            if cancel_token:
+                # gRPC 取消回调在其他线程触发，直接断开连接，阻塞中的读取会立即返回
+                unregister = cancel_token.on_cancel(response.close)
 
             for chunk in response:
+                if cancel_token and cancel_token.cancelled:
+                    raise OperationCancelled(cancel_token.reason)
                 # 1. 处理内容增量
                 if chunk.choices and chunk.choices[0].delta.content:
                     yield {
@@ -64,5 +94,14 @@ class LLMClient:
                     }
 
         except Exception as e:
+            if cancel_token and cancel_token.cancelled:
+                logger.info(f"🛑 LLM 流已取消: {cancel_token.reason}")
+                raise OperationCancelled(cancel_token.reason) from e
             logger.error(f"OpenAI API Error: {e}")
-            raise e
\ No newline at end of file
+            raise e
+        finally:
+            if unregister:
+                unregister()
+            # 正常结束时为空操作；取消或下游提前关闭生成器时释放连接
+            if response is not None:
+                response.close()
\ No newline at end of file
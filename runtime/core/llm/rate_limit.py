@@ -0,0 +1,97 @@
+import time
+import logging
+import threading
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    识别上游 429：openai.RateLimitError / 带 status_code=429 的 HTTP 异常 / 企业版 Agent 包装后的错误信息
+    """
+    try:
+        from openai import RateLimitError
+        if isinstance(error, RateLimitError):
+            return True
+    except ImportError:
+        pass
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    msg = str(error).lower()
+    return "429" in msg or "rate limit" in msg or "too many requests" in msg
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制器 (进程级共享，按上游名称区分)：
+    - 加性增：连续成功 limit 次后 limit + 1 (不超过 max_limit)
+    - 乘性减：遇到 429 时 limit 减半，并在冷却期内暂停发放新的许可
+    多个同步任务共用同一个 API Key 的限流配额，因此控制器必须是全局的
+    """
+    _instances: Dict[str, "AdaptiveConcurrency"] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, name: str, initial: int, max_limit: int, min_limit: int = 1) -> "AdaptiveConcurrency":
+        with cls._instances_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(name, initial, max_limit, min_limit)
+            return cls._instances[name]
+
+    def __init__(self, name: str, initial: int, max_limit: int, min_limit: int = 1):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._successes = 0
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._cooldown_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                self._cond.wait()
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_rate_limited(self, cooldown: float = 0.5):
+        """
+        并发减半，并短暂暂停发放新许可 (被限流的请求自身的退避由调用方处理)
+        """
+        with self._cond:
+            self.rate_limited += 1
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                # 同一波 429 (冷却期内) 只减半一次，避免并发请求把 limit 连续砍到底
+                return
+            old = self.limit
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._successes = 0
+            self._cooldown_until = now + cooldown
+        logger.warning(f"🚦 [{self.name}] 触发 429 限流，并发 {old} -> {self.limit}")
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self.in_flight, "rate_limited": self.rate_limited}
@@ -0,0 +1,64 @@
+import re
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+from config import Config
+
+class BM25Encoder:
+    """
+    本地 BM25 稀疏向量编码 (无模型、无词表，进程内纯计算)
+    - 文档侧：词频按 BM25 饱和公式加权 (k1 / b / 平均文档长度取自 Config)
+    - 查询侧：每个词权重 1.0
+    - IDF 由 Qdrant 在检索时按集合统计计算 (稀疏向量配置 modifier=IDF)，入库时无需全局词频
+    词项经 crc32 哈希映射为稀疏维度，新词无需维护词表
+    """
+    # 英文/数字串 (允许 - _ . / : 连接，覆盖零件号、条款号、错误码) | 连续汉字
+    _TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*|[\u4e00-\u9fff]+")
+    _SPLIT_RE = re.compile(r"[-_./:]")
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """
+        - 英文/数字：小写整词；带连接符的编号同时保留整体 (精确匹配) 与各段 (部分匹配)
+        - 汉字：双字切分 (bigram)，单个汉字保留原样，无需分词词典
+        """
+        tokens = []
+        for match in cls._TOKEN_RE.finditer((text or "").lower()):
+            token = match.group()
+            if "\u4e00" <= token[0] <= "\u9fff":
+                if len(token) == 1:
+                    tokens.append(token)
+                else:
+                    tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+                continue
+            tokens.append(token)
+            parts = cls._SPLIT_RE.split(token)
+            if len(parts) > 1:
+                tokens.extend(p for p in parts if p)
+        return tokens
+
+    @staticmethod
+    def token_id(token: str) -> int:
+        return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+    @classmethod
+    def _counts(cls, text: str) -> Tuple[Counter, int]:
+        tokens = cls.tokenize(text)
+        return Counter(cls.token_id(t) for t in tokens), len(tokens)
+
+    @classmethod
+    def encode_document(cls, text: str) -> Tuple[List[int], List[float]]:
+        """返回 (indices, values)；空文本返回两个空列表"""
+        counts, length = cls._counts(text)
+        k1, b = Config.BM25_K1, Config.BM25_B
+        norm = k1 * (1 - b + b * length / max(1, Config.BM25_AVG_DOC_LEN))
+        indices = list(counts)
+        values = [tf * (k1 + 1) / (tf + norm) for tf in counts.values()]
+        return indices, values
+
+    @classmethod
+    def encode_query(cls, text: str) -> Tuple[List[int], List[float]]:
+        counts, _ = cls._counts(text)
+        indices = list(counts)
+        return indices, [1.0] * len(indices)
@@ -1,19 +1,129 @@
 import json
 import time
 import uuid
-import glob
+import random
 import logging
 import hashlib
+import threading
 import traceback
-from typing import Generator, Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, Dict, Any, List, Optional, Callable
 
-from core.llm.embedding import EmbeddingModel
+from core.llm.embedding import EmbeddingModel, EmbeddingBatcher
 from core.stores.qdrant_store import QdrantStore
 from core.managers.kg_registry import KGRegistry
-from core.connectors.base import ConnectorFactory
+from core.connectors.base import BaseConnector, ConnectorFactory
+from core.cancellation import CancelToken, OperationCancelled, check_cancelled
+from core.managers.etl_pipeline import PipelineStage, StagePipeline
+from core.llm.rate_limit import AdaptiveConcurrency, is_rate_limited
+from core.stores.image_buffer import ImageHandle
+from core.stores.answer_cache import SemanticAnswerCache
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+# 确定性 Point ID 的命名空间：同一 (kb_id, source_id, content_hash) 永远映射到同一个 ID
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c5d2e-3b7a-4c1e-9a55-c41d3e8b0f27")
+
+class SyncTracker:
+    """
+    单次同步的进度与吞吐统计，生成流式进度帧 (SyncDataSourceStream)
+    """
+    def __init__(self, vector_batcher: EmbeddingBatcher):
+        self.start = time.time()
+        self.stage = "parsing"
+        self.chunks = 0
+        self.pages = 0
+        self.kg_chunks = 0
+        self.kg_first_start = None
+        self.kg_last_end = None
+        self.vector_batcher = vector_batcher
+
+    def observe_chunk(self, chunk):
+        self.chunks += 1
+        page = chunk.metadata.get("page_number") or 0
+        if isinstance(page, int) and page > self.pages:
+            self.pages = page
+
+    def observe_kg(self, n_chunks: int, started: float, finished: float):
+        # 图谱批次并发执行，吞吐按首批开始到末批结束的墙钟时间计算
+        self.kg_chunks += n_chunks
+        self.kg_first_start = started if self.kg_first_start is None else min(self.kg_first_start, started)
+        self.kg_last_end = finished if self.kg_last_end is None else max(self.kg_last_end, finished)
+
+    @property
+    def kg_cps(self) -> float:
+        if not self.kg_chunks or self.kg_last_end is None:
+            return 0.0
+        return self.kg_chunks / max(self.kg_last_end - self.kg_first_start, 1e-6)
+
+    def frame(self, stage: str = None) -> Dict[str, Any]:
+        if stage:
+            self.stage = stage
+        return {
+            "chunks": self.chunks,
+            "pages": self.pages,
+            "status": "done" if self.stage == "done" else "processing",
+            "stage": self.stage,
+            "embed_cps": round(self.vector_batcher.throughput, 2),
+            "kg_cps": round(self.kg_cps, 2),
+            "elapsed_ms": int((time.time() - self.start) * 1000)
+        }
+
+class ConcurrentKGRunner:
+    """
+    图谱抽取批次的并发执行器：在途批次数由全局 AdaptiveConcurrency (AIMD) 控制，
+    许可不足时 submit 阻塞 (对流水线形成背压)；429 时降并发、退避后重试该批次
+    """
+    def __init__(self, fn: Callable[[List[Dict]], Dict], on_result: Callable[[Dict], Any]):
+        self.fn = fn
+        self.on_result = on_result
+        self.limiter = AdaptiveConcurrency.get_instance(
+            "kg-llm", initial=Config.KG_CONCURRENCY, max_limit=Config.KG_MAX_CONCURRENCY
+        )
+        self._pool = ThreadPoolExecutor(max_workers=Config.KG_MAX_CONCURRENCY, thread_name_prefix="kg-extract")
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, batch: List[Dict]):
+        self.limiter.acquire()
+        try:
+            future = self._pool.submit(self._run, batch)
+        except Exception:
+            self.limiter.release()
+            raise
+        self._futures.append(future)
+        # 及早暴露失败 (如取消)，不必等到 drain
+        for f in [f for f in self._futures if f.done()]:
+            self._futures.remove(f)
+            f.result()
+
+    def _run(self, batch: List[Dict]):
+        try:
+            for attempt in range(Config.KG_RATE_LIMIT_RETRIES + 1):
+                try:
+                    result = self.fn(batch)
+                    self.limiter.on_success()
+                    break
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == Config.KG_RATE_LIMIT_RETRIES:
+                        raise
+                    self.limiter.on_rate_limited()
+                    # 退避期间继续持有许可：池线程数 = 最大并发，归还后重新排队会与已提交的批次互等
+                    time.sleep(min(1.0 * (2 ** attempt), 30) * (0.5 + random.random()))
+            with self._lock:
+                self.on_result(result)
+        finally:
+            self.limiter.release()
+
+    def drain(self):
+        futures, self._futures = self._futures, []
+        for f in futures:
+            f.result()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
 class ETLManager:
     def __init__(self, qdrant_store: QdrantStore, nebula_store: Any = None):
         self.qdrant = qdrant_store
@@ -21,18 +131,20 @@ class ETLManager:
         self.embed_model = EmbeddingModel.get_instance()
 
         self.use_kg = self.nebula is not None and KGRegistry.is_active()
+        # 图谱批次由 ConcurrentKGRunner 多线程执行，而 NebulaStore / ES 客户端不保证线程安全：
+        # 存量查询与 upsert_graph 串行 (耗时大头的 LLM 调用仍并发)
+        self._graph_lock = threading.Lock()
 
-    def __del__(self):
-        import glob
-        temp_files = glob.glob("/tmp/chimera_img_*") + glob.glob("/tmp/chimera_table_*")
-        for f in temp_files:
-            try: os.remove(f)
-            except: pass
-        logger.info("🧹 Temporary vision files cleaned up.")
-
-    def sync_datasource(self, kb_id: int, source_id: int, source_type: str, config_json: str) -> Generator[Dict[str, Any], None, None]:
+    def sync_datasource(self, kb_id: int, source_id: int, source_type: str, config_json: str,
+                        cancel_token: Optional[CancelToken] = None,
+                        connector: Optional[BaseConnector] = None) -> Generator[Dict[str, Any], None, None]:
         """
         同步主任务：集成领域感知、异步批处理与状态自愈
+        config_json.sync_mode: "incremental" (默认，只嵌入新切片) | "full" (全部重新嵌入)
+        两种模式下，本次未出现的旧切片都会被批量删除
+        cancel_token: 调用方取消/超时后，在切片与批次边界抛出 OperationCancelled，
+                      已写入的向量保留 (下次增量同步直接复用)，不再执行旧切片删除
+        connector: Worker 预取阶段已构造 (并已下载源文件) 的连接器，为空时按 source_type 新建
         """
         start_time = time.time()
         logger.info(f"🔄 [ETL Start] KB={kb_id} Source={source_id} Type={source_type}")
@@ -42,147 +154,338 @@ class ETLManager:
             "visual_entities": 0,
             "total_chunks": 0
         }
+        diff_stats = {"added": 0, "unchanged": 0, "removed": 0}
+        total_processed = 0
+        # 本次同步经手的图片句柄：VLM 用完即释放，同步结束 (含取消 / 出错) 时兜底全部释放
+        sync_images = []
 
         try:
             config = json.loads(config_json)
-            connector_cls = ConnectorFactory.get_connector(source_type)
-            connector = connector_cls(kb_id, source_id, config)
-
-            # 缓冲区配置
-            vector_buffer = []
-            kg_batch_buffer = []
-            V_BATCH_SIZE = 10
-            K_BATCH_SIZE = 1 # 针对 A4000 的 VLM 稳定性，建议设为 1 或 2
-
-            total_processed = 0
-            doc_domain = "general"
-
-            # 1. 领域感知：预读第一个分片
+            if connector is None:
+                connector_cls = ConnectorFactory.get_connector(source_type)
+                connector = connector_cls(kb_id, source_id, config)
+
+            # 0. 增量比对基线：该数据源当前已入库的 point
+            incremental = config.get("sync_mode", "incremental") != "full"
+            existing_points = self.qdrant.scroll_source_points(kb_id, source_id)
+            seen_ids = set()
+            logger.info(f"🧮 [Diff] 模式={'incremental' if incremental else 'full'}，已有切片 {len(existing_points)} 条")
+
+            # 缓冲区配置：向量按条数/Token 预算攒批后一次 encode，由 upsert 阶段写入 Qdrant
+            pending_kg: List[Dict] = []
+            ready_batches: List[tuple] = []
+            def emit_vector_batch(points):
+                # 攒批器满批回调：向量批次连同对应的图谱任务一起暂存，由 embed 阶段用自己的 emit 交给 upsert 阶段
+                ready_batches.append((points, pending_kg[:]))
+                pending_kg.clear()
+
+            vector_batcher = EmbeddingBatcher(emit_vector_batch)
+            tracker = SyncTracker(vector_batcher)
+            K_BATCH_SIZE = Config.KG_BATCH_SIZE # 针对 A4000 的 VLM 稳定性，建议设为 1 或 2
             classifier = KGRegistry.get_agent("classifier")
-            chunks_iterator = connector.load()
-            first_chunk = next(chunks_iterator, None)
-
-            if first_chunk and classifier:
-                classification = classifier.run(config.get("file_name", "Unknown"), first_chunk.content)
-                doc_domain = classification.get("domain", "general")
-                logger.info(f"🏷️  [Domain] 文档领域识别为: {doc_domain.upper()}")
-
-            # 2. 处理第一个分片
-            if first_chunk:
-                self._process_single_chunk(first_chunk, kb_id, source_id, doc_domain, vector_buffer, kg_batch_buffer)
-
-            # 3. 循环处理剩余分片
-            for chunk in chunks_iterator:
-                self._process_single_chunk(chunk, kb_id, source_id, doc_domain, vector_buffer, kg_batch_buffer)
-
-                # 4. 刷新逻辑：向量优先原则 (防止图谱更新时 ID 不存在)
-                if len(vector_buffer) >= V_BATCH_SIZE:
-                    self.qdrant.upsert_chunks(vector_buffer)
-                    vector_buffer = []
-
+            doc = {"domain": "general"}
+            enrich_lock = threading.Lock()
+
+            # ---------- 阶段 1: parse (领域识别) ----------
+            def classify_first(chunks):
+                # 1. 领域感知：文档顺序的首个分片决定文档领域
+                # 在单线程的 parse 阶段完成，先于任何切片进入 enrich (enrich 多 worker 时结果仍确定)
+                chunks = iter(chunks)
+                try:
+                    first = next(chunks, None)
+                    if first is None:
+                        return
+                    if classifier:
+                        classification = classifier.run(config.get("file_name", "Unknown"), first.content)
+                        doc["domain"] = classification.get("domain", "general")
+                        logger.info(f"🏷️  [Domain] 文档领域识别为: {doc['domain'].upper()}")
+                    yield first
+                    yield from chunks
+                finally:
+                    # 提前结束时关闭连接器生成器，触发其清理 (如删除临时文件)
+                    if hasattr(chunks, "close"):
+                        chunks.close()
+
+            # ---------- 阶段 2: enrich (去重比对 / VLM 增强) ----------
+            def enrich(chunk, emit):
+                check_cancelled(cancel_token)
+                image = chunk.metadata.get("image")
+                with enrich_lock:
+                    if image is not None:
+                        sync_images.append(image)
+
+                    chunk_id = self._chunk_point_id(kb_id, source_id, chunk)
+                    if chunk_id in seen_ids:
+                        # 同一文档内完全重复的切片，只保留一份
+                        if image is not None: image.release()
+                        return
+                    seen_ids.add(chunk_id)
+                    old_payload = existing_points.get(chunk_id)
+                    if incremental and old_payload is not None:
+                        diff_stats["unchanged"] += 1
+                    elif old_payload is None:
+                        diff_stats["added"] += 1
+                    else:
+                        diff_stats["unchanged"] += 1
+                    final_metrics["total_chunks"] += 1
+                    tracker.observe_chunk(chunk)
+
+                if incremental and old_payload is not None:
+                    # 内容未变：跳过 VLM / 嵌入 / 写入，仅补齐未完成的图谱抽取 (向量已在库中)
+                    if self.use_kg and old_payload.get("kg_status") != "completed":
+                        emit((None, {"id": chunk_id, "text": chunk.content, "metadata": chunk.metadata}, None))
+                    elif image is not None:
+                        image.release()
+                    return
+                emit(self._process_single_chunk(chunk, chunk_id, kb_id, source_id, doc["domain"],
+                                                cancel_token=cancel_token))
+
+            # ---------- 阶段 2.5: vision (表格 / 插图按窗口攒批，一次 generate 调用) ----------
+            vision_buffer: List[tuple] = []
+            def vision(item, emit):
+                point, kg_item, vision_req = item
+                if vision_req is None:
+                    emit((point, kg_item))
+                    return
+                vision_buffer.append(item)
+                if len(vision_buffer) >= Config.VLM_BATCH_SIZE:
+                    vision_flush(emit)
+
+            def vision_flush(emit):
+                if not vision_buffer:
+                    return
+                window = vision_buffer[:]
+                vision_buffer.clear()
+                self._describe_visual_batch(window, cancel_token)
+                for point, kg_item, _ in window:
+                    emit((point, kg_item))
+
+            # ---------- 阶段 3: embed (攒批 encode) ----------
+            def emit_ready(emit):
+                while ready_batches:
+                    emit(ready_batches.pop(0))
+
+            def embed(item, emit):
+                point, kg_item = item
+                if kg_item:
+                    pending_kg.append(kg_item)
+                if point is not None:
+                    vector_batcher.add(point)
+                elif not len(vector_batcher):
+                    emit_vector_batch([])
+                emit_ready(emit)
+
+            def embed_flush(emit):
+                vector_batcher.flush()
+                if pending_kg:
+                    emit_vector_batch([])
+                emit_ready(emit)
+
+            # ---------- 阶段 4: upsert (写 Qdrant，之后才放行图谱任务) ----------
+            def upsert(batch, emit):
+                points, kg_items = batch
+                if points:
+                    self.qdrant.upsert_chunks(points)
+                # 3. 向量优先原则：图谱任务只在其向量写入完成后才进入 KG 阶段 (防止图谱更新时 ID 不存在)
+                for kg_item in kg_items:
+                    emit(kg_item)
+
+            # ---------- 阶段 5: kg (攒批抽取图谱，多批并发，AIMD 控制在途 LLM 调用数) ----------
+            kg_batch_buffer: List[Dict] = []
+            def merge_kg_metrics(batch_metrics):
+                for k in final_metrics:
+                    if batch_metrics and k in batch_metrics: final_metrics[k] += batch_metrics[k]
+
+            kg_runner = ConcurrentKGRunner(
+                lambda batch: self._timed_kg_flush(tracker, batch, doc["domain"], cancel_token),
+                on_result=merge_kg_metrics
+            ) if self.use_kg else None
+            def kg_extract(kg_item, emit):
+                kg_batch_buffer.append(kg_item)
                 if len(kg_batch_buffer) >= K_BATCH_SIZE:
-                    # 在抽图谱前，强制排空当前的向量缓冲区
-                    batch_metrics = self._flush_kg_batch(kg_batch_buffer, domain=doc_domain)
-                    for k in final_metrics:
-                        if k in batch_metrics: final_metrics[k] += batch_metrics[k]
-                    kg_batch_buffer = []
-
-
-                final_metrics["total_chunks"] += 1
-                yield {"chunks": final_metrics["total_chunks"], "status": "processing"}
-
-            # 5. 清理最后残留的缓冲区
-            if vector_buffer:
-                self.qdrant.upsert_chunks(vector_buffer)
-            if kg_batch_buffer:
-                self._flush_kg_batch(kg_batch_buffer, domain=doc_domain)
+                    kg_runner.submit(kg_batch_buffer[:])
+                    kg_batch_buffer.clear()
+
+            def kg_flush(emit):
+                if kg_batch_buffer:
+                    kg_runner.submit(kg_batch_buffer[:])
+                    kg_batch_buffer.clear()
+                kg_runner.drain()
+
+            stages = [
+                PipelineStage("parse", source=classify_first(connector.load())),
+                PipelineStage("enrich", enrich, workers=Config.PIPELINE_ENRICH_WORKERS),
+                PipelineStage("vision", vision, flush=vision_flush),
+                PipelineStage("embed", embed, flush=embed_flush),
+                PipelineStage("upsert", upsert),
+            ]
+            if self.use_kg:
+                stages.append(PipelineStage("kg", kg_extract, flush=kg_flush))
+            pipeline = StagePipeline(stages, queue_size=Config.PIPELINE_QUEUE_SIZE,
+                                     cancel_token=cancel_token, name=f"etl-{source_id}")
+
+            # 首个分片产出前即为文档下载/解析阶段
+            yield tracker.frame("parsing")
+            pipeline.start()
+            try:
+                last_chunks, finalizing = 0, False
+                while not pipeline.wait(timeout=0.2):
+                    if not finalizing and stages[2].done.is_set():
+                        # 4. 解析与增强结束，剩余为排空向量/图谱缓冲区
+                        finalizing = True
+                        yield tracker.frame("finalizing")
+                    elif tracker.chunks != last_chunks:
+                        last_chunks = tracker.chunks
+                        yield tracker.frame("processing")
+            finally:
+                pipeline.stop()
+                if kg_runner: kg_runner.shutdown()
+                total_processed = tracker.chunks
+            stage_report = pipeline.report()
+            self._log_stage_report(stage_report)
+            check_cancelled(cancel_token)
+
+            # 5. 批量删除本次已不存在的旧切片
+            yield tracker.frame("cleanup")
+            # 解析器失败时会返回空结果，此时保留旧数据，避免误删整个数据源
+            stale_ids = [pid for pid in existing_points if pid not in seen_ids]
+            if stale_ids and seen_ids:
+                self.qdrant.delete_points(stale_ids)
+                diff_stats["removed"] = len(stale_ids)
+            elif stale_ids:
+                logger.warning(f"⚠️ [Diff] 本次未解析出任何切片，跳过删除 {len(stale_ids)} 条旧数据")
 
             logger.info(f"✅ [ETL Done] 共处理 {total_processed} 个切片，耗时 {time.time() - start_time:.2f}s")
-            yield {"success": True, "chunks": total_processed, "metrics": final_metrics}
-
+            logger.info(f"🧮 [Diff] 新增 {diff_stats['added']} / 未变 {diff_stats['unchanged']} / 删除 {diff_stats['removed']}")
+            logger.info(f"🗄️ [EmbedCache] {EmbeddingModel.cache_stats()}")
+            if self.use_kg:
+                from skills.vlm_service import VLMService
+                if VLMService.cache_stats():
+                    logger.info(f"🗄️ [VLMCache] {VLMService.cache_stats()}")
+            yield {**tracker.frame("done"), "success": True, "chunks": total_processed, "metrics": final_metrics,
+                   "stages": stage_report, **diff_stats}
+
+        except OperationCancelled as e:
+            logger.warning(f"🛑 [ETL Cancelled] KB={kb_id} Source={source_id} 已处理 {total_processed} 个切片: {e}")
+            raise
         except Exception as e:
             logger.error(f"❌ [ETL Error] {str(e)}")
             logger.error(traceback.format_exc())
             raise e
         finally:
-            # 🔥 4.1 自动清理临时视觉文件
-            for f in glob.glob("/tmp/chimera_img_*") + glob.glob("/tmp/chimera_table_*"):
-                try: os.remove(f)
-                except: pass
+            # 🔥 4.1 释放本次同步的图片 (只动自己的句柄，并发同步互不影响)
+            for image in sync_images:
+                image.release()
+            # 知识库内容已变 (含取消 / 出错前已写入的部分)，基于旧内容的缓存答案全部失效
+            SemanticAnswerCache.invalidate_kb(kb_id)
+
+    @staticmethod
+    def _log_stage_report(report: Dict[str, Dict[str, float]]):
+        logger.info(f"⏱️ [Pipeline] {'stage':<8}{'items':>7}{'busy_s':>9}{'util':>7}{'items/s':>10}{'max_q':>7}")
+        for name, st in report.items():
+            logger.info(f"⏱️ [Pipeline] {name:<8}{st['items']:>7}{st['busy_s']:>9.2f}{st['utilization']:>7.0%}"
+                        f"{st['items_per_sec']:>10.1f}{st['max_queue']:>7}")
+
+    def _timed_kg_flush(self, tracker: SyncTracker, buffer: List[Dict], domain: str,
+                        cancel_token: Optional[CancelToken] = None):
+        start = time.perf_counter()
+        try:
+            return self._flush_kg_batch(buffer, domain=domain, cancel_token=cancel_token)
+        finally:
+            tracker.observe_kg(len(buffer), start, time.perf_counter())
 
-    def _process_single_chunk(self, chunk, kb_id, source_id, domain, v_buf, k_buf):
+    @staticmethod
+    def _chunk_point_id(kb_id, source_id, chunk) -> str:
         """
-        内部逻辑单元：负责单个切片的 VLM 增强、向量化和指纹校验
+        确定性 Point ID：uuid5(kb_id:source_id:content_hash)，重复同步同一内容会覆盖而不是追加
+        """
+        content_hash = chunk.metadata.get("content_hash") or hashlib.md5(chunk.content.encode()).hexdigest()
+        return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{kb_id}:{source_id}:{content_hash}"))
+
+    def _process_single_chunk(self, chunk, chunk_uuid, kb_id, source_id, domain,
+                              cancel_token: Optional[CancelToken] = None):
+        """
+        内部逻辑单元 (enrich 阶段)：负责单个切片的指纹校验，视觉增强留给 vision 阶段攒批
+        :return: (待编码 point, 图谱任务或 None, 视觉请求或 None)
         """
-        chunk_uuid = str(uuid.uuid4())
         content_hash = chunk.metadata.get("content_hash")
         is_table = chunk.metadata.get("is_table", False)
-        image_path = chunk.metadata.get("image_path")
+        image = chunk.metadata.get("image")
 
         text_to_encode = chunk.content
 
-        # 1. 视觉增强 (VLM)
-        # 如果是表格且有截图，或者是一个 PICTURE
-        if (is_table or image_path) and self.use_kg:
-            try:
-                from skills.vlm_service import VLMService
-                vlm = VLMService.get_instance()
-
-                # 调用 VLM，如果是表格则开启 is_table 模式
-                # 这里的 image_path 可能是 doc_parser 生成的表格截图
-                v_desc = vlm.describe_image(
-                    image_path,
-                    context_breadcrumb=chunk.metadata.get("breadcrumb", ""),
-                    is_table=is_table
-                )
-
-                # 执行视觉推理
-                image_desc = vlm.describe_image(image_path, context_breadcrumb=breadcrumb)
-
-                # 将视觉信息锚定到文本，确保“图片”本身能被搜索到
-                text_to_encode = f"【文档图表详情】\n{v_desc}\n\n[检索锚点: {chunk.content}]"
-
-                # 任务完成后立即清理临时图片文件，防止磁盘溢出
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            except Exception as ve:
-                logger.error(f"⚠️ VLM 解析失败: {ve}")
-
-        # 2. 生成嵌入向量
-        vector = self.embed_model.encode(text_to_encode)
+        # 1. 视觉增强请求：表格截图或 PICTURE 插图 (vision 阶段按窗口合并为一次 VLM 调用)
+        vision_req = None
+        if image is not None and self.use_kg:
+            vision_req = {"image": image, "breadcrumb": chunk.metadata.get("breadcrumb", ""),
+                          "is_table": is_table, "anchor": chunk.content}
+        elif image is not None:
+            # 未启用图谱/视觉增强，图片用不上，立即释放
+            image.release()
+
+        # 2. 图谱任务 (增量校验)
+        kg_item = None
+        kg_status = "pending" # 初始状态为待定
+        if self.use_kg:
+            if not self._check_kg_completed(content_hash):
+                kg_item = {
+                    "id": chunk_uuid,
+                    "text": text_to_encode,
+                    "metadata": chunk.metadata
+                }
+            else:
+                # 同内容已入图：确定性 ID 会覆盖旧 point，必须沿用 completed，否则下次增量同步会重复抽取
+                kg_status = "completed"
+                # 记录跳过日志，用于监控增量同步效率
+                logger.info(f"⏭️  [KG-Skip] 内容指纹 {content_hash[:8]} 已存在，跳过 LLM 抽取。")
 
-        # 3. 装载向量缓冲区 (注意：此处已修复变量名)
-        v_buf.append({
+        # 3. 待编码 point (embed 阶段攒批 encode，upsert 阶段写入)
+        point = {
             "id": chunk_uuid,
-            "vector": vector,
             "payload": {
                 "content": text_to_encode,
                 "kb_id": kb_id,
                 "source_id": source_id,
                 "content_hash": content_hash,
-                "kg_status": "pending", # 初始状态为待定
+                "kg_status": kg_status,
                 "domain": domain,
-                **{k: v for k, v in chunk.metadata.items() if k != 'image_path'}
+                **{k: v for k, v in chunk.metadata.items() if k != 'image'}
             }
-        })
+        }
+        return point, kg_item, vision_req
 
-        # 4. 装载图谱缓冲区 (增量校验)
-        if self.use_kg:
-            if not self._check_kg_completed(content_hash):
-                k_buf.append({
-                    "id": chunk_uuid,
-                    "text": text_to_encode,
-                    "metadata": chunk.metadata
-                })
-            else:
-                # 记录跳过日志，用于监控增量同步效率
-                logger.info(f"⏭️  [KG-Skip] 内容指纹 {content_hash[:8]} 已存在，跳过 LLM 抽取。")
+    def _describe_visual_batch(self, items: List[tuple], cancel_token: Optional[CancelToken] = None):
+        """
+        vision 阶段：一个窗口内的表格 / 插图一次提交给 VLM，描述回填到 point 与图谱任务的文本
+        :param items: [(point, kg_item, vision_req)]
+        """
+        # VLM 推理无法中途打断，只能在发起前检查
+        check_cancelled(cancel_token)
+        requests = [req for _, _, req in items]
+        try:
+            from skills.vlm_service import VLMService
+            descriptions = VLMService.get_instance().describe_images(requests)
+        except Exception as ve:
+            logger.error(f"⚠️ VLM 解析失败: {ve}")
+            descriptions = [None] * len(items)
+
+        for (point, kg_item, req), v_desc in zip(items, descriptions):
+            if v_desc is not None:
+                # 将视觉信息锚定到文本，确保“图片”本身能被搜索到
+                text = f"【文档图表详情】\n{v_desc}\n\n[检索锚点: {req['anchor']}]"
+                point["payload"]["content"] = text
+                if kg_item:
+                    kg_item["text"] = text
+                    kg_item["is_visual"] = True
+            # 任务完成后立即释放图片内存 (或溢写文件)
+            req["image"].release()
+        logger.info(f"👁️  [VLM] 批量视觉增强 {len(items)} 个图表切片")
 
     def _check_kg_completed(self, content_hash):
         if not content_hash: return False
         try:
             from qdrant_client.http import models
-            res = self.client.scroll(
+            res = self.qdrant.client.scroll(
                 collection_name=self.qdrant.collection_name,
                 scroll_filter=models.Filter(must=[
                     models.FieldCondition(key="content_hash", match=models.MatchValue(value=content_hash)),
@@ -192,74 +495,59 @@ class ETLManager:
             return len(res[0]) > 0
         except: return False
 
-    def _flush_kg_batch(self, buffer: List[Dict], domain: str = "general"):
+    def _flush_kg_batch(self, buffer: List[Dict], domain: str = "general", cancel_token: Optional[CancelToken] = None):
         """
         批量抽取并入库，成功后更新 Qdrant 状态
         集成视觉逻辑化抽取
+        取消后不再发起新的 VLM / LLM 调用，已入图的切片照常标记 completed
         """
-        stats = {"visual_extracted": 0, "entities_linked": 0, "new_entities": 0}
+        metrics = {"total_entities": 0, "linked_entities": 0, "visual_entities": 0}
         extractor = KGRegistry.get_agent("extractor")
         inspector = KGRegistry.get_agent("inspector")
         resolver = KGRegistry.get_agent("resolution")
-        if not extractor: return
-
-        # 懒加载 VLMService，只有在需要时才占用显存
-        from skills.vlm_service import VLMService
+        if not extractor: return metrics
 
         logger.info(f"📦 [KG-Batch] 开始处理 {len(buffer)} 个切片...")
 
-        # --- 步骤 A: 视觉增强（针对含有图片的切片） ---
-        processed_items = []
+        # --- 步骤 A: 视觉增强（针对仍带有图片的切片：doc_parser 产出的图片句柄，或连接器给出的图片字节） ---
+        check_cancelled(cancel_token)
+        visual = []
         for item in buffer:
-            text_content = item["text"]
-            # 检查 metadata 中是否存有临时图片路径 (由 doc_parser 生成)
-            image_path = item.get("metadata", {}).get("image_path")
-
-            if image_path and os.path.exists(image_path):
-                try:
-                    logger.info(f"👁️  [VLM] 探测到架构图/插图，启动 A4000 视觉识别...")
-                    vlm = VLMService.get_instance()
-                    # 调取我们在 2.1 跑通的描述方法
-                    image_desc = vlm.describe_image(image_path)
-
-                    # 🔥 核心：将视觉逻辑融入文本
-                    text_content += f"\n\n【图片视觉逻辑描述】: {image_desc}"
-                    logger.info(f"✅ [VLM] 识别完成，描述字数: {len(image_desc)}")
-                except Exception as ve:
-                    logger.error(f"⚠️ [VLM] 视觉解析跳过: {ve}")
-
-            item["text"] = text_content
-            processed_items.append(item)
+            meta = item.get("metadata", {})
+            image = meta.get("image")
+            if meta.get("image_bytes"):
+                visual.append((item, meta["image_bytes"]))
+            elif image is not None and not image.released:
+                visual.append((item, image))
+        if visual:
+            try:
+                logger.info(f"👁️  [VLM] 探测到 {len(visual)} 张架构图/插图，合并为一次 A4000 视觉识别...")
+                # 懒加载 VLMService，只有在需要时才占用显存 (纯文本语料不引入 vllm)
+                from skills.vlm_service import VLMService
+                descriptions = VLMService.get_instance().describe_images(
+                    [{"image": image, "breadcrumb": item.get("metadata", {}).get("breadcrumb", "")} for item, image in visual]
+                )
+                for (item, image), image_desc in zip(visual, descriptions):
+                    # 🔥 核心：将视觉逻辑融入文本，喂给后续的 ExtractorAgent
+                    item["text"] += f"\n\n【图片视觉逻辑描述】: {image_desc}"
+                    item["is_visual"] = True
+                    if isinstance(image, ImageHandle): image.release()
+                logger.info(f"✅ [VLM] 识别完成: {len(visual)} 张")
+            except Exception as ve:
+                logger.error(f"⚠️ [VLM] 视觉解析跳过: {ve}")
 
         # --- 步骤 B: 执行原有的图谱抽取流程 ---
         try:
-            processed_buffer = []
-            for item in buffer:
-                enriched_text = item["text"]
-
-                # 如果该切片带有图片字节
-                if item.get("metadata", {}).get("image_bytes"):
-                    logger.info(f"👁️  [VLM] 探测到图片，启动 A4000 视觉识别: {item['id'][:8]}...")
-                    from skills.vlm_service import VLMService
-                    vlm = VLMService.get_instance()
-
-                    # 调用 A4000 运行 Qwen2-VL
-                    image_desc = vlm.describe_image(item["metadata"]["image_bytes"])
-
-                    # 核心操作：将视觉描述拼接进文本，喂给后续的 ExtractorAgent
-                    enriched_text = f"{enriched_text}\n【视觉补充描述】: {image_desc}"
-
-                item["text"] = enriched_text
-                processed_buffer.append(item)
             # 1. 执行批量 LLM 抽取
-            batch_data = extractor.run_batch(processed_buffer, domain=domain)
+            check_cancelled(cancel_token)
+            batch_data = extractor.run_batch(buffer, domain=domain)
             results = batch_data.get("results", [])
             successful_ids = []
 
             for i, res in enumerate(results):
                 # 🔥 2.3 增强：如果当前切片是表格，强行注入一个“表格实体”
                 # 这样 Resolver 就能把文字引用的 Table_1 和这个实体对齐
-                if processed_items[i].get("metadata", {}).get("is_table"):
+                if buffer[i].get("metadata", {}).get("is_table"):
                     table_label = "表格" # 逻辑上可以从 content 提取更细的标识
                     res["entities"].append({
                         "name": table_label,
@@ -267,18 +555,16 @@ class ETLManager:
                         "desc": "文档中的结构化数据表"
                     })
 
-            successful_chunk_ids = []
+            # 1. 检索全局存量：整批实体名去重后查 ES、命中的 vid 去重后从 Nebula 取详情
+            with self._graph_lock:
+                batch_refs = self._lookup_global_refs(results[:len(buffer)])
 
             for i, res in enumerate(results):
                 if i >= len(buffer): break
-                # 1. 检索全局存量
-                global_refs = []
-                if self.nebula and hasattr(self.nebula, 'es_store') and self.nebula.es_store:
-                    for ent in res.get('entities', []):
-                        vids = self.nebula.es_store.search_entities(ent['name'], top_k=1)
-                        for v in vids:
-                            old = self.nebula.get_entity_detail(v)
-                            if old: global_refs.append(old)
+                if cancel_token is not None and cancel_token.cancelled:
+                    logger.warning(f"🛑 [KG-Batch] 已取消，剩余 {len(buffer) - i} 个切片留待下次同步")
+                    break
+                global_refs = batch_refs[i]
 
                 # 2. 质量审计与消解
                 refined_kb = inspector.run(buffer[i]["text"], res)
@@ -288,29 +574,63 @@ class ETLManager:
                 # 3. 统计
                 m = res_out.get("metrics", {})
                 metrics["total_entities"] += m.get("total_extracted", 0)
-                metrics["entities_linked"] += m.get("linked_count", 0)
+                metrics["linked_entities"] += m.get("linked_count", 0)
                 if buffer[i].get("is_visual"):
                     metrics["visual_entities"] += m.get("total_extracted", 0)
 
-                self.nebula.upsert_graph(res_out, buffer[i]["id"])
+                with self._graph_lock:
+                    self.nebula.upsert_graph(res_out, buffer[i]["id"])
                 successful_ids.append(buffer[i]["id"])
 
             if successful_ids: self._mark_kg_success_in_qdrant(successful_ids)
+            check_cancelled(cancel_token)
+        except OperationCancelled:
+            raise
         except Exception as e:
+            if is_rate_limited(e):
+                # 交给 ConcurrentKGRunner 降并发后重试
+                raise
             logger.error(f"Batch Failed: {e}")
         return metrics
 
+    def _lookup_global_refs(self, results: List[Dict]) -> List[List[Dict]]:
+        """
+        为一批抽取结果查询图谱中已有的同名实体 (供 Resolver 对齐)
+        整批的实体名与 vid 各自去重后逐条查询，同名实体只查一次；调用方需持有 _graph_lock
+        :return: 与 results 等长，每项是该切片的 global_refs
+        """
+        es_store = getattr(self.nebula, "es_store", None) if self.nebula else None
+        if not es_store:
+            return [[] for _ in results]
+
+        names = list(dict.fromkeys(ent["name"] for res in results for ent in res.get("entities", []) if ent.get("name")))
+        if not names:
+            return [[] for _ in results]
+
+        # 1. 实体名 -> vids (ES)
+        name_vids = {n: es_store.search_entities(n, top_k=1) for n in names}
+
+        # 2. vid -> 实体详情 (Nebula)
+        vids = list(dict.fromkeys(v for n in names for v in name_vids.get(n, [])))
+        details = {v: self.nebula.get_entity_detail(v) for v in vids}
+
+        refs = []
+        for res in results:
+            per_chunk = []
+            for ent in res.get("entities", []):
+                for v in name_vids.get(ent.get("name"), []):
+                    if details.get(v): per_chunk.append(details[v])
+            refs.append(per_chunk)
+        return refs
+
     def _mark_kg_success_in_qdrant(self, chunk_ids: List[str]):
         """
         强制更新 Qdrant 状态位为 completed
         """
         try:
-            # 批量更新提高效率
-            for cid in chunk_ids:
-                self.qdrant.client.set_payload(self.qdrant.collection_name,
-                                               {"kg_status": "completed"},
-                                               [cid],
-                                               wait=False)
+            # 单次请求批量更新 (PointIdsList 选择器)，不再逐条 set_payload
+            # wait=True：下次同步的 _check_kg_completed 必须读到 completed，否则会重复抽取
+            self.qdrant.set_payload_bulk(chunk_ids, {"kg_status": "completed"}, wait=True)
             logger.info(f"✅ 已更新 {len(chunk_ids)} 个切片的图谱状态为 completed")
         except Exception as e:
             logger.error(f"❌ 更新状态位失败: {e}")
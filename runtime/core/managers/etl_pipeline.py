@@ -0,0 +1,214 @@
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.cancellation import CancelToken, OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # 流结束哨兵
+
+class PipelineStopped(Exception):
+    """流水线已被停止 (下游失败 / 调用方取消)，阶段线程静默退出"""
+    pass
+
+class PipelineStage:
+    """
+    流水线中的一个阶段：从 inbox 取数据，处理后通过 emit 写入 outbox (有界队列，满时阻塞 = 背压)
+    - fn(item, emit): 处理单个元素，可 emit 0~N 个下游元素
+    - flush(emit): 上游结束且本阶段所有 worker 退出后调用一次 (用于排空攒批缓冲区)
+    - source: 可迭代对象，设置后本阶段是数据源，不读 inbox
+    """
+    def __init__(self, name: str, fn: Callable = None, workers: int = 1,
+                 flush: Callable = None, source: Iterable = None):
+        self.name = name
+        self.fn = fn
+        self.flush = flush
+        self.source = source
+        self.workers = max(1, workers) if source is None else 1
+        self.inbox: Optional[queue.Queue] = None
+        self.outbox: Optional[queue.Queue] = None
+
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.max_queue = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, float]:
+        wall = (self.finished_at or time.perf_counter()) - self.started_at if self.started_at else 0.0
+        return {
+            "items": self.items,
+            "workers": self.workers,
+            "busy_s": round(self.busy_seconds, 3),
+            "wall_s": round(wall, 3),
+            # 利用率：处理耗时 / (worker 数 × 阶段存活时间)，低说明在等上游或被下游背压
+            "utilization": round(self.busy_seconds / (wall * self.workers), 3) if wall else 0.0,
+            "items_per_sec": round(self.items / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+            "max_queue": self.max_queue
+        }
+
+class StagePipeline:
+    """
+    有界队列串联的多阶段流水线，每个阶段独立线程 (可多 worker)
+    任一阶段抛错或取消令牌触发时整条流水线停止，错误由 wait() / raise_if_failed() 抛回调用方线程
+    """
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 64,
+                 cancel_token: Optional[CancelToken] = None, name: str = "pipeline"):
+        self.stages = stages
+        self.cancel_token = cancel_token
+        self.name = name
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._threads: List[threading.Thread] = []
+        for up, down in zip(stages, stages[1:]):
+            q = queue.Queue(maxsize=queue_size)
+            up.outbox, down.inbox = q, q
+
+    # ---------------- 生命周期 ----------------
+    def start(self):
+        for stage in self.stages:
+            stage.started_at = time.perf_counter()
+            workers = [threading.Thread(target=self._run_worker, args=(stage,), daemon=True,
+                                        name=f"{self.name}-{stage.name}-{i}") for i in range(stage.workers)]
+            for t in workers:
+                t.start()
+            closer = threading.Thread(target=self._close_stage, args=(stage, workers), daemon=True,
+                                      name=f"{self.name}-{stage.name}-close")
+            closer.start()
+            self._threads += workers + [closer]
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        等待流水线结束；返回 True 表示全部阶段已完成，超时返回 False
+        阶段出错 / 已取消时抛出对应异常
+        """
+        finished = self.stages[-1].done.wait(timeout)
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            self._fail(OperationCancelled(self.cancel_token.reason or "cancelled"))
+        self.raise_if_failed()
+        return finished
+
+    def stop(self):
+        """停止所有阶段并等待线程退出 (调用方提前关闭生成器时使用)"""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+
+    def raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {s.name: s.stats() for s in self.stages}
+
+    # ---------------- 内部 ----------------
+    def _fail(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _emit_to(self, stage: PipelineStage):
+        def emit(item):
+            if stage.outbox is None:
+                return
+            self._put(stage.outbox, item)
+        return emit
+
+    def _put(self, q: queue.Queue, item):
+        # 有界队列：下游处理不过来时阻塞，同时响应停止信号
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, stage: PipelineStage):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                item = stage.inbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            depth = stage.inbox.qsize() + 1
+            if depth > stage.max_queue:
+                stage.max_queue = depth
+            return item
+
+    def _timed(self, stage: PipelineStage, fn, *args, count: bool = True):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with stage._lock:
+                stage.busy_seconds += time.perf_counter() - start
+                if count:
+                    stage.items += 1
+
+    def _run_worker(self, stage: PipelineStage):
+        emit = self._emit_to(stage)
+        iterator = None
+        try:
+            if stage.source is not None:
+                iterator = iter(stage.source)
+                while True:
+                    start = time.perf_counter()
+                    item = next(iterator, _END)
+                    with stage._lock:
+                        stage.busy_seconds += time.perf_counter() - start
+                    if item is _END:
+                        return
+                    stage.items += 1
+                    emit(item)
+                    if self._stop.is_set():
+                        raise PipelineStopped()
+            while True:
+                item = self._get(stage)
+                if item is _END:
+                    # 留给同阶段的其他 worker
+                    stage.inbox.put(_END)
+                    return
+                self._timed(stage, stage.fn, item, emit)
+        except PipelineStopped:
+            pass
+        except OperationCancelled as e:
+            logger.warning(f"🛑 [Pipeline:{stage.name}] 已取消: {e}")
+            self._fail(e)
+        except BaseException as e:
+            logger.error(f"❌ [Pipeline:{stage.name}] 阶段失败: {e}")
+            self._fail(e)
+        finally:
+            # 数据源生成器在本线程内关闭，触发其 finally 清理 (如删除临时文件)
+            if iterator is not None and hasattr(iterator, "close"):
+                iterator.close()
+
+    def _close_stage(self, stage: PipelineStage, workers: List[threading.Thread]):
+        for t in workers:
+            t.join()
+        try:
+            if self._stop.is_set():
+                return
+            if stage.flush is not None:
+                self._timed(stage, stage.flush, self._emit_to(stage), count=False)
+            if stage.outbox is not None:
+                self._put(stage.outbox, _END)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            logger.error(f"❌ [Pipeline:{stage.name}] flush 失败: {e}")
+            self._fail(e)
+        finally:
+            stage.finished_at = time.perf_counter()
+            stage.done.set()
+            if self._stop.is_set():
+                # 停止时最后一个阶段也要标记完成，避免 wait() 永久阻塞
+                self.stages[-1].done.set()
@@ -2,10 +2,13 @@ import json
 import time
 import logging
 import traceback
-from typing import Generator, Dict, Any, List
+from typing import Generator, Dict, Any, List, Optional
 
 from opentelemetry import trace
 from workflows.chat_flow import ChatWorkflow
+from core.llm.embedding import EmbeddingModel
+from core.stores.answer_cache import SemanticAnswerCache
+from core.cancellation import CancelToken, OperationCancelled, check_cancelled
 
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -20,15 +23,20 @@ class InferenceManager:
         self.qdrant = qdrant_store
         self.nebula = nebula_store
 
-    def run_chat(self, query: str, history: List[Any], app_config_json: str) -> Generator[Dict[str, Any], None, None]:
+    def run_chat(self, query: str, history: List[Any], app_config_json: str,
+                 cancel_token: Optional[CancelToken] = None) -> Generator[Dict[str, Any], None, None]:
         """
         执行对话工作流
         :param query: 用户问题
         :param history: 历史记录 (gRPC Message list)
         :param app_config_json: 应用配置 (含 kb_ids, org_id)
+        :param cancel_token: 取消令牌 (客户端断开/超时后停止检索与生成)
         :yield: 标准化的事件字典 (type, payload, meta)
+        首轮对话先查语义答案缓存：命中时直接回放上次的 delta / reference / subgraph 事件，
+        summary.final_status = "cache_hit"
         """
         start_time = time.time()
+        final_status = "success"
 
         # 1. 准备统计数据
         usage_stats = {
@@ -46,19 +54,53 @@ class InferenceManager:
             app_config = json.loads(app_config_json)
             kb_ids = app_config.get("kb_ids", [])
 
-            # 3. 初始化工作流 (每次请求可能针对不同的 KB，所以在这里初始化)
+            # 2.1 语义答案缓存 (带历史的追问依赖上下文，不走缓存)
+            cache = SemanticAnswerCache.get_instance() if not history else None
+            if cache is not None:
+                try:
+                    # 问题向量会写入向量缓存，随后的向量检索直接命中，不重复编码
+                    query_vector = EmbeddingModel.encode(query)
+                    kb_epochs = cache.epochs(kb_ids)
+                    hit = cache.lookup(kb_ids, query_vector)
+                except Exception as e:
+                    logger.warning(f"⚠️ [Inference] 语义缓存查询失败，按未命中处理: {e}")
+                    cache, hit = None, None
+                if hit is not None:
+                    events, score = hit
+                    final_status = "cache_hit"
+                    logger.info(f"🎯 [Inference] 命中语义缓存 (相似度 {score:.3f})，跳过检索与生成")
+                    yield {
+                        "type": "thought",
+                        "payload": f"命中语义缓存 (相似度 {score:.3f})",
+                        "meta": {
+                            "node_name": "SemanticCache",
+                            "trace_id": trace_id,
+                            "duration_ms": int((time.time() - start_time) * 1000)
+                        }
+                    }
+                    for event in events:
+                        check_cancelled(cancel_token)
+                        yield event
+                    # finally 中照常推送 summary
+                    return
+            # 回答事件序列 (delta / reference / subgraph)，生成成功后写入缓存
+            recorded = []
+            workflow_failed = False
+
+            # 3. 获取工作流 (进程级单例，已编译；KB 范围随 state 传入)
             # 注意：ChatWorkflow 内部已经做了对 nebula 为 None 的容错处理 (见 Phase 1 步骤 4)
-            workflow = ChatWorkflow(self.nebula, self.qdrant, kb_ids)
+            workflow = ChatWorkflow.get_instance(self.nebula, self.qdrant)
 
             # 4. 构造初始状态
             initial_state = {
                 "query": query,
+                "kb_ids": kb_ids,
                 "history": history,
                 "app_config": app_config
             }
 
             # 5. 执行工作流并处理流式事件
-            for event in workflow.run_stream(initial_state):
+            for event in workflow.run_stream(initial_state, cancel_token=cancel_token):
 
                 # A. 思考/推理过程
                 if event["type"] == "thought":
@@ -74,17 +116,21 @@ class InferenceManager:
 
                 # B. 答案片段
                 elif event["type"] == "delta":
-                    yield {
+                    out = {
                         "type": "delta",
                         "payload": event["content"]
                     }
+                    recorded.append(out)
+                    yield out
 
                 # C. 引用文档
                 elif event["type"] == "reference":
-                    yield {
+                    out = {
                         "type": "reference",
                         "payload": json.dumps(event["docs"]) # 序列化后返回
                     }
+                    recorded.append(out)
+                    yield out
 
                 # D. Token 统计
                 elif event["type"] == "usage":
@@ -94,12 +140,31 @@ class InferenceManager:
                     usage_stats["total_tokens"] += u.get("total_tokens", 0)
 
                 elif event["type"] == "subgraph":
-                    yield {
+                    out = {
                         "type": "subgraph",
                         "payload": event["payload"]
                     }
+                    recorded.append(out)
+                    yield out
+
+                # 生成阶段出错 (答案不完整)，不写入缓存
+                elif event["type"] == "error":
+                    workflow_failed = True
+
+            # 6. 完整答案写入语义缓存 (生成期间知识库被重新同步时放弃)
+            if cache is not None and not workflow_failed and any(e["type"] == "delta" for e in recorded):
+                try:
+                    cache.put(kb_ids, query, query_vector, recorded, kb_epochs)
+                except Exception as e:
+                    logger.warning(f"⚠️ [Inference] 语义缓存写入失败: {e}")
+
+        except OperationCancelled as e:
+            # 调用方已离开，不再推送错误事件，仅记录
+            final_status = "cancelled"
+            logger.info(f"🛑 [Inference] 请求已取消: {e}")
 
         except Exception as e:
+            final_status = "error"
             logger.error(f"❌ [Inference] Error: {str(e)}")
             logger.error(traceback.format_exc())
             yield {
@@ -108,9 +173,9 @@ class InferenceManager:
             }
 
         finally:
-            # 6. 生成最终摘要 (Summary)
+            # 7. 生成最终摘要 (Summary)
             duration = int((time.time() - start_time) * 1000)
-            logger.info(f"📊 [Inference Done] Tokens={usage_stats['total_tokens']} Time={duration}ms")
+            logger.info(f"📊 [Inference Done] Tokens={usage_stats['total_tokens']} Time={duration}ms Status={final_status}")
 
             yield {
                 "type": "summary",
@@ -119,6 +184,6 @@ class InferenceManager:
                     "prompt_tokens": usage_stats["prompt_tokens"],
                     "completion_tokens": usage_stats["completion_tokens"],
                     "total_duration_ms": duration,
-                    "final_status": "success"
+                    "final_status": final_status
                 }
             }
\ No newline at end of file
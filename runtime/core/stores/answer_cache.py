@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class SemanticAnswerCache:
+    """
+    RunAgent 语义答案缓存：(kb_ids 集合指纹, 问题向量) -> 上次回答的 delta / reference / subgraph 事件序列
+    - 同一 kb_ids 集合内按余弦相似度找最近的历史问题，达到阈值即整段回放，跳过问题分析、双路检索与 LLM 生成
+    - 条目带 TTL；任一知识库重新同步 (ETLManager.sync_datasource) 后，包含该知识库的条目全部失效
+    - SQLite (WAL) 存储，Runtime 与 ETL Worker 多进程共享同一文件，失效对所有进程立即可见
+    - 每个知识库维护一个同步代数 (epoch)：生成期间知识库被重新同步时，本次答案不写入缓存
+    """
+    _instance = None
+    _init_lock = threading.Lock()
+
+    def __init__(self, path: str, threshold: float, ttl_seconds: int, max_entries: int):
+        """
+        :param path: SQLite 文件路径
+        :param threshold: 命中所需的最低余弦相似度
+        :param ttl_seconds: 条目有效期
+        :param max_entries: 单个 kb_ids 集合下最多保留的条目数 (超出按写入时间淘汰最旧的)
+        """
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self.stats_counter = {"hits": 0, "misses": 0, "stores": 0, "stale_skips": 0, "invalidated": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 自动提交模式：写操作显式 BEGIN IMMEDIATE，epoch 校验与写入在同一事务内
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers (id INTEGER PRIMARY KEY AUTOINCREMENT, kb_key TEXT NOT NULL, "
+            "query TEXT NOT NULL, vector BLOB NOT NULL, events TEXT NOT NULL, created REAL NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_kb_key ON answers (kb_key, created)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS kb_epoch (kb_id TEXT PRIMARY KEY, epoch INTEGER NOT NULL)")
+        logger.info(f"🗄️ [AnswerCache] 语义答案缓存就绪: {path} (阈值 {threshold}, TTL {ttl_seconds}s)")
+
+    @classmethod
+    def get_instance(cls) -> Optional["SemanticAnswerCache"]:
+        """懒加载进程级单例；关闭或初始化失败时返回 None (调用方按未命中处理)"""
+        if cls._instance is None and Config.SEMANTIC_CACHE_ENABLED:
+            with cls._init_lock:
+                if cls._instance is None:
+                    try:
+                        cls._instance = cls(
+                            os.path.join(Config.CACHE_DIR, "answers.db"),
+                            threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+                            ttl_seconds=Config.SEMANTIC_CACHE_TTL_SECONDS,
+                            max_entries=Config.SEMANTIC_CACHE_MAX_ENTRIES
+                        )
+                    except Exception as e:
+                        logger.warning(f"⚠️ 语义答案缓存初始化失败，已关闭: {e}")
+                        Config.SEMANTIC_CACHE_ENABLED = False
+        return cls._instance
+
+    @classmethod
+    def invalidate_kb(cls, kb_id: Any):
+        """知识库重新同步后调用 (ETL 侧入口)：缓存关闭或失效失败都不影响同步结果"""
+        cache = cls.get_instance()
+        if cache is None:
+            return
+        try:
+            cache.invalidate(kb_id)
+        except Exception as e:
+            logger.warning(f"⚠️ [AnswerCache] KB={kb_id} 缓存失效失败: {e}")
+
+    # --- 键 ---
+
+    @staticmethod
+    def fingerprint(kb_ids: Iterable[Any]) -> str:
+        """kb_ids 集合指纹 (与顺序、重复无关)，形如 ",1,3,"，便于按单个 kb_id 模糊匹配失效"""
+        ids = sorted({str(k) for k in kb_ids})
+        return f",{','.join(ids)},"
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+
+    def epochs(self, kb_ids: Iterable[Any]) -> Dict[str, int]:
+        """各知识库当前同步代数，查询前取一次，写入时用于判断生成期间是否发生过重新同步"""
+        ids = sorted({str(k) for k in kb_ids})
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            rows = dict(self._conn.execute(f"SELECT kb_id, epoch FROM kb_epoch WHERE kb_id IN ({marks})", ids).fetchall())
+        return {k: rows.get(k, 0) for k in ids}
+
+    # --- 读 ---
+
+    def lookup(self, kb_ids: Iterable[Any], query_vector) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """
+        :return: (事件序列, 相似度)；未命中返回 None
+        """
+        kb_key = self.fingerprint(kb_ids)
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, vector FROM answers WHERE kb_key = ? AND created >= ?", (kb_key, cutoff)
+            ).fetchall()
+            if not rows:
+                self.stats_counter["misses"] += 1
+                return None
+
+            matrix = np.frombuffer(b"".join(v for _, v in rows), dtype=np.float32).reshape(len(rows), -1)
+            query = self._normalize(query_vector)
+            if matrix.shape[1] != query.shape[0]:
+                # 向量模型更换后维度不同，旧条目不可比，等 TTL 过期
+                self.stats_counter["misses"] += 1
+                return None
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                self.stats_counter["misses"] += 1
+                return None
+
+            entry_id = rows[best][0]
+            events = self._conn.execute("SELECT events FROM answers WHERE id = ?", (entry_id,)).fetchone()
+            if events is None:
+                # 读取间隙被其他进程失效
+                self.stats_counter["misses"] += 1
+                return None
+            self._conn.execute("UPDATE answers SET hits = hits + 1 WHERE id = ?", (entry_id,))
+            self.stats_counter["hits"] += 1
+        return json.loads(events[0]), score
+
+    # --- 写 ---
+
+    def put(self, kb_ids: Iterable[Any], query: str, query_vector, events: List[Dict[str, Any]],
+            epochs: Dict[str, int]) -> bool:
+        """
+        :param epochs: 查询前 epochs() 的返回值；与当前不一致 (生成期间知识库被重新同步) 时放弃写入
+        :return: 是否写入
+        """
+        kb_ids = list(kb_ids)
+        kb_key = self.fingerprint(kb_ids)
+        vector = self._normalize(query_vector).tobytes()
+        payload = json.dumps(events, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = sorted(epochs)
+                marks = ",".join("?" * len(ids))
+                current = dict(self._conn.execute(
+                    f"SELECT kb_id, epoch FROM kb_epoch WHERE kb_id IN ({marks})", ids
+                ).fetchall()) if ids else {}
+                if any(current.get(k, 0) != v for k, v in epochs.items()):
+                    self._conn.execute("ROLLBACK")
+                    self.stats_counter["stale_skips"] += 1
+                    logger.info(f"⏭️ [AnswerCache] KB{kb_key} 生成期间已重新同步，答案不入缓存")
+                    return False
+
+                now = time.time()
+                self._conn.execute(
+                    "DELETE FROM answers WHERE kb_key = ? AND created < ?", (kb_key, now - self.ttl_seconds)
+                )
+                self._conn.execute(
+                    "INSERT INTO answers (kb_key, query, vector, events, created) VALUES (?, ?, ?, ?, ?)",
+                    (kb_key, query, sqlite3.Binary(vector), payload, now)
+                )
+                self._conn.execute(
+                    "DELETE FROM answers WHERE kb_key = ? AND id NOT IN "
+                    "(SELECT id FROM answers WHERE kb_key = ? ORDER BY created DESC LIMIT ?)",
+                    (kb_key, kb_key, self.max_entries)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.stats_counter["stores"] += 1
+        return True
+
+    def invalidate(self, kb_id: Any) -> int:
+        """推进该知识库的同步代数，并删除所有包含它的条目；:return: 删除条数"""
+        kb_id = str(kb_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO kb_epoch (kb_id, epoch) VALUES (?, 1) "
+                    "ON CONFLICT(kb_id) DO UPDATE SET epoch = epoch + 1", (kb_id,)
+                )
+                removed = self._conn.execute(
+                    "DELETE FROM answers WHERE kb_key LIKE ?", (f"%,{kb_id},%",)
+                ).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.stats_counter["invalidated"] += removed
+        logger.info(f"🧹 [AnswerCache] KB={kb_id} 已重新同步，失效 {removed} 条缓存答案")
+        return removed
+
+    # --- 统计 ---
+
+    def stats(self) -> Dict[str, float]:
+        s = dict(self.stats_counter)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = round(s["hits"] / lookups, 4) if lookups else 0.0
+        return s
@@ -0,0 +1,113 @@
+import logging
+from typing import List, Dict, Any, Optional
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+from config import Config
+from core.llm.sparse_encoder import BM25Encoder
+from core.stores.qdrant_store import QdrantStore
+
+logger = logging.getLogger(__name__)
+
+class AsyncQdrantStore:
+    """
+    QdrantStore 的 asyncio 版本：供协程化的检索链路并发发起多路查询
+    返回结构与 QdrantStore 保持一致 (id / content / score / metadata)
+    """
+    def __init__(self, client: Optional[AsyncQdrantClient] = None):
+        """
+        :param client: 外部注入的 AsyncQdrantClient (如本地模式 AsyncQdrantClient(":memory:"))
+        """
+        self.collection_name = "chimera_docs"
+        self.vector_size = 384
+        self.sparse_enabled = False
+        self.client = client or AsyncQdrantClient(
+            host=getattr(Config, "QDRANT_HOST", "127.0.0.1"),
+            port=getattr(Config, "QDRANT_PORT", 26333),
+            grpc_port=getattr(Config, "QDRANT_GRPC_PORT", 26334),
+            prefer_grpc=getattr(Config, "QDRANT_PREFER_GRPC", False)
+        )
+
+    async def _resolve_alias(self) -> str:
+        # 与 QdrantStore.resolve_alias 相同：迁移后 collection_name 是别名
+        for alias in (await self.client.get_aliases()).aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        return self.collection_name
+
+    async def ensure_collection(self):
+        physical = await self._resolve_alias()
+        if not await self.client.collection_exists(physical):
+            logger.info(f"🚧 尝试创建集合: {self.collection_name}")
+            await self.client.create_collection(collection_name=self.collection_name,
+                                                **QdrantStore.collection_params(self.vector_size))
+        info = await self.client.get_collection(physical)
+        self.sparse_enabled = Config.HYBRID_SEARCH_ENABLED and QdrantStore.has_sparse_vectors(info)
+        if Config.QDRANT_PAYLOAD_INDEXES:
+            existing = info.payload_schema or {}
+            for field, schema in QdrantStore.PAYLOAD_INDEXES.items():
+                if field not in existing:
+                    await self.client.create_payload_index(collection_name=physical, field_name=field,
+                                                           field_schema=schema, wait=False)
+
+    async def search(self, query_vector: Any, kb_ids: List[int] = None, top_k: int = 5, hnsw_ef: Optional[int] = None,
+                     oversampling: Optional[float] = None, rescore: Optional[bool] = None):
+        vector_list = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+        search_filter = QdrantStore.build_kb_filter(kb_ids)
+        res = await self.client.query_points(
+            collection_name=self.collection_name,
+            query=vector_list,
+            query_filter=models.Filter(**search_filter) if search_filter else None,
+            search_params=QdrantStore.search_params(hnsw_ef, oversampling, rescore),
+            limit=top_k,
+            with_payload=True
+        )
+        return QdrantStore._parse_sdk_results(res.points)
+
+    async def hybrid_search(self, query_text: str, query_vector: Any, kb_ids: List[int] = None, top_k: int = 5,
+                            hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None,
+                            rescore: Optional[bool] = None):
+        """与 QdrantStore.hybrid_search 相同：dense + BM25 预取，服务端 RRF 融合"""
+        indices, values = BM25Encoder.encode_query(query_text)
+        if not self.sparse_enabled or not indices:
+            return await self.search(query_vector, kb_ids, top_k, hnsw_ef, oversampling, rescore)
+        search_filter = QdrantStore.build_kb_filter(kb_ids)
+        query_filter = models.Filter(**search_filter) if search_filter else None
+        prefetch_limit = max(top_k, Config.HYBRID_PREFETCH_LIMIT)
+        res = await self.client.query_points(
+            collection_name=self.collection_name,
+            prefetch=[
+                models.Prefetch(query=QdrantStore._to_list(query_vector), filter=query_filter, limit=prefetch_limit,
+                                params=QdrantStore.search_params(hnsw_ef, oversampling, rescore)),
+                models.Prefetch(query=models.SparseVector(indices=indices, values=values),
+                                using=QdrantStore.SPARSE_VECTOR_NAME, filter=query_filter, limit=prefetch_limit),
+            ],
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            limit=top_k,
+            with_payload=True
+        )
+        return QdrantStore._parse_sdk_results(res.points)
+
+    async def upsert_chunks(self, chunks: List[Dict[str, Any]]):
+        if not chunks: return
+        points = [QdrantStore.build_point(c, self.sparse_enabled) for c in chunks]
+        await self.client.upsert(collection_name=self.collection_name, points=points)
+        logger.info(f"💾 写入 Qdrant: {len(points)} 条数据")
+
+    async def set_payload_bulk(self, point_ids: List[str], payload: Dict[str, Any], wait: bool = True):
+        if not point_ids: return
+        await self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            points=models.PointIdsList(points=list(point_ids)),
+            wait=wait
+        )
+
+    async def delete_points(self, point_ids: List[str]):
+        if not point_ids: return
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=list(point_ids))
+        )
+
+    async def close(self):
+        await self.client.close()
@@ -0,0 +1,133 @@
+import os
+import uuid
+import logging
+import threading
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ImageHandle:
+    """
+    解析阶段产出的图片 (表格截图 / 插图)，随切片 metadata["image"] 在流水线中传递
+    - 默认以原始像素 (mode, size, bytes) 驻留内存：无 JPEG 有损重编码，也不落盘
+    - 进程内驻留总量超过 IMAGE_MEMORY_BUDGET_MB 时，新图片溢写到 IMAGE_SPILL_DIR
+    - 生命周期显式管理：消费方 (VLM) 用完或同步结束时调用 release()，重复调用无副作用
+    可跨进程传递 (Docling 解析进程池 -> Worker)，反序列化时计入接收方进程的预算
+    """
+    _used_bytes = 0
+    _budget_lock = threading.Lock()
+
+    def __init__(self, mode: str, size: Tuple[int, int], data: bytes):
+        self.mode = mode
+        self.size = size
+        self.nbytes = len(data)
+        self._data: Optional[bytes] = None
+        self._spill_path: Optional[str] = None
+        self.released = False
+        self._store(data)
+
+    @classmethod
+    def from_pil(cls, image: Image.Image) -> "ImageHandle":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return cls(image.mode, image.size, image.tobytes())
+
+    # ---------------- 读 ----------------
+    @property
+    def in_memory(self) -> bool:
+        return self._data is not None
+
+    def open(self) -> Image.Image:
+        if self.released:
+            raise ValueError("图片句柄已释放")
+        data = self._data
+        if data is None:
+            with open(self._spill_path, "rb") as f:
+                data = f.read()
+        return Image.frombytes(self.mode, self.size, data)
+
+    # ---------------- 生命周期 ----------------
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        if self._data is not None:
+            self._data = None
+            ImageHandle._account(-self.nbytes)
+        if self._spill_path:
+            try:
+                os.remove(self._spill_path)
+            except FileNotFoundError:
+                pass
+            self._spill_path = None
+
+    def detach(self):
+        """
+        所有权已转移 (序列化交给其它进程)：只归还本进程的预算，不删除溢写文件
+        """
+        if self.released:
+            return
+        self.released = True
+        if self._data is not None:
+            self._data = None
+            ImageHandle._account(-self.nbytes)
+        self._spill_path = None
+
+    @classmethod
+    def memory_in_use(cls) -> int:
+        return cls._used_bytes
+
+    @classmethod
+    def reset_budget(cls):
+        """解析子进程每次任务开始时调用，清掉上一个任务异常退出时未归还的预算"""
+        with cls._budget_lock:
+            cls._used_bytes = 0
+
+    # ---------------- 内部 ----------------
+    @classmethod
+    def _account(cls, delta: int):
+        with cls._budget_lock:
+            cls._used_bytes += delta
+
+    @classmethod
+    def _reserve(cls, nbytes: int) -> bool:
+        with cls._budget_lock:
+            if cls._used_bytes + nbytes > Config.IMAGE_MEMORY_BUDGET_MB * 1024 * 1024:
+                return False
+            cls._used_bytes += nbytes
+            return True
+
+    def _store(self, data: bytes):
+        if ImageHandle._reserve(self.nbytes):
+            self._data = data
+            return
+        # 超出内存预算：原始像素溢写到磁盘 (仍是无损数据)，读取时再载入
+        os.makedirs(Config.IMAGE_SPILL_DIR, exist_ok=True)
+        path = os.path.join(Config.IMAGE_SPILL_DIR, f"chimera_spill_{uuid.uuid4().hex}.raw")
+        with open(path, "wb") as f:
+            f.write(data)
+        self._spill_path = path
+        logger.info(f"💾 [ImageBuffer] 内存预算已满，图片 {self.size[0]}x{self.size[1]} 溢写到 {path}")
+
+    def __getstate__(self):
+        # 跨进程传递时携带像素 (或溢写文件路径)，预算归属转移给接收方
+        return {"mode": self.mode, "size": self.size, "nbytes": self.nbytes, "released": self.released,
+                "data": self._data, "spill_path": self._spill_path}
+
+    def __setstate__(self, state):
+        self.mode = state["mode"]
+        self.size = state["size"]
+        self.nbytes = state["nbytes"]
+        self.released = state["released"]
+        self._data = None
+        self._spill_path = state["spill_path"]
+        if state["data"] is not None and not self.released:
+            self._store(state["data"])
+
+    def __repr__(self):
+        where = "memory" if self.in_memory else ("released" if self.released else "disk")
+        return f"ImageHandle({self.mode} {self.size[0]}x{self.size[1]}, {where})"
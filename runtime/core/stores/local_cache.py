@@ -0,0 +1,151 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LocalKVCache:
+    """
+    本地两级 KV 缓存：进程内 LRU 热层 + SQLite 磁盘冷层 (按总字节数做 LRU 淘汰)
+    磁盘层开启 WAL，允许 Runtime 与 Worker 多进程共享同一个缓存文件；
+    _total_bytes 只累计本进程的写入，淘汰前用 SUM(size) 校准 (见 put_many)
+    """
+    def __init__(self, path: str, max_bytes: int, hot_size: int = 0, name: str = "cache"):
+        """
+        :param path: SQLite 文件路径
+        :param max_bytes: 磁盘层容量上限 (value 字节数之和)
+        :param hot_size: 进程内热层条数上限，0 表示关闭热层
+        :param name: 日志/统计中显示的缓存名
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hot_size = hot_size
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._hot: "OrderedDict[str, bytes]" = OrderedDict()
+        self.stats_counter = {"hot_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v BLOB NOT NULL, size INTEGER NOT NULL, atime REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS kv_atime ON kv (atime)")
+        self._conn.commit()
+        self._written_since_sync = 0
+        self._sync_total_bytes()
+        logger.info(f"🗄️ [{self.name}] 本地缓存就绪: {path} ({self._total_bytes / 1024 / 1024:.1f}MB)")
+
+    # --- 读 ---
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        cold: List[str] = []
+        with self._lock:
+            for k in keys:
+                if k in self._hot:
+                    self._hot.move_to_end(k)
+                    found[k] = self._hot[k]
+                    self.stats_counter["hot_hits"] += 1
+                else:
+                    cold.append(k)
+
+            if cold:
+                now = time.time()
+                # SQLite 默认变量上限 999，分段查询
+                for i in range(0, len(cold), 500):
+                    part = cold[i:i + 500]
+                    marks = ",".join("?" * len(part))
+                    rows = self._conn.execute(f"SELECT k, v FROM kv WHERE k IN ({marks})", part).fetchall()
+                    if rows:
+                        self._conn.executemany("UPDATE kv SET atime = ? WHERE k = ?", [(now, k) for k, _ in rows])
+                    for k, v in rows:
+                        found[k] = v
+                        self._remember(k, v)
+                self._conn.commit()
+                disk_hits = sum(1 for k in cold if k in found)
+                self.stats_counter["disk_hits"] += disk_hits
+                self.stats_counter["misses"] += len(cold) - disk_hits
+        return found
+
+    # --- 写 ---
+
+    def put(self, key: str, value: bytes):
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]):
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for k, v in items:
+                old = self._conn.execute("SELECT size FROM kv WHERE k = ?", (k,)).fetchone()
+                if old:
+                    self._total_bytes -= old[0]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO kv (k, v, size, atime) VALUES (?, ?, ?, ?)",
+                    (k, sqlite3.Binary(v), len(v), now)
+                )
+                self._total_bytes += len(v)
+                self._written_since_sync += len(v)
+                self._remember(k, v)
+            self._conn.commit()
+            # 其他进程的写入不会计入本进程的估算：估算超限、或本进程写入累计达到上限的 10% 时，按磁盘实际占用校准
+            if self._total_bytes > self.max_bytes or self._written_since_sync >= self.max_bytes * 0.1:
+                self._sync_total_bytes()
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+
+    def _sync_total_bytes(self):
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM kv").fetchone()[0]
+        self._written_since_sync = 0
+
+    def _remember(self, key: str, value: bytes):
+        if self.hot_size <= 0:
+            return
+        self._hot[key] = value
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def _evict(self):
+        """按最近访问时间淘汰，一次降到上限的 90%，避免每次写入都触发淘汰"""
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self._conn.execute("SELECT k, size FROM kv ORDER BY atime ASC LIMIT 256").fetchall()
+            if not rows:
+                break
+            for k, size in rows:
+                if self._total_bytes <= target:
+                    break
+                self._hot.pop(k, None)
+                # 可能已被其他进程淘汰，只扣减实际删除的
+                if self._conn.execute("DELETE FROM kv WHERE k = ?", (k,)).rowcount:
+                    self._total_bytes -= size
+                    evicted += 1
+        self._conn.commit()
+        self.stats_counter["evictions"] += evicted
+        logger.info(f"🧹 [{self.name}] LRU 淘汰 {evicted} 条，当前占用 {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    # --- 统计 ---
+
+    def stats(self) -> Dict[str, float]:
+        s = dict(self.stats_counter)
+        lookups = s["hot_hits"] + s["disk_hits"] + s["misses"]
+        s["hits"] = s["hot_hits"] + s["disk_hits"]
+        s["hit_rate"] = round(s["hits"] / lookups, 4) if lookups else 0.0
+        s["disk_bytes"] = self._total_bytes
+        s["hot_entries"] = len(self._hot)
+        return s
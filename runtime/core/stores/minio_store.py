@@ -1,9 +1,91 @@
 import io
+import os
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 from minio import Minio
 from opentelemetry import trace
 from config import Config
+from core.telemetry.metrics import StageGauges
 
 tracer = trace.get_tracer(__name__)
+logger = logging.getLogger(__name__)
+
+MiB = 1024 * 1024
+
+class _ETagVerifier:
+    """
+    边下载边校验 ETag：
+    - 单段上传：ETag = 内容 MD5
+    - 分段上传：ETag = MD5(各段 MD5 拼接) + "-<段数>"；段大小由段数与对象大小反推 (见 multipart_part_sizes)，
+      对每个候选段大小各算一份，任一吻合即通过
+    无法校验 (无 ETag / 段大小无法确定) 时记录警告，不阻断下载
+    """
+    def __init__(self, etag: Optional[str], size: int, storage_path: str):
+        self.etag = (etag or "").strip('"')
+        self.storage_path = storage_path
+        self.skip_reason = ""
+        self._parts: List[Tuple[int, List[bytes], Any]] = []   # (段大小, 已完成各段的 MD5, 当前段的 hash)
+        self._part_filled: List[int] = []
+        self._whole = None
+
+        if not self.etag:
+            self.skip_reason = "对象没有 ETag"
+        elif "-" not in self.etag:
+            self._whole = hashlib.md5()
+        else:
+            count = self.etag.rsplit("-", 1)[1]
+            sizes = self.multipart_part_sizes(size, int(count)) if count.isdigit() else []
+            if not sizes:
+                self.skip_reason = f"无法由段数 {count} 推断分段大小"
+            for part_size in sizes:
+                self._parts.append((part_size, [], hashlib.md5()))
+                self._part_filled.append(0)
+
+    @staticmethod
+    def multipart_part_sizes(size: int, count: int) -> List[int]:
+        """
+        与段数吻合的候选段大小：
+        Go 端 minio-go PutObject (已知大小) 的段大小为 ceil(size / 10000) 向上取整到 16MiB 的倍数；
+        另加其他客户端常见的 5 / 8 / 16 / 32 / 64 / 128 MiB
+        """
+        minio_go = max(1, -(-size // 10000 // (16 * MiB))) * 16 * MiB
+        candidates = [minio_go] + [n * MiB for n in (5, 8, 16, 32, 64, 128)]
+        return [p for p in dict.fromkeys(candidates) if -(-size // p) == count]
+
+    def update(self, data: bytes):
+        if self._whole is not None:
+            self._whole.update(data)
+        for i, (part_size, digests, current) in enumerate(self._parts):
+            view = memoryview(data)
+            while view:
+                take = min(len(view), part_size - self._part_filled[i])
+                current.update(view[:take])
+                self._part_filled[i] += take
+                view = view[take:]
+                if self._part_filled[i] == part_size:
+                    digests.append(current.digest())
+                    current = hashlib.md5()
+                    self._part_filled[i] = 0
+            self._parts[i] = (part_size, digests, current)
+
+    def verify(self):
+        if self.skip_reason:
+            logger.warning(f"⚠️ [MinIO] 跳过完整性校验 ({self.skip_reason}): {self.storage_path} ETag={self.etag or '-'}")
+            return
+        if self._whole is not None:
+            actual = self._whole.hexdigest()
+        else:
+            actual = None
+            for i, (part_size, digests, current) in enumerate(self._parts):
+                all_digests = digests + ([current.digest()] if self._part_filled[i] else [])
+                candidate = f"{hashlib.md5(b''.join(all_digests)).hexdigest()}-{len(all_digests)}"
+                if candidate == self.etag:
+                    return
+                actual = actual or candidate
+        if actual != self.etag:
+            raise Exception(f"MinIO 校验失败: {self.storage_path} 计算值={actual} ETag={self.etag}")
 
 class MinioStore:
     def __init__(self):
@@ -16,17 +98,25 @@ class MinioStore:
         # 🔥 修改：使用 Config 中的桶名，或者默认为 chimera-docs (与 Go 保持一致)
         self.bucket = getattr(Config, "MINIO_BUCKET", "chimera-docs")
 
+    def stat(self, storage_path: str):
+        return self.client.stat_object(self.bucket, storage_path)
+
     def download_file(self, storage_path: str) -> bytes:
         """
-        从 MinIO 下载文件并记录 Trace
+        从 MinIO 下载文件并记录 Trace (整份读入内存，仅用于小文件)
         """
         with tracer.start_as_current_span("Skill:Minio_Download") as span:
             span.set_attribute("minio.path", storage_path)
+            start = time.perf_counter()
             try:
                 # 这里的 bucket 必须和 Go 上传时的 bucket 一致
                 response = self.client.get_object(self.bucket, storage_path)
                 data = response.read()
+                verifier = _ETagVerifier(response.headers.get("ETag"), len(data), storage_path)
+                verifier.update(data)
+                verifier.verify()
                 span.set_attribute("file.size", len(data))
+                StageGauges.observe("download", time.perf_counter() - start, len(data))
                 return data
             except Exception as e:
                 span.record_exception(e)
@@ -34,4 +124,60 @@ class MinioStore:
             finally:
                 if 'response' in locals():
                     response.close()
-                    response.release_conn()
\ No newline at end of file
+                    response.release_conn()
+
+    def download_to_file(self, storage_path: str, dest_path: str, stat: Any = None) -> Dict[str, Any]:
+        """
+        流式下载到本地文件：按 MINIO_PART_SIZE_MB 分块写盘，边下边算 MD5 并校验 ETag (含分段上传)，内存占用与文件大小无关
+        连接中断时用 Range (offset) 从已写入的位置续传，最多 MINIO_DOWNLOAD_RETRIES 次
+        :return: {"size", "seconds", "mb_per_s", "md5"}
+        """
+        with tracer.start_as_current_span("Skill:Minio_StreamDownload") as span:
+            span.set_attribute("minio.path", storage_path)
+            try:
+                stat = stat or self.stat(storage_path)
+                size = stat.size
+                md5 = hashlib.md5()
+                verifier = _ETagVerifier(stat.etag, size, storage_path)
+                written, retries = 0, 0
+                part_size = Config.MINIO_PART_SIZE_MB * 1024 * 1024
+                start = time.perf_counter()
+                with open(dest_path, "wb") as f:
+                    while written < size:
+                        response = None
+                        try:
+                            response = self.client.get_object(self.bucket, storage_path, offset=written)
+                            for part in response.stream(part_size):
+                                f.write(part)
+                                md5.update(part)
+                                verifier.update(part)
+                                written += len(part)
+                            if written < size:
+                                raise IOError(f"连接提前结束 ({written}/{size} 字节)")
+                        except Exception as e:
+                            retries += 1
+                            if retries > Config.MINIO_DOWNLOAD_RETRIES:
+                                raise
+                            logger.warning(f"⚠️ [MinIO] 下载中断，从 {written} 字节处续传 ({retries}/{Config.MINIO_DOWNLOAD_RETRIES}): {e}")
+                        finally:
+                            if response is not None:
+                                response.close()
+                                response.release_conn()
+
+                if written != size:
+                    raise Exception(f"大小不一致: 期望 {size} 字节，实际 {written} 字节")
+                verifier.verify()
+
+                seconds = time.perf_counter() - start
+                mb_per_s = size / 1024 / 1024 / seconds if seconds else 0.0
+                StageGauges.observe("download", seconds, size)
+                span.set_attribute("file.size", size)
+                span.set_attribute("download.mb_per_s", round(mb_per_s, 2))
+                logger.info(f"📥 [MinIO] {storage_path} {size / 1024 / 1024:.1f}MB 用时 {seconds:.2f}s ({mb_per_s:.1f}MB/s, 续传 {retries} 次)")
+                return {"size": size, "seconds": seconds, "mb_per_s": mb_per_s, "md5": md5.hexdigest()}
+            except Exception as e:
+                span.record_exception(e)
+                # 不完整 / 校验失败的文件不能留给解析器
+                if os.path.exists(dest_path):
+                    os.remove(dest_path)
+                raise Exception(f"MinIO 下载失败: {str(e)} (Bucket: {self.bucket}, Path: {storage_path})")
@@ -0,0 +1,104 @@
+"""
+chimera_docs 集合在线重建：按当前 Config 的布局 (量化 / 落盘 / HNSW / 段数 / BM25 稀疏向量 / payload 索引) 新建物理集合，
+全量拷贝后把别名 chimera_docs 原子地切到新集合，检索全程不中断。
+- 新部署由 QdrantStore 直接建成 "物理集合 + 别名"，每次迁移都是一次原子的别名切换，旧集合默认保留以便回滚 (--drop-old 删除)
+- 旧部署首次迁移时 chimera_docs 还是物理集合，与别名同名，只能先删旧集合再建别名 (毫秒级空窗)；
+  这一步失败时数据完整保留在新集合中，日志给出目标集合名，按提示手工建别名即可恢复
+- 拷贝期间 ETL 写入不会同步到新集合：迁移前请暂停 ETL Worker；切换前会比对两边点数，不一致则放弃切换
+- 旧集合没有稀疏向量时，拷贝过程中按 payload.content 补算 BM25 向量
+
+用法 (在 runtime 目录下): PYTHONPATH=. python -m core.stores.qdrant_migration [--batch-size 512] [--drop-old]
+"""
+import time
+import logging
+import argparse
+from typing import Optional
+
+from qdrant_client.http import models
+
+from core.stores.qdrant_store import QdrantStore
+
+logger = logging.getLogger(__name__)
+
+def _copy_point(point, with_sparse: bool) -> models.PointStruct:
+    vector = point.vector
+    if isinstance(vector, dict):
+        if with_sparse and QdrantStore.SPARSE_VECTOR_NAME in vector:
+            return models.PointStruct(id=point.id, vector=vector, payload=point.payload or {})
+        vector = vector.get("")
+    return QdrantStore.build_point({"id": point.id, "vector": vector, "payload": point.payload or {}}, with_sparse)
+
+def migrate_collection(store: QdrantStore, batch_size: int = 512, drop_old: bool = False,
+                       target: Optional[str] = None) -> str:
+    """
+    :return: 新物理集合名 (别名 store.collection_name 已指向它)
+    """
+    client = store.client
+    alias = store.collection_name
+    source = store.resolve_alias()
+    target = target or QdrantStore.physical_collection_name(alias)
+    params = QdrantStore.collection_params(store.vector_size)
+    with_sparse = params["sparse_vectors_config"] is not None
+
+    logger.info(f"🚚 [Migrate] {alias}: {source} -> {target} "
+                f"(quantization={params['quantization_config'] is not None}, sparse={with_sparse})")
+    client.create_collection(collection_name=target, **params)
+    # 先建 payload 索引再灌数据，拷贝过程中增量建索引
+    store.ensure_payload_indexes(target)
+
+    try:
+        # 1. 全量拷贝 (带向量)，读取走旧集合，检索不受影响
+        copied, offset = 0, None
+        start = time.perf_counter()
+        while True:
+            points, offset = client.scroll(collection_name=source, limit=batch_size, offset=offset,
+                                           with_payload=True, with_vectors=True)
+            if points:
+                client.upsert(collection_name=target, points=[_copy_point(p, with_sparse) for p in points], wait=True)
+                copied += len(points)
+                logger.info(f"📦 [Migrate] 已拷贝 {copied} 条 ({copied / (time.perf_counter() - start):.0f} 条/秒)")
+            if offset is None:
+                break
+
+        # 2. 切换前校验：拷贝期间有写入 (ETL 未暂停) 时两边点数不一致
+        source_count = client.count(collection_name=source, exact=True).count
+        target_count = client.count(collection_name=target, exact=True).count
+        if source_count != target_count:
+            raise RuntimeError(f"点数不一致 (源 {source_count} / 新 {target_count})，拷贝期间可能有写入，请暂停 ETL 后重试")
+    except Exception:
+        logger.error(f"❌ [Migrate] 迁移失败，删除未完成的新集合 {target}")
+        client.delete_collection(collection_name=target)
+        raise
+
+    # 3. 别名切换
+    if source == alias:
+        # 首次迁移：旧物理集合与别名同名，先删集合才能建别名
+        try:
+            client.delete_collection(collection_name=source)
+            client.update_collection_aliases(change_aliases_operations=[
+                models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=alias))
+            ])
+        except Exception as e:
+            # 空窗内启动的 QdrantStore 可能已建出空的 chimera_docs (或其别名)，需人工核对后再指向 target
+            logger.error(f"❌ [Migrate] 别名切换失败，数据完整保留在 {target}；请确认 {alias} 不存在 "
+                         f"(或删除空集合) 后手工创建别名 {alias} -> {target}: {e}")
+            raise RuntimeError(f"别名 {alias} 创建失败，数据在 {target}，需手工恢复") from e
+    else:
+        # 删除 + 创建在同一请求内原子生效，检索不会看到空窗
+        client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)),
+            models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=alias))
+        ])
+        if drop_old:
+            client.delete_collection(collection_name=source)
+    store.sparse_enabled = with_sparse
+    logger.info(f"✅ [Migrate] 别名 {alias} 已切换到 {target}，共 {copied} 条")
+    return target
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="按当前 Config 布局重建 chimera_docs 集合并切换别名")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--drop-old", action="store_true", help="切换后删除旧物理集合 (默认保留以便回滚)")
+    args = parser.parse_args()
+    migrate_collection(QdrantStore(), batch_size=args.batch_size, drop_old=args.drop_old)
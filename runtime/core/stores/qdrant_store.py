@@ -1,107 +1,402 @@
+import time
 import logging
 import requests
 import json
 import numpy as np # 👈 引入 numpy 进行转换
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from config import Config
+from core.llm.sparse_encoder import BM25Encoder
 
 logger = logging.getLogger(__name__)
 
 class QdrantStore:
-    def __init__(self):
+    # BM25 稀疏向量的名称 (dense 向量保持默认的无名向量，兼容已有集合)
+    SPARSE_VECTOR_NAME = "bm25"
+    # 过滤字段的 payload 索引：kb_id / source_id 只做等值匹配 (不建范围索引)，content_hash / kg_status 为关键字
+    PAYLOAD_INDEXES = {
+        "kb_id": models.IntegerIndexParams(type=models.IntegerIndexType.INTEGER, lookup=True, range=False),
+        "source_id": models.IntegerIndexParams(type=models.IntegerIndexType.INTEGER, lookup=True, range=False),
+        "content_hash": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+        "kg_status": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+    }
+    # 多查询合并的 RRF 常数：各路分数尺度不同 (混合检索为融合分，无 BM25 词元时为余弦分)，只按名次融合
+    MERGE_RRF_K = 60
+
+    def __init__(self, client: Optional[QdrantClient] = None):
+        """
+        :param client: 外部注入的 QdrantClient (如本地模式 QdrantClient(":memory:"))，为空则按 Config 连接
+        """
         # 锁定你的 Docker 映射端口
         self.host = getattr(Config, "QDRANT_HOST", "127.0.0.1")
-        self.port = 26333
+        self.port = getattr(Config, "QDRANT_PORT", 26333)
+        self.grpc_port = getattr(Config, "QDRANT_GRPC_PORT", 26334)
+        self.prefer_grpc = getattr(Config, "QDRANT_PREFER_GRPC", False)
         self.collection_name = "chimera_docs"
         self.vector_size = 384
+        # 集合带有 BM25 稀疏向量时才写入稀疏向量、启用混合检索 (由 _ensure_collection 确定)
+        self.sparse_enabled = False
 
-        # 初始化 SDK
-        self.client = QdrantClient(host=self.host, port=self.port)
-        self.api_url = f"http://{self.host}:{self.port}"
+        if client is not None:
+            # 注入模式 (本地模式/测试)：没有 REST 端点，检索直接走 SDK
+            self.client = client
+            self.api_url = None
+        else:
+            # 初始化 SDK：开启 gRPC 时，SDK 的所有调用复用同一条 HTTP/2 通道
+            self.client = QdrantClient(
+                host=self.host,
+                port=self.port,
+                grpc_port=self.grpc_port,
+                prefer_grpc=self.prefer_grpc
+            )
+            self.api_url = None if self.prefer_grpc else f"http://{self.host}:{self.port}"
+
+        # REST 检索走连接池，避免每轮对话都新建 TCP 连接
+        self.session = requests.Session()
+        pool_size = getattr(Config, "QDRANT_POOL_SIZE", 16)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
         self._ensure_collection()
 
     def _ensure_collection(self):
         try:
-            self.client.get_collection(self.collection_name)
+            # collection_name 迁移后是别名，按其指向的物理集合读取配置
+            info = self.client.get_collection(self.resolve_alias())
             logger.info(f"✅ Qdrant 集合 '{self.collection_name}' 已就绪")
+            self.sparse_enabled = Config.HYBRID_SEARCH_ENABLED and self.has_sparse_vectors(info)
+            if Config.HYBRID_SEARCH_ENABLED and not self.sparse_enabled:
+                logger.warning(f"⚠️ 集合 '{self.collection_name}' 没有 BM25 稀疏向量，混合检索退化为纯向量检索 (重建集合后生效)")
         except Exception:
-            logger.info(f"🚧 尝试创建集合: {self.collection_name}")
+            # 新部署直接建成 "物理集合 + 别名"，之后的迁移都是原子的别名切换 (见 qdrant_migration)
+            physical = self.physical_collection_name(self.collection_name)
+            logger.info(f"🚧 尝试创建集合: {physical} (别名 {self.collection_name})")
+            params = self.collection_params(self.vector_size)
+            alias_op = models.CreateAliasOperation(create_alias=models.CreateAlias(
+                collection_name=physical, alias_name=self.collection_name))
             try:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=models.VectorParams(size=self.vector_size, distance=models.Distance.COSINE)
-                )
+                self.client.create_collection(collection_name=physical, **params)
+                self.client.update_collection_aliases(change_aliases_operations=[alias_op])
             except:
                 # SDK 失败则尝试 REST
-                requests.put(f"{self.api_url}/collections/{self.collection_name}",
-                             json={"vectors": {"size": self.vector_size, "distance": "Cosine"}})
+                if not self.api_url: raise
+                self.session.put(f"{self.api_url}/collections/{physical}",
+                                 json=self._rest_collection_body(params))
+                self.session.post(f"{self.api_url}/collections/aliases",
+                                  json={"actions": [alias_op.model_dump(mode="json", exclude_none=True)]})
+            self.sparse_enabled = params["sparse_vectors_config"] is not None
+        self.ensure_payload_indexes()
+
+    def ensure_payload_indexes(self, collection_name: Optional[str] = None):
+        """
+        为过滤字段建 payload 索引 (已有的跳过)，否则 kb_id / content_hash 过滤需要扫描全部 point
+        建索引在 Qdrant 后台完成 (wait=False)，不阻塞启动与写入
+        """
+        if not Config.QDRANT_PAYLOAD_INDEXES:
+            return
+        collection_name = collection_name or self.resolve_alias()
+        try:
+            existing = self.client.get_collection(collection_name).payload_schema or {}
+        except Exception as e:
+            logger.warning(f"⚠️ 读取 payload 索引失败: {e}")
+            return
+        for field, schema in self.PAYLOAD_INDEXES.items():
+            if field in existing:
+                continue
+            try:
+                self.client.create_payload_index(collection_name=collection_name, field_name=field,
+                                                 field_schema=schema, wait=False)
+                logger.info(f"🗂️ 创建 payload 索引: {collection_name}.{field} ({schema.type})")
+            except Exception as e:
+                logger.warning(f"⚠️ 创建 payload 索引 {field} 失败: {e}")
+
+    def resolve_alias(self) -> str:
+        """collection_name 若是别名 (见 qdrant_migration)，返回其指向的物理集合名"""
+        try:
+            for alias in self.client.get_aliases().aliases:
+                if alias.alias_name == self.collection_name:
+                    return alias.collection_name
+        except Exception:
+            pass
+        return self.collection_name
+
+    @staticmethod
+    def physical_collection_name(alias: str) -> str:
+        """别名背后的物理集合名：新建与迁移重建都按时间戳命名"""
+        return f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+
+    @classmethod
+    def collection_params(cls, vector_size: int) -> Dict[str, Any]:
+        """
+        新建集合 (含迁移重建) 的参数，由 Config 决定布局：
+        - 量化：int8 标量 / binary 二值，量化向量常驻内存 (QDRANT_QUANTIZATION_ALWAYS_RAM)，原始向量用于重打分
+        - 原始向量 / payload 落盘：内存只放量化向量与 HNSW 图，适合千万级切片的大租户
+        - HNSW m / ef_construct 与段数
+        """
+        quantization = None
+        if Config.QDRANT_QUANTIZATION == "int8":
+            quantization = models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=Config.QDRANT_QUANTIZATION_ALWAYS_RAM))
+        elif Config.QDRANT_QUANTIZATION == "binary":
+            quantization = models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+                always_ram=Config.QDRANT_QUANTIZATION_ALWAYS_RAM))
+        elif Config.QDRANT_QUANTIZATION != "none":
+            logger.warning(f"⚠️ 未知量化方式 {Config.QDRANT_QUANTIZATION}，按 none 处理")
+
+        return {
+            "vectors_config": models.VectorParams(size=vector_size, distance=models.Distance.COSINE,
+                                                  on_disk=Config.QDRANT_ON_DISK_VECTORS),
+            "sparse_vectors_config": cls.sparse_vectors_config() if Config.HYBRID_SEARCH_ENABLED else None,
+            "hnsw_config": cls.hnsw_config(),
+            "optimizers_config": (models.OptimizersConfigDiff(default_segment_number=Config.QDRANT_SEGMENTS)
+                                  if Config.QDRANT_SEGMENTS > 0 else None),
+            "quantization_config": quantization,
+            "on_disk_payload": Config.QDRANT_ON_DISK_PAYLOAD,
+        }
+
+    @staticmethod
+    def hnsw_config() -> models.HnswConfigDiff:
+        if Config.QDRANT_TENANT_HNSW:
+            # 按租户建图：不建全局图，按 payload 索引字段 (kb_id) 为每个知识库单独建 HNSW 子图
+            return models.HnswConfigDiff(m=0, payload_m=Config.QDRANT_HNSW_M, ef_construct=Config.QDRANT_HNSW_EF_CONSTRUCT)
+        return models.HnswConfigDiff(m=Config.QDRANT_HNSW_M, ef_construct=Config.QDRANT_HNSW_EF_CONSTRUCT)
+
+    @staticmethod
+    def _rest_collection_body(params: Dict[str, Any]) -> Dict[str, Any]:
+        # SDK 参数名 -> REST 字段名；pydantic 模型转为 JSON 字典
+        dump = lambda v: v.model_dump(mode="json", exclude_none=True) if hasattr(v, "model_dump") else v
+        body = {}
+        for key, value in params.items():
+            if value is None:
+                continue
+            key = {"vectors_config": "vectors", "sparse_vectors_config": "sparse_vectors"}.get(key, key)
+            body[key] = {k: dump(v) for k, v in value.items()} if isinstance(value, dict) else dump(value)
+        return body
+
+    @classmethod
+    def sparse_vectors_config(cls) -> Dict[str, models.SparseVectorParams]:
+        # IDF 由 Qdrant 按集合统计在检索时计算，文档侧只写 BM25 词频权重
+        return {cls.SPARSE_VECTOR_NAME: models.SparseVectorParams(
+            index=models.SparseIndexParams(on_disk=Config.QDRANT_ON_DISK_VECTORS),
+            modifier=models.Modifier.IDF
+        )}
+
+    @staticmethod
+    def search_params(hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None,
+                      rescore: Optional[bool] = None) -> models.SearchParams:
+        """
+        单次检索参数，未指定的取 Config 默认值
+        - hnsw_ef: 检索时的 HNSW 候选宽度 (越大越准、越慢)
+        - oversampling / rescore: 量化集合先按量化向量取 top_k * oversampling 个候选，再用原始向量重打分
+          (未量化的集合会忽略这两项)
+        """
+        hnsw_ef = hnsw_ef if hnsw_ef is not None else (Config.QDRANT_SEARCH_HNSW_EF or None)
+        oversampling = oversampling if oversampling is not None else Config.QDRANT_SEARCH_OVERSAMPLING
+        rescore = rescore if rescore is not None else Config.QDRANT_SEARCH_RESCORE
+        return models.SearchParams(
+            hnsw_ef=hnsw_ef,
+            quantization=models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling or None)
+        )
 
-    def search(self, query_vector: Any, kb_ids: List[int] = None, top_k: int = 5):
+    @classmethod
+    def has_sparse_vectors(cls, collection_info) -> bool:
+        sparse = getattr(collection_info.config.params, "sparse_vectors", None) or {}
+        return cls.SPARSE_VECTOR_NAME in sparse
+
+    def search(self, query_vector: Any, kb_ids: List[int] = None, top_k: int = 5, hnsw_ef: Optional[int] = None,
+               oversampling: Optional[float] = None, rescore: Optional[bool] = None):
         """
         全平台兼容检索：自动处理 Numpy 转换 + SDK/REST 双路适配
+        hnsw_ef / oversampling / rescore: 单次检索参数，见 search_params()
         """
         # 1. 🔥 核心修复：强制将向量转为 Python 原生 List
         # 彻底解决 "ndarray is not JSON serializable" 报错
-        if isinstance(query_vector, (np.ndarray, list)):
-            if hasattr(query_vector, "tolist"):
-                vector_list = query_vector.tolist()
-            else:
-                vector_list = list(query_vector)
-        else:
-            vector_list = query_vector
+        vector_list = self._to_list(query_vector)
 
-        # 2. 构造过滤器
-        search_filter = None
-        if kb_ids:
-            search_filter = {"must": [{"key": "kb_id", "match": {"any": kb_ids}}]}
+        # 2. 构造过滤器与检索参数
+        search_filter = self.build_kb_filter(kb_ids)
+        params = self.search_params(hnsw_ef, oversampling, rescore)
 
         # 3. 🚀 优先尝试 REST API (因为你的环境 SDK 方法似乎有幽灵 Bug)
         # 针对 v1.7.4 的标准路径: /collections/{name}/points/search
+        if self.api_url:
+            try:
+                logger.info(f"📡 正在通过 REST 接口执行召回 (Port: {self.port})...")
+                payload = {
+                    "vector": vector_list,
+                    "limit": top_k,
+                    "with_payload": True,
+                    "filter": search_filter,
+                    "params": params.model_dump(mode="json", exclude_none=True)
+                }
+                resp = self.session.post(
+                    f"{self.api_url}/collections/{self.collection_name}/points/search",
+                    json=payload,
+                    timeout=5
+                )
+
+                if resp.status_code == 200:
+                    results = resp.json().get("result", [])
+                    return self._parse_rest_results(results)
+                else:
+                    logger.warning(f"⚠️ REST 检索返回非 200: {resp.text}")
+            except Exception as e:
+                logger.error(f"⚠️ REST 链路故障: {e}")
+
+        # 4. SDK 路径 (gRPC 模式/本地模式的主路径，REST 模式下的备份)
         try:
-            logger.info(f"📡 正在通过 REST 接口执行召回 (Port: {self.port})...")
-            payload = {
-                "vector": vector_list,
-                "limit": top_k,
-                "with_payload": True,
-                "filter": search_filter if kb_ids else None
-            }
-            resp = requests.post(
-                f"{self.api_url}/collections/{self.collection_name}/points/search",
-                json=payload,
-                timeout=5
+            return self._parse_sdk_results(self._search_sdk(vector_list, search_filter, top_k, params))
+        except Exception as e:
+            logger.error(f"⚠️ SDK 检索失败: {e}")
+        return []
+
+    def hybrid_search(self, query_text: str, query_vector: Any, kb_ids: List[int] = None, top_k: int = 5,
+                      hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None, rescore: Optional[bool] = None):
+        """
+        混合检索：dense 向量与 BM25 稀疏向量在同一次 query_points 请求中各自预取候选，
+        由 Qdrant 服务端 RRF 融合排序 (score 为融合分，只用于相对排序)。
+        零件号 / 条款号 / 错误码这类精确匹配由稀疏支路召回，不必靠加大 top_k 兜底。
+        集合没有稀疏向量、SDK 过旧 (无 query_points) 或请求失败时，退化为纯向量检索 search()
+        """
+        indices, values = BM25Encoder.encode_query(query_text)
+        if not self.sparse_enabled or not indices or not hasattr(self.client, "query_points"):
+            return self.search(query_vector, kb_ids, top_k, hnsw_ef, oversampling, rescore)
+
+        search_filter = self.build_kb_filter(kb_ids)
+        query_filter = models.Filter(**search_filter) if search_filter else None
+        try:
+            res = self.client.query_points(
+                collection_name=self.collection_name,
+                prefetch=self._hybrid_prefetch(indices, values, query_vector, query_filter, top_k,
+                                               self.search_params(hnsw_ef, oversampling, rescore)),
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                limit=top_k,
+                with_payload=True
             )
+            return self._parse_sdk_results(res.points)
+        except Exception as e:
+            logger.error(f"⚠️ 混合检索失败，退化为纯向量检索: {e}")
+        return self.search(query_vector, kb_ids, top_k, hnsw_ef, oversampling, rescore)
+
+    def _hybrid_prefetch(self, indices: List[int], values: List[float], query_vector: Any,
+                         query_filter: Optional[models.Filter], top_k: int,
+                         params: models.SearchParams) -> List[models.Prefetch]:
+        # dense 与 BM25 两路候选，交给外层 FusionQuery(RRF) 融合
+        prefetch_limit = max(top_k, Config.HYBRID_PREFETCH_LIMIT)
+        return [
+            models.Prefetch(query=self._to_list(query_vector), filter=query_filter, limit=prefetch_limit, params=params),
+            models.Prefetch(query=models.SparseVector(indices=indices, values=values),
+                            using=self.SPARSE_VECTOR_NAME, filter=query_filter, limit=prefetch_limit),
+        ]
+
+    def search_batch(self, queries: List[str], kb_ids: List[int] = None, top_k: int = 5,
+                     query_vectors: Optional[List[Any]] = None, hnsw_ef: Optional[int] = None,
+                     oversampling: Optional[float] = None, rescore: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        多查询扩展检索：原始问题 + 抽取出的实体一次批量编码，一次 query_batch_points 往返，
+        每路查询各取 top_k (集合有稀疏向量时每路都是混合检索)，结果按 chunk id 去重、按名次 RRF 合并后降序返回
+        :param query_vectors: 已编码好的查询向量 (与 queries 一一对应)，为空时用 EmbeddingModel 批量编码
+        """
+        # 重复 / 空查询只保留第一次出现 (已给出的向量随之对齐)
+        first = {}
+        for i, q in enumerate(queries):
+            if q and q.strip() and q not in first:
+                first[q] = i
+        if not first:
+            return []
+        queries = list(first)
+        if query_vectors is None:
+            # 懒加载：ETL / 迁移等只写不查的场景不需要加载嵌入模型
+            from core.llm.embedding import EmbeddingModel
+            query_vectors = EmbeddingModel.encode_batch(queries)
+        else:
+            query_vectors = [query_vectors[i] for i in first.values()]
 
-            if resp.status_code == 200:
-                results = resp.json().get("result", [])
-                return self._parse_rest_results(results)
+        search_filter = self.build_kb_filter(kb_ids)
+        query_filter = models.Filter(**search_filter) if search_filter else None
+        params = self.search_params(hnsw_ef, oversampling, rescore)
+        requests = []
+        for text, vector in zip(queries, query_vectors):
+            indices, values = BM25Encoder.encode_query(text) if self.sparse_enabled else ([], [])
+            if indices:
+                requests.append(models.QueryRequest(
+                    prefetch=self._hybrid_prefetch(indices, values, vector, query_filter, top_k, params),
+                    query=models.FusionQuery(fusion=models.Fusion.RRF),
+                    limit=top_k, with_payload=True
+                ))
             else:
-                logger.warning(f"⚠️ REST 检索返回非 200: {resp.text}")
+                requests.append(models.QueryRequest(query=self._to_list(vector), filter=query_filter, params=params,
+                                                    limit=top_k, with_payload=True))
+
+        try:
+            responses = self.client.query_batch_points(collection_name=self.collection_name, requests=requests)
+            result_lists = [self._parse_sdk_results(r.points) for r in responses]
         except Exception as e:
-            logger.error(f"⚠️ REST 链路故障: {e}")
-
-        # 4. 备份方案：尝试所有可能的 SDK 方法
-        for m_name in ["search", "query_points"]:
-            method = getattr(self.client, m_name, None)
-            if method:
-                try:
-                    logger.info(f"🔍 尝试 SDK.{m_name} 备份路径...")
-                    res = method(
-                        collection_name=self.collection_name,
-                        query_vector=vector_list,
-                        limit=top_k,
-                        with_payload=True
-                    )
-                    if hasattr(res, 'points'): res = res.points
-                    return self._parse_sdk_results(res)
-                except:
+            # 旧版 SDK / 服务端不支持批量 query：逐路检索兜底
+            logger.error(f"⚠️ 批量检索失败，逐路检索兜底: {e}")
+            result_lists = [self.hybrid_search(text, vector, kb_ids, top_k, hnsw_ef, oversampling, rescore)
+                            for text, vector in zip(queries, query_vectors)]
+        return self.merge_results(result_lists)
+
+    @classmethod
+    def merge_results(cls, result_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        按 chunk id 去重，跨查询做倒数名次融合 (RRF)：score = Σ 1 / (k + rank)，hit_count 记录被几路查询命中。
+        各路返回的原始分数尺度不一 (RRF 融合分 vs 余弦相似度)，不可直接比较，只用各路内的名次
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for results in result_lists:
+            for rank, hit in enumerate(sorted(results, key=lambda h: h["score"], reverse=True), start=1):
+                fused = 1.0 / (cls.MERGE_RRF_K + rank)
+                best = merged.get(hit["id"])
+                if best is None:
+                    merged[hit["id"]] = {**hit, "score": fused, "hit_count": 1}
                     continue
+                best["hit_count"] += 1
+                best["score"] += fused
+        return sorted(merged.values(), key=lambda h: h["score"], reverse=True)
 
-        return []
+    @staticmethod
+    def _to_list(query_vector: Any):
+        if isinstance(query_vector, (np.ndarray, list)):
+            if hasattr(query_vector, "tolist"):
+                return query_vector.tolist()
+            return list(query_vector)
+        return query_vector
+
+    @staticmethod
+    def build_kb_filter(kb_ids: List[int] = None) -> Optional[Dict[str, Any]]:
+        if not kb_ids:
+            return None
+        return {"must": [{"key": "kb_id", "match": {"any": kb_ids}}]}
 
-    def _parse_rest_results(self, result_list):
+    def _search_sdk(self, vector_list: List[float], search_filter: Optional[Dict], top_k: int,
+                    params: Optional[models.SearchParams] = None):
+        """兼容新旧 SDK：新版只有 query_points，旧版 (<1.10) 只有 search"""
+        query_filter = models.Filter(**search_filter) if search_filter else None
+        if hasattr(self.client, "query_points"):
+            return self.client.query_points(
+                collection_name=self.collection_name,
+                query=vector_list,
+                query_filter=query_filter,
+                search_params=params,
+                limit=top_k,
+                with_payload=True
+            ).points
+        return self.client.search(
+            collection_name=self.collection_name,
+            query_vector=vector_list,
+            query_filter=query_filter,
+            search_params=params,
+            limit=top_k,
+            with_payload=True
+        )
+
+    @staticmethod
+    def _parse_rest_results(result_list):
         formatted = []
         for hit in result_list:
             formatted.append({
@@ -112,7 +407,8 @@ class QdrantStore:
             })
         return formatted
 
-    def _parse_sdk_results(self, sdk_list):
+    @staticmethod
+    def _parse_sdk_results(sdk_list):
         formatted = []
         for hit in sdk_list:
             p = getattr(hit, "payload", {})
@@ -126,9 +422,66 @@ class QdrantStore:
 
     def upsert_chunks(self, chunks: List[Dict[str, Any]]):
         if not chunks: return
-        points = [
-            models.PointStruct(id=c["id"], vector=c["vector"], payload=c["payload"])
-            for c in chunks
-        ]
+        points = [self.build_point(c, self.sparse_enabled) for c in chunks]
         self.client.upsert(collection_name=self.collection_name, points=points)
-        logger.info(f"💾 写入 Qdrant: {len(points)} 条数据")
\ No newline at end of file
+        logger.info(f"💾 写入 Qdrant: {len(points)} 条数据")
+
+    @classmethod
+    def build_point(cls, chunk: Dict[str, Any], with_sparse: bool) -> models.PointStruct:
+        """
+        入库时按 payload.content (含 VLM 增强后的文本) 现算 BM25 稀疏向量，与 dense 向量一起写入
+        """
+        vector = chunk["vector"]
+        if with_sparse:
+            indices, values = BM25Encoder.encode_document(chunk["payload"].get("content", ""))
+            if indices:
+                vector = {"": vector, cls.SPARSE_VECTOR_NAME: models.SparseVector(indices=indices, values=values)}
+        return models.PointStruct(id=chunk["id"], vector=vector, payload=chunk["payload"])
+
+    def scroll_source_points(self, kb_id: int, source_id: int) -> Dict[str, Dict[str, Any]]:
+        """
+        拉取某个数据源当前已入库的全部 point (只取 content_hash / kg_status，不取向量)
+        :return: {point_id: payload}
+        """
+        source_filter = models.Filter(must=[
+            models.FieldCondition(key="kb_id", match=models.MatchValue(value=kb_id)),
+            models.FieldCondition(key="source_id", match=models.MatchValue(value=source_id))
+        ])
+        existing = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=source_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=["content_hash", "kg_status"],
+                with_vectors=False
+            )
+            for p in points:
+                existing[str(p.id)] = p.payload or {}
+            if offset is None:
+                break
+        return existing
+
+    def set_payload_bulk(self, point_ids: List[str], payload: Dict[str, Any], wait: bool = True):
+        """
+        批量更新 payload：一次 set_payload 请求 + PointIdsList 选择器，替代逐条循环
+        默认等待写入生效 (与 SDK 默认一致)，写入后立即读取的调用方不会读到旧值
+        """
+        if not point_ids: return
+        self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            points=models.PointIdsList(points=list(point_ids)),
+            wait=wait
+        )
+
+    def delete_points(self, point_ids: List[str]):
+        """按 ID 批量删除 (单次请求)"""
+        if not point_ids: return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=list(point_ids))
+        )
+        logger.info(f"🗑️ 删除 Qdrant 过期切片: {len(point_ids)} 条")
@@ -0,0 +1,255 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Lease:
+    raw: str               # 带投递 ID 的消息 (processing 列表与租约表都以它为键)
+    task: Dict[str, Any]   # 解析后的任务体
+    attempts: int          # 已失败次数 (首投为 0)
+    delivery_id: str = ""  # 本次投递的唯一 ID
+
+class ReliableTaskQueue:
+    """
+    基于 Redis List 的可靠任务队列 (兼容 Go 端 RPUSH 投递的原始 JSON)
+    - reserve: BLMOVE {name} -> {name}:processing，把消息换成带唯一投递 ID (_delivery) 的副本并登记租约 (visibility timeout)
+      Go 端 task_id 只精确到秒，内容相同的两条消息必须靠投递 ID 区分，否则会共用一个租约
+    - heartbeat: 执行期间定期续约；Worker 崩溃后租约过期，由任意 Worker 的 maintain() 重新投递
+    - ack: 从 processing 移除
+    - nack: 失败次数 +1，按指数退避放入 {name}:delayed (ZSet)，超过上限进入死信 {name}:dead
+    多 Worker 间的竞争 (回收租约 / 提升延迟任务) 通过 WATCH 事务保证只处理一次
+    """
+    def __init__(self, r: redis.Redis, name: str,
+                 visibility_timeout: int = None, max_retries: int = None, backoff_base: int = None):
+        self.r = r
+        self.name = name
+        self.processing_key = f"{name}:processing"
+        self.leases_key = f"{name}:leases"
+        self.delayed_key = f"{name}:delayed"
+        self.dead_key = f"{name}:dead"
+        self.visibility_timeout = visibility_timeout or Config.TASK_VISIBILITY_TIMEOUT
+        self.max_retries = Config.TASK_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.TASK_RETRY_BACKOFF if backoff_base is None else backoff_base
+
+    # ---------------- 消费端 ----------------
+    def reserve(self, timeout: int = 5) -> Optional[Lease]:
+        raw = self.r.blmove(self.name, self.processing_key, timeout, "LEFT", "RIGHT")
+        if raw is None:
+            return None
+        raw = raw.decode() if isinstance(raw, bytes) else raw
+        try:
+            task = json.loads(raw)
+        except Exception as e:
+            # 无法解析的消息直接进死信，避免反复投递
+            logger.error(f"☠️ [TaskQueue] 非法消息进入死信: {e}")
+            self._move_to_dead(raw, f"invalid payload: {e}")
+            return None
+
+        # 用带投递 ID 的副本替换 processing 中的原始消息 (内容相同的副本可互换，从尾部移除哪一条都一样)
+        # 在此之前崩溃则原始消息留在 processing，由 reclaim_expired 补登租约
+        delivery_id = uuid.uuid4().hex
+        task = {**task, "_delivery": delivery_id}
+        envelope = json.dumps(task, ensure_ascii=False)
+        pipe = self.r.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, -1, raw)
+        pipe.rpush(self.processing_key, envelope)
+        pipe.hset(self.leases_key, envelope, time.time() + self.visibility_timeout)
+        pipe.execute()
+        return Lease(raw=envelope, task=task, attempts=int(task.get("_attempts", 0)), delivery_id=delivery_id)
+
+    def heartbeat(self, lease: Lease) -> bool:
+        """
+        续约；返回 False 表示租约已被回收 (任务已重新投递给其他 Worker)
+        """
+        if not self.r.hexists(self.leases_key, lease.raw):
+            return False
+        self.r.hset(self.leases_key, lease.raw, time.time() + self.visibility_timeout)
+        return True
+
+    def start_heartbeat(self, lease: Lease) -> Callable[[], None]:
+        """
+        启动后台线程按 visibility_timeout / 3 的间隔续约
+        :return: 停止函数，ack / nack 前调用
+        """
+        stop = threading.Event()
+        interval = max(1.0, self.visibility_timeout / 3)
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    if not self.heartbeat(lease):
+                        logger.warning(f"⚠️ [TaskQueue] 租约已失效，任务可能被重复执行: {lease.raw[:80]}")
+                        return
+                except Exception as e:
+                    logger.warning(f"⚠️ [TaskQueue] 心跳失败: {e}")
+
+        threading.Thread(target=beat, name="task-heartbeat", daemon=True).start()
+        return stop.set
+
+    def ack(self, lease: Lease):
+        pipe = self.r.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, lease.raw)
+        pipe.hdel(self.leases_key, lease.raw)
+        removed, _ = pipe.execute()
+        if not removed:
+            logger.warning(f"⚠️ [TaskQueue] ack 时任务已不在 processing 中 (租约曾过期): {lease.raw[:80]}")
+
+    def nack(self, lease: Lease, error: str = ""):
+        """
+        失败：未超过重试上限则延迟重投，否则进入死信
+        """
+        self._retry_or_dead(lease.raw, error, require_expired=False)
+
+    # ---------------- 维护任务 (任意 Worker 周期调用) ----------------
+    def maintain(self) -> Dict[str, int]:
+        return {"reclaimed": self.reclaim_expired(), "promoted": self.promote_delayed()}
+
+    def reclaim_expired(self) -> int:
+        """
+        回收租约过期的任务 (Worker 崩溃或卡死)，视作一次失败
+        """
+        now = time.time()
+        leases = {self._s(k): float(v) for k, v in self.r.hgetall(self.leases_key).items()}
+
+        # BLMOVE 成功但登记租约前崩溃：先补登一个租约，给一个完整的可见性窗口
+        for raw in {self._s(x) for x in self.r.lrange(self.processing_key, 0, -1)}:
+            if raw not in leases:
+                self._register_orphan(raw, now + self.visibility_timeout)
+
+        reclaimed = 0
+        for raw, deadline in leases.items():
+            if deadline < now and self._retry_or_dead(raw, "visibility timeout", require_expired=True):
+                reclaimed += 1
+        if reclaimed:
+            logger.warning(f"♻️ [TaskQueue] 回收 {reclaimed} 个超时任务")
+        return reclaimed
+
+    def promote_delayed(self) -> int:
+        """
+        退避时间已到的任务移回待处理队列
+        """
+        promoted = 0
+        for raw in self.r.zrangebyscore(self.delayed_key, "-inf", time.time()):
+            with self.r.pipeline() as pipe:
+                try:
+                    pipe.watch(self.delayed_key)
+                    if pipe.zscore(self.delayed_key, raw) is None:
+                        continue  # 已被其他 Worker 提升
+                    pipe.multi()
+                    pipe.zrem(self.delayed_key, raw)
+                    pipe.rpush(self.name, raw)
+                    pipe.execute()
+                    promoted += 1
+                except redis.WatchError:
+                    continue
+        return promoted
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.r.llen(self.name),
+            "processing": self.r.llen(self.processing_key),
+            "delayed": self.r.zcard(self.delayed_key),
+            "dead": self.r.llen(self.dead_key),
+        }
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return [json.loads(x) for x in self.r.lrange(self.dead_key, 0, limit - 1)]
+
+    # ---------------- 内部 ----------------
+    def _register_orphan(self, raw: str, deadline: float):
+        """
+        为 processing 中没有租约的消息补登租约；事务内复核消息仍在 processing
+        (reserve 可能刚把它换成带投递 ID 的副本，此时补登的租约会成为指向不存在消息的孤儿)
+        """
+        with self.r.pipeline() as pipe:
+            try:
+                pipe.watch(self.processing_key)
+                if pipe.lpos(self.processing_key, raw) is None:
+                    return
+                pipe.multi()
+                pipe.hsetnx(self.leases_key, raw, deadline)
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def _retry_or_dead(self, raw: str, error: str, require_expired: bool) -> bool:
+        """
+        原子地把 raw 从 processing 移出并重投/入死信；返回是否由本次调用完成
+        require_expired=True 时 (回收路径) 会在事务内复核租约确实已过期
+        """
+        try:
+            task = json.loads(raw)
+        except Exception:
+            task = None
+
+        with self.r.pipeline() as pipe:
+            try:
+                pipe.watch(self.leases_key, self.processing_key)
+                deadline = pipe.hget(self.leases_key, raw)
+                if deadline is None:
+                    return False  # 已被其他 Worker 回收并重投
+                if require_expired and float(deadline) >= time.time():
+                    return False  # 已被续约
+                if pipe.lpos(self.processing_key, raw) is None:
+                    # 租约指向的消息已不在 processing (补登租约与 reserve 替换投递副本交错)：
+                    # 只清理租约，不能重投，否则会与正在执行的投递重复
+                    pipe.multi()
+                    pipe.hdel(self.leases_key, raw)
+                    pipe.execute()
+                    logger.warning(f"🧹 [TaskQueue] 清理失效租约 (消息已不在 processing): {raw[:80]}")
+                    return False
+                if task is None:
+                    pipe.multi()
+                    self._queue_dead(pipe, raw, error)
+                    pipe.execute()
+                    return True
+
+                attempts = int(task.get("_attempts", 0)) + 1
+                pipe.multi()
+                if attempts > self.max_retries:
+                    self._queue_dead(pipe, raw, error, task=task)
+                    logger.error(f"☠️ [TaskQueue] 重试 {attempts - 1} 次仍失败，进入死信: {error}")
+                else:
+                    pipe.lrem(self.processing_key, 1, raw)
+                    pipe.hdel(self.leases_key, raw)
+                    delay = self._backoff(attempts)
+                    # 重投时去掉旧的投递 ID，下次 reserve 重新分配
+                    retry = {k: v for k, v in task.items() if k != "_delivery"}
+                    retry_raw = json.dumps({**retry, "_attempts": attempts, "_last_error": error[:500]}, ensure_ascii=False)
+                    pipe.zadd(self.delayed_key, {retry_raw: time.time() + delay})
+                    logger.warning(f"🔁 [TaskQueue] 第 {attempts} 次失败，{delay}s 后重试: {error}")
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def _queue_dead(self, pipe, raw: str, error: str, task: Dict[str, Any] = None):
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.hdel(self.leases_key, raw)
+        pipe.rpush(self.dead_key, json.dumps({
+            "task": task if task is not None else raw,
+            "error": error[:2000],
+            "failed_at": int(time.time())
+        }, ensure_ascii=False))
+
+    def _move_to_dead(self, raw: str, error: str):
+        pipe = self.r.pipeline(transaction=True)
+        self._queue_dead(pipe, raw, error)
+        pipe.execute()
+
+    def _backoff(self, attempts: int) -> int:
+        # 指数退避：base, 2*base, 4*base ...，封顶 15 分钟
+        return min(self.backoff_base * (2 ** (attempts - 1)), 900)
+
+    @staticmethod
+    def _s(v) -> str:
+        return v.decode() if isinstance(v, bytes) else v
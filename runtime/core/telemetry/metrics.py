@@ -0,0 +1,75 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+class StageGauges:
+    """
+    进程内的阶段队列深度指标 (线程安全)
+    - gauge: 当前处于某阶段的任务数 (如 prefetching / ready / running / parse_pending)
+    - counter: 某阶段累计完成数与累计耗时 (及累计字节数)，用于估算吞吐
+    由 Worker 定期上报到日志与 Redis (chimera_etl_metrics)
+    """
+    _lock = threading.Lock()
+    _gauges: Dict[str, int] = {}
+    _completed: Dict[str, int] = {}
+    _busy_seconds: Dict[str, float] = {}
+    _bytes: Dict[str, int] = {}
+
+    @classmethod
+    def inc(cls, stage: str, n: int = 1):
+        with cls._lock:
+            cls._gauges[stage] = cls._gauges.get(stage, 0) + n
+
+    @classmethod
+    def dec(cls, stage: str, n: int = 1):
+        with cls._lock:
+            cls._gauges[stage] = max(0, cls._gauges.get(stage, 0) - n)
+
+    @classmethod
+    def set(cls, stage: str, value: int):
+        with cls._lock:
+            cls._gauges[stage] = value
+
+    @classmethod
+    def observe(cls, stage: str, seconds: float, nbytes: int = 0):
+        with cls._lock:
+            cls._completed[stage] = cls._completed.get(stage, 0) + 1
+            cls._busy_seconds[stage] = cls._busy_seconds.get(stage, 0.0) + seconds
+            if nbytes:
+                cls._bytes[stage] = cls._bytes.get(stage, 0) + nbytes
+
+    @classmethod
+    @contextmanager
+    def track(cls, stage: str):
+        """进入阶段 +1，退出 -1，并记录耗时"""
+        cls.inc(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.dec(stage)
+            cls.observe(stage, time.perf_counter() - start)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        """
+        扁平化快照：{stage}.depth / {stage}.completed / {stage}.avg_ms (/ {stage}.mb_per_s)
+        """
+        with cls._lock:
+            snap = {f"{k}.depth": v for k, v in cls._gauges.items()}
+            for k, n in cls._completed.items():
+                snap[f"{k}.completed"] = n
+                snap[f"{k}.avg_ms"] = round(cls._busy_seconds[k] * 1000 / n, 1) if n else 0.0
+            for k, b in cls._bytes.items():
+                busy = cls._busy_seconds.get(k, 0.0)
+                snap[f"{k}.mb_per_s"] = round(b / 1024 / 1024 / busy, 2) if busy else 0.0
+        return snap
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._gauges.clear()
+            cls._completed.clear()
+            cls._busy_seconds.clear()
+            cls._bytes.clear()
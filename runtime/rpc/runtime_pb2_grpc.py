@@ -44,6 +44,11 @@ class RuntimeServiceStub(object):
                 request_serializer=runtime__pb2.SyncRequest.SerializeToString,
                 response_deserializer=runtime__pb2.SyncResponse.FromString,
                 _registered_method=True)
+        self.SyncDataSourceStream = channel.unary_stream(
+                '/chimera.v1.RuntimeService/SyncDataSourceStream',
+                request_serializer=runtime__pb2.SyncRequest.SerializeToString,
+                response_deserializer=runtime__pb2.SyncProgress.FromString,
+                _registered_method=True)
 
 
 class RuntimeServiceServicer(object):
@@ -61,6 +66,13 @@ class RuntimeServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SyncDataSourceStream(self, request, context):
+        """流式同步：持续推送进度帧，最后一帧 done=true 并携带 SyncResponse；客户端取消即中止同步
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_RuntimeServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -74,6 +86,11 @@ def add_RuntimeServiceServicer_to_server(servicer, server):
                     request_deserializer=runtime__pb2.SyncRequest.FromString,
                     response_serializer=runtime__pb2.SyncResponse.SerializeToString,
             ),
+            'SyncDataSourceStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.SyncDataSourceStream,
+                    request_deserializer=runtime__pb2.SyncRequest.FromString,
+                    response_serializer=runtime__pb2.SyncProgress.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chimera.v1.RuntimeService', rpc_method_handlers)
@@ -138,3 +155,30 @@ class RuntimeService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SyncDataSourceStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chimera.v1.RuntimeService/SyncDataSourceStream',
+            runtime__pb2.SyncRequest.SerializeToString,
+            runtime__pb2.SyncProgress.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
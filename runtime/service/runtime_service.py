@@ -1,10 +1,12 @@
+import time
 import logging
-from typing import Any
+from typing import Any, Dict
 
 from rpc import runtime_pb2, runtime_pb2_grpc
 from core.managers.etl_manager import ETLManager
 from core.managers.inference_manager import InferenceManager
 from core.stores.qdrant_store import QdrantStore
+from core.cancellation import CancelToken, OperationCancelled
 
 from opentelemetry import trace
 from opentelemetry.trace import propagation
@@ -32,14 +34,16 @@ class ChimeraRuntimeService(runtime_pb2_grpc.RuntimeServiceServicer):
             # 调用 Manager 执行逻辑
             # Manager 是个生成器，但因为 Proto 定义是 Unary (非流式)，
             # 我们在这里消费完生成器，只返回最后的结果。
-            # (如果未来需要实时进度条，需修改 Proto 为 stream SyncResponse)
+            # (需要实时进度条请使用 SyncDataSourceStream)
             final_stats = {"chunks": 0, "pages": 0}
 
+            # 继承客户端 deadline；调用方取消后在下一个切片/批次边界停止
             iterator = self.etl_mgr.sync_datasource(
                 kb_id=request.kb_id,
                 source_id=request.datasource_id,
                 source_type=request.type,
-                config_json=request.config_json
+                config_json=request.config_json,
+                cancel_token=CancelToken.from_grpc_context(context)
             )
 
             for progress in iterator:
@@ -47,11 +51,11 @@ class ChimeraRuntimeService(runtime_pb2_grpc.RuntimeServiceServicer):
                 if "chunks" in progress:
                     final_stats = progress
 
-            return runtime_pb2.SyncResponse(
-                success=True,
-                chunks_count=final_stats.get("chunks", 0),
-                page_count=final_stats.get("pages", 0)
-            )
+            return self._build_sync_response(final_stats)
+
+        except OperationCancelled as e:
+            logger.warning(f"🛑 RPC Sync Cancelled DS:{request.datasource_id}: {e}")
+            return runtime_pb2.SyncResponse(success=False, error_msg=f"cancelled: {e}")
 
         except Exception as e:
             logger.error(f"❌ RPC Sync Failed: {str(e)}")
@@ -60,6 +64,77 @@ class ChimeraRuntimeService(runtime_pb2_grpc.RuntimeServiceServicer):
                 error_msg=str(e)
             )
 
+    def SyncDataSourceStream(self, request, context):
+        """
+        ETL 数据同步接口 (Server Streaming)
+        持续推送进度帧 (阶段 / 切片数 / 页数 / 嵌入与图谱吞吐)，最后一帧 done=true 携带 SyncResponse
+        客户端取消或断开后立即关闭生成器，停止后续解析与入库
+        """
+        PROGRESS_INTERVAL = 0.5  # 同一阶段内的进度帧最小间隔 (秒)，阶段切换时立即推送
+
+        iterator = self.etl_mgr.sync_datasource(
+            kb_id=request.kb_id,
+            source_id=request.datasource_id,
+            source_type=request.type,
+            config_json=request.config_json,
+            cancel_token=CancelToken.from_grpc_context(context)
+        )
+        last_stage, last_sent = None, 0.0
+        try:
+            for progress in iterator:
+                if not context.is_active():
+                    logger.warning(f"🛑 [SyncStream] 客户端已取消，中止同步 DS:{request.datasource_id}")
+                    return
+
+                if progress.get("success"):
+                    yield self._build_sync_progress(progress, done=True)
+                    return
+
+                now = time.time()
+                stage = progress.get("stage")
+                if stage != last_stage or now - last_sent >= PROGRESS_INTERVAL:
+                    last_stage, last_sent = stage, now
+                    yield self._build_sync_progress(progress)
+
+        except OperationCancelled as e:
+            # 客户端已离开，无需再推送失败帧
+            logger.warning(f"🛑 [SyncStream] 同步已取消 DS:{request.datasource_id}: {e}")
+
+        except Exception as e:
+            logger.error(f"❌ RPC SyncStream Failed: {str(e)}")
+            yield runtime_pb2.SyncProgress(
+                stage="failed",
+                done=True,
+                result=runtime_pb2.SyncResponse(success=False, error_msg=str(e))
+            )
+        finally:
+            # 关闭生成器：触发 sync_datasource 的 finally 清理 (客户端取消时尤其重要)
+            iterator.close()
+
+    @staticmethod
+    def _build_sync_response(stats: Dict[str, Any]):
+        return runtime_pb2.SyncResponse(
+            success=True,
+            chunks_count=stats.get("chunks", 0),
+            page_count=stats.get("pages", 0),
+            added_count=stats.get("added", 0),
+            unchanged_count=stats.get("unchanged", 0),
+            removed_count=stats.get("removed", 0)
+        )
+
+    @classmethod
+    def _build_sync_progress(cls, progress: Dict[str, Any], done: bool = False):
+        return runtime_pb2.SyncProgress(
+            stage=progress.get("stage", ""),
+            chunks_processed=progress.get("chunks", 0),
+            page_count=progress.get("pages", 0),
+            embed_chunks_per_sec=progress.get("embed_cps", 0.0),
+            kg_chunks_per_sec=progress.get("kg_cps", 0.0),
+            elapsed_ms=progress.get("elapsed_ms", 0),
+            done=done,
+            result=cls._build_sync_response(progress) if done else None
+        )
+
     def RunAgent(self, request, context):
         """
         智能体对话接口 (Server Streaming)
@@ -75,16 +150,24 @@ class ChimeraRuntimeService(runtime_pb2_grpc.RuntimeServiceServicer):
             if trace_id:
                 span.set_attribute("chimera.trace_id", trace_id)
                 logger.info(f"🔗 Linked to Go Trace ID: {trace_id}")
+            # 客户端断开/超时 -> 令牌取消 -> 检索与 LLM 流式生成随之中止
+            cancel_token = CancelToken.from_grpc_context(context)
+            iterator = None
             try:
                 # 调用 Manager 获取事件流
                 iterator = self.inf_mgr.run_chat(
                     query=request.query,
                     history=request.history,
-                    app_config_json=request.app_config_json
+                    app_config_json=request.app_config_json,
+                    cancel_token=cancel_token
                 )
 
                 # 将 Manager 返回的 Dict 转换为 Protobuf Message
                 for event in iterator:
+                    if not context.is_active():
+                        logger.warning("🛑 [RunAgent] 客户端已断开，停止生成")
+                        return
+
                     event_type = event.get("type")
 
                     # 1. 思考过程
@@ -155,4 +238,7 @@ class ChimeraRuntimeService(runtime_pb2_grpc.RuntimeServiceServicer):
                 yield runtime_pb2.RunAgentResponse(
                     type="error",
                     payload=f"Internal Server Error: {str(e)}"
-                )
\ No newline at end of file
+                )
+            finally:
+                if iterator is not None:
+                    iterator.close()
\ No newline at end of file
@@ -1,82 +1,427 @@
 import logging
 import io
-import uuid
 import os
+import queue
+import time
+import pickle
 import hashlib
+import threading
+import multiprocessing
 from pathlib import Path
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, Iterator, Optional
 
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions
+from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
 from docling.datamodel.document import DocumentStream
 from docling.chunking import HybridChunker
-from docling_core.types.doc import DocItemLabel
+from docling_core.types.doc import DocItemLabel, DoclingDocument
+
+from config import Config
+from core.telemetry.metrics import StageGauges
+from core.stores.image_buffer import ImageHandle
 
 logger = logging.getLogger(__name__)
 
+# 子进程 -> 父进程的流式消息类型
+_CHUNK, _DONE, _ERROR = "chunk", "done", "error"
+
+# 解析档位 (数据源 config_json.parse_profile 可覆盖全局 PARSE_PROFILE)
+# - ocr: auto = 只 OCR 没有原生文本层的页 | always = 每页都 OCR (扫描件夹杂错误文本层时使用)
+# - table_mode: TableFormer 表格结构识别精度
+# - images_scale: 页面/插图渲染倍率 (影响 OCR 与 VLM 看到的图片清晰度)
+PARSE_PROFILES = {
+    "fast": {"ocr": "auto", "table_mode": "fast", "images_scale": 1.0},
+    "balanced": {"ocr": "auto", "table_mode": "accurate", "images_scale": 2.0},
+    "accurate": {"ocr": "always", "table_mode": "accurate", "images_scale": 2.0},
+}
+
+def _put_until_stopped(out_q, message, stop) -> bool:
+    # 有界队列：父进程消费慢时阻塞 (背压)；父进程已放弃 (取消 / 出错) 时返回 False
+    while not stop.is_set():
+        try:
+            out_q.put(message, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _stream_in_subprocess(fn, args, out_q, stop):
+    """
+    子进程入口：fn(*args) 每产出一个切片就序列化放入队列，父进程边收边下发
+    每个子进程各自懒加载一份 Docling 模型，常驻复用
+    """
+    ImageHandle.reset_budget()
+    try:
+        chunks = fn(*args)
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration as done:
+                # 生成器的返回值 (本次解析的耗时统计) 随结束标记交回父进程
+                _put_until_stopped(out_q, (_DONE, done.value), stop)
+                return
+            image = chunk["metadata"].get("image")
+            payload = pickle.dumps(chunk)
+            if image is not None:
+                # 图片所有权随序列化结果转移给父进程
+                image.detach()
+            if not _put_until_stopped(out_q, (_CHUNK, payload), stop):
+                return
+    except BaseException as e:
+        _put_until_stopped(out_q, (_ERROR, f"{type(e).__name__}: {e}"), stop)
+
+def _convert_pages_in_subprocess(file_source, filename, page_range, profile, do_ocr):
+    return DoclingParser.convert_pages(file_source, filename, page_range, profile, do_ocr)
+
 class DoclingParser:
-    _converter = None
+    # (档位, 是否 OCR) -> DocumentConverter，各自常驻复用
+    _converters: Dict[Tuple[str, bool], Any] = {}
     _chunker = None
+    _init_lock = threading.Lock()
+    _pool = None
+    _manager = None
+    _pool_lock = threading.Lock()
 
     @classmethod
-    def _get_components(cls):
-        if cls._converter is None:
-            logger.info("🐢 [Init] 启动 Docling v2 高兼容性模式...")
-            pipeline_options = PdfPipelineOptions()
-            pipeline_options.do_ocr = True
-            pipeline_options.do_table_structure = True
-
-            # 开启图片识别
-            pipeline_options.generate_picture_images = True
-            pipeline_options.images_scale = 2.0
-
-            cls._converter = DocumentConverter(
-                format_options={
-                    InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-                }
-            )
+    def _get_pool(cls):
+        # spawn：避免 fork 继承父进程中的 CUDA / 线程状态
+        with cls._pool_lock:
+            if cls._pool is None:
+                logger.info(f"🧵 [Init] 启动 Docling 解析进程池 (processes={Config.PARSE_PROCESSES})")
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=Config.PARSE_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return cls._pool
+
+    @classmethod
+    def _get_manager(cls):
+        # 跨进程的有界队列 / 停止信号 (可作为参数传给进程池任务)
+        with cls._pool_lock:
+            if cls._manager is None:
+                cls._manager = multiprocessing.get_context("spawn").Manager()
+            return cls._manager
+
+    @classmethod
+    def parse_in_pool(cls, file_source, filename="temp.pdf", profile: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        在进程池中执行 parse_and_chunk，切片边产出边交回 (生成器)：
+        CPU 密集的版面分析/OCR 不占用 Worker 进程的 GIL，下游嵌入可以在解析结束前开始。
+        PARSE_PROCESSES=0 时退化为进程内解析
+        profile: 解析档位 (见 PARSE_PROFILES)，为空时使用 Config.PARSE_PROFILE
+        """
+        profile = cls.resolve_profile(profile)
+        with StageGauges.track("parse"):
+            if Config.PARSE_PROCESSES <= 0:
+                stats = yield from cls.parse_and_chunk(file_source, filename, profile)
+                cls._record_parse_stats(filename, stats)
+                return
+
+            # 大 PDF 按页码区间拆给多个解析进程
+            if Config.PARSE_PROCESSES > 1 and Config.PARSE_PAGES_PER_TASK > 0:
+                num_pages = cls.count_pdf_pages(file_source)
+                if num_pages >= Config.PARSE_PAGE_PARALLEL_MIN_PAGES:
+                    yield from cls._parse_pages_in_pool(file_source, filename, num_pages, profile)
+                    return
+
+            stats = yield from cls._stream_from_pool(DoclingParser.parse_and_chunk, file_source, filename, profile)
+            cls._record_parse_stats(filename, stats)
+
+    @classmethod
+    def _stream_from_pool(cls, fn, *args) -> Iterator[Dict[str, Any]]:
+        """
+        把 fn(*args) 放到进程池执行，通过有界队列逐个取回切片，生成器返回值为 fn 的返回值
+        调用方提前关闭生成器时通知子进程停止，并释放已排队未交出的切片图片
+        """
+        manager = cls._get_manager()
+        out_q = manager.Queue(maxsize=Config.PARSE_STREAM_BUFFER)
+        stop = manager.Event()
+        StageGauges.inc("parse_pending")
+        try:
+            future = cls._get_pool().submit(_stream_in_subprocess, fn, args, out_q, stop)
+        except Exception:
+            StageGauges.dec("parse_pending")
+            raise
+        future.add_done_callback(lambda _: StageGauges.dec("parse_pending"))
 
-            cls._chunker = HybridChunker(
-                tokenizer="sentence-transformers/all-MiniLM-L6-v2",
-                max_tokens=512,
-                merge_peers=True,
-            )
-        return cls._converter, cls._chunker
+        finished = False
+        try:
+            while True:
+                try:
+                    kind, payload = out_q.get(timeout=0.5)
+                except queue.Empty:
+                    # 任务已结束且队列已空，说明子进程没发结束标记就退出了 (如被 OOM 杀掉)
+                    if future.done() and out_q.empty():
+                        future.result()
+                        raise RuntimeError("Docling 解析进程异常退出")
+                    continue
+                if kind == _CHUNK:
+                    yield pickle.loads(payload)
+                elif kind == _DONE:
+                    finished = True
+                    return payload
+                else:
+                    raise RuntimeError(f"Docling 解析失败: {payload}")
+        finally:
+            if not finished:
+                stop.set()
+                while True:
+                    try:
+                        kind, payload = out_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if kind == _CHUNK:
+                        image = pickle.loads(payload)["metadata"].get("image")
+                        if image is not None: image.release()
+
+    @classmethod
+    def _parse_pages_in_pool(cls, file_source, filename: str, num_pages: int, profile: str) -> Iterator[Dict[str, Any]]:
+        """
+        分页并行：每个区间一个进程池任务 (各进程复用自己的 DocumentConverter)，
+        全部完成后按页码顺序合并为一个文档，再交给一个进程统一切分并流式交回
+        区间不跨越 "有文本层 / 需 OCR" 的边界，有文本层的区间不做 OCR
+        """
+        plan = cls.ocr_plan(file_source, profile) or [((1, num_pages), True)]
+        tasks = [((start + a - 1, start + b - 1), needs_ocr)
+                 for (start, end), needs_ocr in plan
+                 for a, b in cls.page_ranges(end - start + 1, Config.PARSE_PAGES_PER_TASK)]
+        logger.info(f"📚 [Docling] {filename} 共 {num_pages} 页，拆分为 {len(tasks)} 个区间并行转换")
+        pool = cls._get_pool()
+        futures = []
+        start_time = time.perf_counter()
+        try:
+            for page_range, needs_ocr in tasks:
+                future = pool.submit(_convert_pages_in_subprocess, file_source, filename, page_range, profile, needs_ocr)
+                StageGauges.inc("parse_pending")
+                future.add_done_callback(lambda _: StageGauges.dec("parse_pending"))
+                futures.append(future)
+            parts = [f.result() for f in futures]
+        except Exception as e:
+            # 任一区间失败都中止整份文档，不能把缺页的结果当作完整文档入库
+            logger.error(f"❌ [Docling] 分页转换失败: {e}", exc_info=True)
+            raise RuntimeError(f"Docling 分页转换失败: {e}") from e
+        finally:
+            # 失败或调用方提前关闭时，撤销尚未开始的区间
+            for f in futures:
+                f.cancel()
+        # 并行转换的墙钟耗时 (不含合并与切分)，与整份转换的统计口径一致
+        cls._record_parse_stats(filename, cls._parse_stats(profile, plan, time.perf_counter() - start_time))
+        yield from cls._stream_from_pool(DoclingParser.merge_and_chunk, parts, filename)
+
+    @classmethod
+    def resolve_profile(cls, profile: Optional[str] = None) -> str:
+        name = (profile or Config.PARSE_PROFILE or "balanced").lower()
+        if name not in PARSE_PROFILES:
+            logger.warning(f"⚠️ [Docling] 未知解析档位 {name}，回退为 balanced")
+            return "balanced"
+        return name
+
+    @classmethod
+    def _get_converter(cls, profile: str, do_ocr: bool):
+        key = (profile, do_ocr)
+        with cls._init_lock:
+            if key not in cls._converters:
+                options = PARSE_PROFILES[profile]
+                logger.info(f"🐢 [Init] 启动 Docling v2 高兼容性模式 (profile={profile}, ocr={do_ocr})...")
+                pipeline_options = PdfPipelineOptions()
+                pipeline_options.do_ocr = do_ocr
+                pipeline_options.do_table_structure = True
+                pipeline_options.table_structure_options.mode = (
+                    TableFormerMode.FAST if options["table_mode"] == "fast" else TableFormerMode.ACCURATE
+                )
+
+                # 开启图片识别
+                pipeline_options.generate_picture_images = True
+                pipeline_options.images_scale = options["images_scale"]
+
+                cls._converters[key] = DocumentConverter(
+                    format_options={
+                        InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+                    }
+                )
+            return cls._converters[key]
+
+    @classmethod
+    def _get_chunker(cls):
+        with cls._init_lock:
+            if cls._chunker is None:
+                cls._chunker = HybridChunker(
+                    tokenizer="sentence-transformers/all-MiniLM-L6-v2",
+                    max_tokens=512,
+                    merge_peers=True,
+                )
+            return cls._chunker
+
+    @classmethod
+    def _get_components(cls, profile: Optional[str] = None, do_ocr: bool = True):
+        return cls._get_converter(cls.resolve_profile(profile), do_ocr), cls._get_chunker()
 
     @staticmethod
-    def parse_and_chunk(file_source, filename="temp.pdf") -> List[Dict[str, Any]]:
-        converter, chunker = DoclingParser._get_components()
+    def _input_doc(file_source, filename: str):
+        if isinstance(file_source, bytes):
+            return DocumentStream(name=filename, stream=io.BytesIO(file_source))
+        return Path(file_source)
 
+    @staticmethod
+    def parse_and_chunk(file_source, filename="temp.pdf", profile: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        转换并切分 (生成器)：HybridChunker 每产出一个切片就交给调用方，结束时返回本次转换的耗时统计
+        转换失败时不产出任何切片 (调用方据此保留旧数据)；切分中途失败则抛出，避免把半份文档当作完整结果
+        """
         try:
-            if isinstance(file_source, bytes):
-                input_doc = DocumentStream(name=filename, stream=io.BytesIO(file_source))
+            # 1. 执行转换 (只对没有文本层的页做 OCR)
+            document, stats = DoclingParser.convert_document(file_source, filename, profile)
+        except Exception as e:
+            logger.error(f"❌ [Docling] 严重崩溃: {e}", exc_info=True)
+            return None
+        yield from DoclingParser._chunk_document(document, filename)
+        return stats
+
+    @staticmethod
+    def convert_document(file_source, filename: str, profile: Optional[str] = None):
+        """
+        自适应 OCR 转换：按 ocr_plan 把连续的 "有文本层" / "需 OCR" 页分段转换，再按页码顺序合并
+        返回 (DoclingDocument, 耗时统计)
+        """
+        profile = DoclingParser.resolve_profile(profile)
+        plan = DoclingParser.ocr_plan(file_source, profile)
+        start = time.perf_counter()
+        if len(plan) <= 1:
+            # 整份同类 (或非 PDF)：一次转换，不传页码区间
+            do_ocr = plan[0][1] if plan else True
+            converter = DoclingParser._get_converter(profile, do_ocr)
+            document = converter.convert(DoclingParser._input_doc(file_source, filename)).document
+        else:
+            docs = [
+                DoclingParser._get_converter(profile, needs_ocr).convert(
+                    DoclingParser._input_doc(file_source, filename), page_range=page_range
+                ).document
+                for page_range, needs_ocr in plan
+            ]
+            document = DoclingDocument.concatenate(docs)
+        return document, DoclingParser._parse_stats(profile, plan, time.perf_counter() - start)
+
+    @staticmethod
+    def convert_pages(file_source, filename: str, page_range: Tuple[int, int],
+                      profile: Optional[str] = None, do_ocr: bool = True) -> Dict[str, Any]:
+        """
+        只转换指定页码区间 (闭区间，从 1 开始)，返回可跨进程传递的 DoclingDocument 字典
+        """
+        converter = DoclingParser._get_converter(DoclingParser.resolve_profile(profile), do_ocr)
+        conv_result = converter.convert(DoclingParser._input_doc(file_source, filename), page_range=page_range)
+        return conv_result.document.export_to_dict()
+
+    @staticmethod
+    def merge_and_chunk(parts: List[Dict[str, Any]], filename="temp.pdf") -> Iterator[Dict[str, Any]]:
+        """
+        按页码顺序合并各区间的转换结果为一个文档，再统一切分 (合并后的文档树与整份转换相同，切分一致)
+        例外：Docling 的阅读顺序模型只在同一次转换内合并跨页段落，恰好跨越区间边界的段落会切成两段
+        合并失败时抛出 (调用方中止本次同步)
+        """
+        try:
+            docs = [DoclingDocument.model_validate(p) for p in parts]
+            document = DoclingDocument.concatenate(docs) if len(docs) > 1 else docs[0]
+        except Exception as e:
+            logger.error(f"❌ [Docling] 分页结果合并失败: {e}", exc_info=True)
+            raise RuntimeError(f"Docling 分页结果合并失败: {e}") from e
+        yield from DoclingParser._chunk_document(document, filename)
+
+    @staticmethod
+    def page_ranges(num_pages: int, pages_per_task: int) -> List[Tuple[int, int]]:
+        pages_per_task = max(1, pages_per_task)
+        return [(start, min(start + pages_per_task - 1, num_pages))
+                for start in range(1, num_pages + 1, pages_per_task)]
+
+    @staticmethod
+    def count_pdf_pages(file_source) -> int:
+        """PDF 页数 (pypdfium2 随 Docling 安装)；非 PDF 或读取失败返回 0"""
+        try:
+            import pypdfium2
+            pdf = pypdfium2.PdfDocument(file_source)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception:
+            return 0
+
+    @staticmethod
+    def ocr_plan(file_source, profile: str) -> List[Tuple[Tuple[int, int], bool]]:
+        """
+        逐页检测原生文本层 (pypdfium2)，返回 [(页码区间, 是否需要 OCR)]，连续同类页合并为一个区间
+        文本层字符数不足 OCR_MIN_TEXT_CHARS 的页 (扫描件 / 纯图片页) 需要 OCR；always 档位每页都 OCR
+        非 PDF 或读取失败返回 []，由调用方整份 OCR 转换
+        """
+        try:
+            import pypdfium2
+            pdf = pypdfium2.PdfDocument(file_source)
+        except Exception:
+            return []
+        flags = []
+        try:
+            always = PARSE_PROFILES[profile]["ocr"] == "always"
+            for index in range(len(pdf)):
+                if always:
+                    flags.append(True)
+                    continue
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                flags.append(len(text.strip()) < Config.OCR_MIN_TEXT_CHARS)
+        except Exception as e:
+            logger.warning(f"⚠️ [Docling] 文本层检测失败，整份 OCR: {e}")
+            return []
+        finally:
+            pdf.close()
+
+        plan = []
+        for page_no, needs_ocr in enumerate(flags, start=1):
+            if plan and plan[-1][1] == needs_ocr:
+                plan[-1] = ((plan[-1][0][0], page_no), needs_ocr)
             else:
-                input_doc = Path(file_source)
+                plan.append(((page_no, page_no), needs_ocr))
+        return plan
 
-            # 1. 执行转换
-            conv_result = converter.convert(input_doc)
+    @staticmethod
+    def _parse_stats(profile: str, plan: List[Tuple[Tuple[int, int], bool]], seconds: float) -> Dict[str, Any]:
+        pages = sum(end - start + 1 for (start, end), _ in plan)
+        ocr_pages = sum(end - start + 1 for (start, end), needs_ocr in plan if needs_ocr)
+        return {"profile": profile, "pages": pages, "ocr_pages": ocr_pages, "seconds": seconds}
 
-            # 2. 🔥 核心修正：使用 Markdown 导出作为内容基准
-            # 这是避开“元素数量为1” Bug 的最强手段
-            markdown_content = conv_result.document.export_to_markdown()
+    @staticmethod
+    def _record_parse_stats(filename: str, stats: Optional[Dict[str, Any]]):
+        """按档位记录单文档转换耗时 (convert_<profile>.avg_ms 随 Worker 指标上报)"""
+        if not stats:
+            return
+        StageGauges.observe(f"convert_{stats['profile']}", stats["seconds"])
+        per_page = f"，{stats['seconds'] * 1000 / stats['pages']:.0f} ms/页" if stats["pages"] else ""
+        logger.info(f"⏱️ [Docling] {filename} 转换用时 {stats['seconds']:.1f}s "
+                    f"(profile={stats['profile']}，共 {stats['pages']} 页，OCR {stats['ocr_pages']} 页{per_page})")
 
-            if not markdown_content or len(markdown_content.strip()) < 5:
-                logger.error("❌ 文档内容提取失败（Markdown 为空）")
-                return []
+    @staticmethod
+    def _page_number(chunk) -> int:
+        """切片所在页：各 doc_item 首个 prov 的页码取最大值 (跨页切片记为结束页)，没有 prov 时为 1"""
+        pages = [item.prov[0].page_no for item in (chunk.meta.doc_items or []) if getattr(item, "prov", None)]
+        return max(pages, default=1)
 
-            logger.info(f"📝 [Docling] 成功提取文本内容，长度: {len(markdown_content)} 字符")
+    @staticmethod
+    def _chunk_document(document, filename: str) -> Iterator[Dict[str, Any]]:
+        chunker = DoclingParser._get_chunker()
+        produced = 0
 
-            # 3. 使用 HybridChunker 进行切分
+        try:
+            # 2. 使用 HybridChunker 进行流式切分
             # 注意：在某些 Docling 版本下，chunker.chunk 可以直接接收 doc 对象
-            chunk_iter = chunker.chunk(conv_result.document)
-            final_chunks = []
-
-            for i, chunk in enumerate(chunk_iter):
-                # 尝试定位图片
-                image_path = None
+            for chunk in chunker.chunk(document):
+                # 尝试定位图片 (以内存句柄随切片传递，不再落盘 /tmp)
+                image = None
                 is_table = False
-                page_num = 1
 
                 # 处理图片路径 (Task 2.2)
                 if chunk.meta.doc_items:
@@ -85,11 +430,9 @@ class DoclingParser:
                             is_table = True
                             try:
                                 # 尝试获取表格图片
-                                image_obj = conv_result.document.get_image(item)
+                                image_obj = document.get_image(item)
                                 if image_obj:
-                                    img_id = str(uuid.uuid4())[:8]
-                                    image_path = f"/tmp/chimera_table_{img_id}.jpg"
-                                    image_obj.save(image_path)
+                                    image = ImageHandle.from_pil(image_obj)
 
                                     # 💡 关键：向上回溯寻找“Table x”字样
                                     # 这里我们可以简单地把当前 chunk 的 text（通常包含标题）作为 context
@@ -98,60 +441,63 @@ class DoclingParser:
                             break
                         if item.label == DocItemLabel.PICTURE:
                             try:
-                                img_id = str(uuid.uuid4())[:8]
-                                temp_img = f"/tmp/chimera_img_{img_id}.jpg"
-                                image_obj = conv_result.document.get_image(item)
+                                image_obj = document.get_image(item)
                                 if image_obj:
-                                    image_obj.save(temp_img)
-                                    image_path = temp_img
-                                    logger.info(f"📸 捕捉到切片关联插图: {temp_img}")
+                                    image = ImageHandle.from_pil(image_obj)
+                                    logger.info(f"📸 捕捉到切片关联插图: {image}")
                                     break
                             except: pass
 
                 # 提取哈希
                 c_hash = hashlib.md5(chunk.text.encode()).hexdigest()
 
-                final_chunks.append({
+                produced += 1
+                yield {
                     "content": chunk.text,
                     "metadata": {
                         "content_hash": c_hash,
-                        "image_path": image_path,
-                        "page_number": 1, # 默认 1，如果有 prov 则在下面覆盖
+                        "image": image,
+                        "is_table": is_table,
+                        "page_number": DoclingParser._page_number(chunk),
                         "breadcrumb": "",
                         "file_name": filename
                     }
-                })
+                }
 
-            # 4. 🔥 最终补偿逻辑：如果 Chunker 依然返回 0
-            if not final_chunks and len(markdown_content) > 10:
+            # 3. 🔥 最终补偿逻辑：如果 Chunker 返回 0，才导出 Markdown 兜底 (正常路径不再整份导出)
+            if not produced:
+                markdown_content = document.export_to_markdown()
+                if not markdown_content or len(markdown_content.strip()) < 5:
+                    logger.error("❌ 文档内容提取失败（Markdown 为空）")
+                    return
                 logger.warning("⚠️ Chunker 无法识别文档结构，执行流式补偿切分...")
                 # 简单按长度切分，保证系统不空转
                 text = markdown_content
                 step = 1000
                 for j in range(0, len(text), step):
                     sub_text = text[j:j+step]
-                    final_chunks.append({
+                    produced += 1
+                    yield {
                         "content": sub_text,
                         "metadata": {
                             "content_hash": hashlib.md5(sub_text.encode()).hexdigest(),
                             "file_name": filename
                         }
-                    })
+                    }
 
-            logger.info(f"✂️ [Tree-T] 解析完毕，最终产出 {len(final_chunks)} 个切片")
-            return final_chunks
+            logger.info(f"✂️ [Tree-T] 解析完毕，最终产出 {produced} 个切片")
 
         except Exception as e:
-            logger.error(f"❌ [Docling] 严重崩溃: {e}", exc_info=True)
-            return []
+            logger.error(f"❌ [Docling] 切分中途崩溃 (已产出 {produced} 个切片): {e}", exc_info=True)
+            raise
 
     @staticmethod
     def _table_to_propositions(table_item, doc) -> tuple[str, str]:
         """
-        返回: (结构化文本, 临时截图路径)
+        返回: (结构化文本, 表格截图句柄)
         """
         table_text = ""
-        temp_img_path = None
+        image = None
 
         try:
             df = table_item.export_to_dataframe(doc)
@@ -164,12 +510,10 @@ class DoclingParser:
         # 2. 强制备份：不管结构化成不成功，都给表格存一张图
         # 很多时候结构化会丢掉合并单元格的信息，VLM 能补全
         try:
-            img_id = str(uuid.uuid4())[:8]
-            temp_img_path = f"/tmp/chimera_table_{img_id}.jpg"
             image_obj = doc.get_image(table_item)
             if image_obj:
-                image_obj.save(temp_img_path)
+                image = ImageHandle.from_pil(image_obj)
         except:
             pass
 
-        return table_text, temp_img_path
\ No newline at end of file
+        return table_text, image
\ No newline at end of file
@@ -1,6 +1,6 @@
 # runtime/skills/reranker.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 import numpy as np
 
 class CognitiveReranker:
@@ -9,6 +9,7 @@ class CognitiveReranker:
         """
         判断 candidate 是否被 others 中的某个节点“支配”
         支配定义：如果 B 在所有维度都不如 A，且至少在一个维度比 A 差，则 A 支配 B。
+        (O(n²) 的逐个比较实现，已由 pareto_mask 取代，保留作对照基准)
         """
         c_v = candidate['metrics']['vector']
         c_g = candidate['metrics']['graph']
@@ -26,64 +27,98 @@ class CognitiveReranker:
                     return True
         return False
 
+    @staticmethod
+    def pareto_mask(scores: np.ndarray, block_size: int = 64) -> np.ndarray:
+        """
+        计算 Skyline (帕累托前沿) 掩码，支持任意维度，所有维度均为越大越好
+        排序 + 块嵌套循环 (BNL)：先按各维度字典序降序排列，支配者一定排在被支配者之前；
+        再按块处理，每块只需与已确定的前沿及块内点做一次矩阵化比较
+        (支配关系可传递，被非前沿点支配的点必然也被前沿点支配)
+        n 不超过一个块 (检索常见的 top 25 左右) 时直接两两比较，省去排序与分块
+        :param scores: (n, d) 指标矩阵
+        :return: 长度 n 的布尔数组，True 表示非支配解 (保持原始顺序)
+        """
+        n = scores.shape[0]
+        mask = np.zeros(n, dtype=bool)
+        if n == 0:
+            return mask
+
+        def dominated_by(points: np.ndarray, others: np.ndarray) -> np.ndarray:
+            # (len(points),) 布尔：是否存在 others 中的点在所有维度 >= 且至少一维 >
+            ge = (others[None, :, :] >= points[:, None, :]).all(axis=2)
+            gt = (others[None, :, :] > points[:, None, :]).any(axis=2)
+            return (ge & gt).any(axis=1)
+
+        if n <= block_size:
+            return ~dominated_by(scores, scores)
+
+        # np.lexsort 以最后一个 key 为主键，这里让第 0 维成为主键
+        order = np.lexsort(-scores.T[::-1])
+        front = scores[:0]
+        for b in range(0, n, block_size):
+            idx = order[b:b + block_size]
+            block = scores[idx]
+            # 先与 (通常很小的) 前沿比较剔除大部分点，再对幸存者做块内两两比较
+            keep = ~dominated_by(block, front) if len(front) else np.ones(len(idx), dtype=bool)
+            if keep.any():
+                survivors = block[keep]
+                keep[keep] = ~dominated_by(survivors, survivors)
+            mask[idx[keep]] = True
+            front = np.concatenate([front, block[keep]])
+        return mask
+
     @staticmethod
     def skyline_filter(
             vector_results: List[Dict],
             graph_scores: Dict[str, float],
-            top_k: int = 5
+            top_k: int = 5,
+            extra_scores: Optional[Dict[str, Dict[str, float]]] = None,
+            weights: Optional[Sequence[float]] = None
     ) -> List[Dict]:
         """
-        落地 BookRAG 多维 Skyline 过滤算法
+        落地 BookRAG 多维 Skyline 过滤算法 (NumPy 向量化)
+        :param extra_scores: 额外评价维度 {维度名: {chunk_id: 分数}}，与图谱分一样按最大值归一化
+        :param weights: 综合排序权重，顺序为 (语义, 拓扑, 层级, *额外维度)，默认 (0.4, 0.4, 0.2, 0...)
         """
         if not vector_results:
             return []
+        extra_scores = extra_scores or {}
 
-        # 1. 准备评价指标 (Normalization)
-        candidates = []
+        # 1. 准备评价指标 (Normalization)，打包为 (n, d) 矩阵
         max_v = max([hit.get('score', 0.1) for hit in vector_results]) or 1.0
-        max_g = max(graph_scores.values()) if graph_scores else 1.0
-
-        for hit in vector_results:
-            cid = str(hit.get('metadata', {}).get('chunk_id') or hit.get('id'))
+        max_g = (max(graph_scores.values()) if graph_scores else 1.0) or 1.0
 
+        cids = [str(hit.get('metadata', {}).get('chunk_id') or hit.get('id')) for hit in vector_results]
+        columns = [
             # 维度 A: 语义分 (0-1)
-            v_score = hit.get('score', 0.0) / max_v
-
+            np.array([hit.get('score', 0.0) for hit in vector_results], dtype=np.float64) / max_v,
             # 维度 B: 拓扑分 (0-1)
-            g_score = graph_scores.get(cid, 0.0) / max_g
-
+            np.array([graph_scores.get(cid, 0.0) for cid in cids], dtype=np.float64) / max_g,
             # 维度 C: 层级分 (深度越深，得分越高，越具像)
             # Level 3 (Segment) > Level 1 (Chapter)
-            level = hit.get('metadata', {}).get('level', 0)
-            h_score = min(level / 5.0, 1.0)
-
-            candidates.append({
-                "raw": hit,
-                "metrics": {
-                    "vector": v_score,
-                    "graph": g_score,
-                    "hierarchy": h_score
-                }
-            })
+            np.minimum(np.array([hit.get('metadata', {}).get('level', 0) for hit in vector_results], dtype=np.float64) / 5.0, 1.0),
+        ]
+        for dim_scores in extra_scores.values():
+            max_e = (max(dim_scores.values()) if dim_scores else 1.0) or 1.0
+            columns.append(np.array([dim_scores.get(cid, 0.0) for cid in cids], dtype=np.float64) / max_e)
+        scores = np.column_stack(columns)
 
         # 2. 计算 Skyline 集合 (非支配解)
-        skyline = []
-        for i, c in enumerate(candidates):
-            # 检查是否有其他节点在三个维度上都比 c 强
-            if not CognitiveReranker._is_dominated(c, candidates):
-                skyline.append(c)
+        skyline_idx = np.flatnonzero(CognitiveReranker.pareto_mask(scores))
 
         # 3. 结果精选
         # 如果 Skyline 里的解太多，按综合加权分排个序
-        for s in skyline:
-            m = s['metrics']
-            # 这里的权重平衡了：细节(0.4) + 结构(0.4) + 层级深度(0.2)
-            s['combined'] = m['vector'] * 0.4 + m['graph'] * 0.4 + m['hierarchy'] * 0.2
-
-        skyline.sort(key=lambda x: x['combined'], reverse=True)
+        # 这里的权重平衡了：细节(0.4) + 结构(0.4) + 层级深度(0.2)
+        if weights is None:
+            weights = (0.4, 0.4, 0.2) + (0.0,) * len(extra_scores)
+        # 逐列累加 (与逐项相加的浮点顺序一致)，保证排序结果稳定可复现
+        combined = scores[skyline_idx, 0] * weights[0]
+        for d in range(1, scores.shape[1]):
+            combined = combined + scores[skyline_idx, d] * weights[d]
+        ranked = skyline_idx[np.argsort(-combined, kind="stable")]
 
         # 返回原始数据格式
-        final_results = [s['raw'] for s in skyline[:top_k]]
+        final_results = [vector_results[i] for i in ranked[:top_k]]
 
         # 兜底逻辑：如果 Skyline 过滤得太狠，解太少，用 Top-K 补齐
         if len(final_results) < top_k:
@@ -94,4 +129,4 @@ class CognitiveReranker:
                 if str(v.get('id')) not in existing_ids:
                     final_results.append(v)
 
-        return final_results
\ No newline at end of file
+        return final_results
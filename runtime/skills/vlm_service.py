@@ -1,8 +1,13 @@
+import io
 import os
+import hashlib
 import logging
+import threading
+from typing import Any, Dict, List, Optional, Union
 from PIL import Image
-from vllm import LLM, SamplingParams
 from config import Config
+from core.stores.local_cache import LocalKVCache
+from core.stores.image_buffer import ImageHandle
 
 # WSL2 环境优化
 os.environ["VLLM_USE_MODELSCOPE"] = "True"
@@ -11,11 +16,26 @@ os.environ["NCCL_IB_DISABLE"] = "1"
 
 logger = logging.getLogger(__name__)
 
+# 单张图缩放后的像素上限 (约 400-600 个视觉 Token)
+MAX_PIXELS = 600000
+
 class VLMService:
     _instance = None
+    _init_lock = threading.Lock()
+    _cache = None
 
-    def __init__(self):
+    def __init__(self, model=None, sampling_params=None):
         self.model_path = Config.VLM_MODEL_PATH
+        # vLLM 离线 LLM 引擎非线程安全：多个同步任务并发时串行提交 generate
+        self._generate_lock = threading.Lock()
+        if model is not None:
+            # 外部注入的引擎 (测试 / 复用已加载的模型)
+            self.model = model
+            self.sampling_params = sampling_params
+            return
+
+        # vllm 只在真正加载视觉引擎时导入，纯文本部署无需安装
+        from vllm import LLM, SamplingParams
         logger.info(f"🎨 [vLLM] 正在 A4000 启动自适应视觉引擎: {self.model_path}")
 
         try:
@@ -28,6 +48,8 @@ class VLMService:
                 # 🔥 调整 2：上限提升到 2048，足以容纳缩放后的图片
                 max_model_len=2048,
                 limit_mm_per_prompt={"image": 1},
+                # 批量提交时同时调度的序列数与单次提交窗口一致，防止 KV Cache 被挤爆
+                max_num_seqs=max(1, Config.VLM_BATCH_SIZE),
                 enforce_eager=True
             )
 
@@ -45,13 +67,113 @@ class VLMService:
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._init_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
 
     def describe_image(self, image_path: str, context_breadcrumb: str = "", is_table: bool = False) -> str:
         """
-        带上下文引导的视觉推理
+        带上下文引导的视觉推理 (单张，等价于只有一项的 describe_images)
+        """
+        return self.describe_images([{"image": image_path, "breadcrumb": context_breadcrumb, "is_table": is_table}])[0]
+
+    def describe_images(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """
+        批量视觉推理：每 VLM_BATCH_SIZE 张图为一个窗口，先查描述缓存，未命中的合并为一次 generate 调用
+        :param requests: [{"image": ImageHandle / 路径 / bytes / PIL.Image, "breadcrumb": 所在章节, "is_table": 是否表格}]
+        :return: 与 requests 等长、顺序一致的描述文本；单张图失败时该项为 "[视觉解析异常]: ..."
+        """
+        results: List[Optional[str]] = [None] * len(requests)
+        cache = self.get_cache()
+        window = max(1, Config.VLM_BATCH_SIZE)
+        for start in range(0, len(requests), window):
+            # 1. 加载缩放，计算缓存 key
+            keys: Dict[int, str] = {}
+            images: Dict[int, Image.Image] = {}
+            for i in range(start, min(start + window, len(requests))):
+                req = requests[i]
+                try:
+                    images[i] = self.prepare_image(req["image"])
+                except Exception as e:
+                    logger.error(f"❌ 图片加载失败: {e}")
+                    results[i] = f"[视觉解析异常]: {str(e)}"
+                    continue
+                keys[i] = self.cache_key(images[i], req.get("is_table", False))
+
+            # 2. 命中缓存的直接回填
+            cached = cache.get_many(set(keys.values())) if cache and keys else {}
+            # 3. 未命中的按 key 去重 (同一文档里重复出现的 Logo / 图标只推理一次)
+            inputs, pending = [], {}
+            for i, key in keys.items():
+                if key in cached:
+                    results[i] = cached[key].decode("utf-8")
+                    continue
+                if key not in pending:
+                    req = requests[i]
+                    inputs.append({
+                        "prompt": self.build_prompt(req.get("breadcrumb", ""), req.get("is_table", False)),
+                        "multi_modal_data": {"image": images[i]},
+                    })
+                    pending[key] = []
+                pending[key].append(i)
+            if not inputs:
+                continue
+
+            try:
+                with self._generate_lock:
+                    outputs = self.model.generate(inputs, sampling_params=self.sampling_params)
+                # vLLM 按输入顺序返回，逐项回填到原始位置
+                fresh = []
+                for (key, slots), out in zip(pending.items(), outputs):
+                    text = out.outputs[0].text
+                    fresh.append((key, text.encode("utf-8")))
+                    for i in slots:
+                        results[i] = text
+                if cache:
+                    cache.put_many(fresh)
+                logger.info(f"🎨 [vLLM] 批量推理完成: {len(inputs)} 张 (缓存命中 {len(keys) - sum(map(len, pending.values()))} 张)")
+            except Exception as e:
+                logger.error(f"❌ 推理失败: {e}")
+                for slots in pending.values():
+                    for i in slots:
+                        results[i] = f"[视觉解析异常]: {str(e)}"
+        return results
+
+    def cache_key(self, image: Image.Image, is_table: bool = False) -> str:
+        """
+        描述缓存 key = 模型路径 + 提示模式 (table / figure) + 缩放后像素的字节哈希
+        同一张图在文档新版本里重新导出后像素不变，即可命中
+        """
+        digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+        return f"{self.model_path}:{'table' if is_table else 'figure'}:{digest.hexdigest()}"
+
+    @classmethod
+    def get_cache(cls) -> Optional[LocalKVCache]:
+        """
+        视觉描述缓存 (懒加载)：value = UTF-8 描述文本，磁盘层按总字节数 LRU 淘汰
         """
+        if cls._cache is None and Config.VLM_CACHE_ENABLED:
+            try:
+                cls._cache = LocalKVCache(
+                    os.path.join(Config.CACHE_DIR, "vlm_descriptions.db"),
+                    max_bytes=Config.VLM_CACHE_MAX_MB * 1024 * 1024,
+                    hot_size=256,
+                    name="VLMCache"
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 视觉描述缓存初始化失败，退化为直接推理: {e}")
+                Config.VLM_CACHE_ENABLED = False
+        return cls._cache
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, float]:
+        """视觉描述缓存命中统计"""
+        return cls._cache.stats() if cls._cache else {}
+
+    @staticmethod
+    def build_prompt(context_breadcrumb: str = "", is_table: bool = False) -> str:
         # 💡 针对不同类型的图，使用不同的引导语
         if is_table:
             prompt = (
@@ -64,37 +186,32 @@ class VLMService:
         else:
             prompt = f"这张图片位于 '{context_breadcrumb}'。请详细识别图中的架构组件、箭头流向、文字说明。如果是流程图，请列出从 A 到 B 的具体步骤。"
 
-        input_prompt = (
+        return (
             f"<|im_start|>system\nYou are a helpful assistant.<|im_end|>\n"
             f"<|im_start|>user\n<|vision_start|><|image_pad|><|vision_end|>{prompt}<|im_end|>\n"
             f"<|im_start|>assistant\n"
         )
 
-        try:
-            # 手动缩放图片防止 Token 溢出
-            # Qwen2-VL 每个 28x28 的切片是一个 Token
-            # 限制总像素在 250,000 左右（约等于 500x500），产生约 400-600 个 Token
-            raw_image = Image.open(image_path).convert("RGB")
-
-            # 动态计算缩放比例
-            max_pixels = 600000
-            width, height = raw_image.size
-            if width * height > max_pixels:
-                scale = (max_pixels / (width * height)) ** 0.5
-                new_size = (int(width * scale), int(height * scale))
-                image = raw_image.resize(new_size, Image.LANCZOS)
-                logger.info(f"📏 图片已从 {width}x{height} 缩放至 {new_size}")
-            else:
-                image = raw_image
-
-            outputs = self.model.generate(
-                {
-                    "prompt": input_prompt,
-                    "multi_modal_data": {"image": image},
-                },
-                sampling_params=self.sampling_params
-            )
-            return outputs[0].outputs[0].text
-        except Exception as e:
-            logger.error(f"❌ 推理失败: {e}")
-            return f"[视觉解析异常]: {str(e)}"
\ No newline at end of file
+    @staticmethod
+    def prepare_image(source: Union[ImageHandle, str, bytes, Image.Image], max_pixels: int = MAX_PIXELS) -> Image.Image:
+        """
+        加载并缩放图片，防止 Token 溢出
+        Qwen2-VL 每个 28x28 的切片是一个 Token，总像素限制在 60 万左右
+        """
+        if isinstance(source, ImageHandle):
+            raw_image = source.open().convert("RGB")
+        elif isinstance(source, Image.Image):
+            raw_image = source.convert("RGB")
+        elif isinstance(source, (bytes, bytearray)):
+            raw_image = Image.open(io.BytesIO(source)).convert("RGB")
+        else:
+            raw_image = Image.open(source).convert("RGB")
+
+        # 动态计算缩放比例
+        width, height = raw_image.size
+        if width * height > max_pixels:
+            scale = (max_pixels / (width * height)) ** 0.5
+            new_size = (int(width * scale), int(height * scale))
+            logger.info(f"📏 图片已从 {width}x{height} 缩放至 {new_size}")
+            return raw_image.resize(new_size, Image.LANCZOS)
+        return raw_image
@@ -0,0 +1,41 @@
+# runtime/test/bench_adaptive_ocr.py
+# 自适应 OCR 基准：同一份 PDF 在各解析档位下的转换耗时 / OCR 页数 / 切片数
+# accurate 每页都 OCR (即旧版 do_ocr=True 行为)，balanced / fast 只 OCR 没有文本层的页
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_adaptive_ocr.py <PDF路径> [档位...]
+import sys
+import time
+
+from skills.doc_parser import DoclingParser, PARSE_PROFILES
+
+def release(chunks):
+    for c in chunks:
+        if c["metadata"].get("image"): c["metadata"]["image"].release()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python test/bench_adaptive_ocr.py <pdf> [档位...]")
+        sys.exit(1)
+    pdf = sys.argv[1]
+    profiles = sys.argv[2:] or ["accurate", "balanced", "fast"]
+    for profile in profiles:
+        # 先加载本档位用到的转换器，避免把模型加载时间算进去
+        for _, needs_ocr in DoclingParser.ocr_plan(pdf, profile):
+            DoclingParser._get_converter(profile, needs_ocr)
+    DoclingParser._get_chunker()
+
+    print(f"{'profile':>10}{'pages':>7}{'ocr':>6}{'convert s':>11}{'ms/page':>9}{'total s':>9}{'chunks':>8}")
+    for profile in profiles:
+        assert profile in PARSE_PROFILES, f"未知档位 {profile}"
+        start = time.perf_counter()
+        parser = DoclingParser.parse_and_chunk(pdf, "bench.pdf", profile)
+        chunks = []
+        try:
+            while True:
+                chunks.append(next(parser))
+        except StopIteration as done:
+            stats = done.value
+        total = time.perf_counter() - start
+        per_page = stats["seconds"] * 1000 / max(1, stats["pages"])
+        print(f"{profile:>10}{stats['pages']:>7}{stats['ocr_pages']:>6}{stats['seconds']:>11.1f}"
+              f"{per_page:>9.0f}{total:>9.1f}{len(chunks):>8}")
+        release(chunks)
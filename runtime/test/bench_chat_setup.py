@@ -0,0 +1,40 @@
+# runtime/test/bench_chat_setup.py
+# 单次对话请求的工作流准备开销：每请求新建 ChatWorkflow (旧) vs 进程级单例 (新)
+# 不调用 LLM，只统计 Prompt 读取 / Agent & Client 初始化 / StateGraph 编译的耗时
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_chat_setup.py [请求数]
+import sys
+import time
+import statistics
+from qdrant_client import QdrantClient
+
+from core.llm.llm import LLMClient
+from core.stores.qdrant_store import QdrantStore
+from workflows.chat_flow import ChatWorkflow
+
+def per_request_setup(qdrant):
+    # 还原旧逻辑：每个请求都新建 OpenAI 客户端、重新读 Prompt、重新编译图
+    LLMClient()
+    return ChatWorkflow(None, qdrant)
+
+def singleton_setup(qdrant):
+    return ChatWorkflow.get_instance(None, qdrant)
+
+def bench(fn, qdrant, n: int):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(qdrant)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    qdrant = QdrantStore(QdrantClient(":memory:"))
+    # 预热：加载嵌入模型等一次性资源，排除冷启动干扰
+    singleton_setup(qdrant)
+
+    print(f"📊 {n} 次请求的准备开销")
+    print(f"{'mode':<20}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, fn in (("per-request", per_request_setup), ("singleton", singleton_setup)):
+        p50, p99 = bench(fn, qdrant, n)
+        print(f"{name:<20}{p50:>10.3f}{p99:>10.3f}")
@@ -0,0 +1,52 @@
+# runtime/test/bench_docling_pages.py
+# Docling 分页并行基准：整份单进程转换 vs 按页码区间拆给 N 个解析进程，校验切片结果一致
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_docling_pages.py <大PDF路径> [进程数...]
+import sys
+import time
+
+from config import Config
+from skills.doc_parser import DoclingParser
+
+def chunk_signature(chunks):
+    return [(c["content"], c["metadata"].get("is_table"), c["metadata"].get("image") is not None) for c in chunks]
+
+def warmup(_):
+    DoclingParser._get_components()
+    time.sleep(0.5)  # 让每个进程都领到一个热身任务
+
+def release(chunks):
+    for c in chunks:
+        if c["metadata"].get("image"): c["metadata"]["image"].release()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python test/bench_docling_pages.py <pdf> [进程数...]")
+        sys.exit(1)
+    pdf = sys.argv[1]
+    process_counts = [int(x) for x in sys.argv[2:]] or [2, 4, 8]
+    num_pages = DoclingParser.count_pdf_pages(pdf)
+    print(f"📄 {pdf}: {num_pages} 页，每个区间 {Config.PARSE_PAGES_PER_TASK} 页")
+
+    # 基线：当前进程内整份转换 (先热身加载模型，避免把模型加载时间算进去)
+    DoclingParser._get_components()
+    start = time.perf_counter()
+    baseline = list(DoclingParser.parse_and_chunk(pdf, "bench.pdf"))
+    serial = time.perf_counter() - start
+    print(f"{'procs':>6}{'wall s':>10}{'speedup':>9}{'chunks':>8}{'same':>6}")
+    print(f"{1:>6}{serial:>10.1f}{1.0:>9.1f}{len(baseline):>8}{'-':>6}")
+
+    for n in process_counts:
+        Config.PARSE_PROCESSES = n
+        Config.PARSE_PAGE_PARALLEL_MIN_PAGES = 1
+        DoclingParser._pool = None
+        # 进程池热身：每个进程各自加载一次模型
+        pool = DoclingParser._get_pool()
+        list(pool.map(warmup, range(n)))
+        start = time.perf_counter()
+        chunks = list(DoclingParser.parse_in_pool(pdf, "bench.pdf"))
+        wall = time.perf_counter() - start
+        same = chunk_signature(chunks) == chunk_signature(baseline)
+        print(f"{n:>6}{wall:>10.1f}{serial / wall:>9.1f}{len(chunks):>8}{str(same):>6}")
+        release(chunks)
+        pool.shutdown()
+    release(baseline)
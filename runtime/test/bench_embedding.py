@@ -0,0 +1,43 @@
+# runtime/test/bench_embedding.py
+# 向量化吞吐基准：逐条 encode vs 批量 encode_batch (batch_size = 1/16/64/256)
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_embedding.py [语料条数]
+import sys
+import time
+import random
+
+from core.llm.embedding import EmbeddingModel
+
+WORDS = ("chimera runtime qdrant nebula docling chunk vector graph entity relation "
+         "架构 检索 向量 图谱 切片 实体 关系 文档 表格 插图 流程 组件").split()
+
+def build_corpus(n: int, seed: int = 42):
+    """合成语料：长度 40~120 词的随机片段，近似 HybridChunker 的切片规模"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(40, 120))) for _ in range(n)]
+
+def bench_per_chunk(corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        EmbeddingModel.encode(text)
+    return len(corpus) / (time.perf_counter() - start)
+
+def bench_batched(corpus, batch_size: int):
+    start = time.perf_counter()
+    for i in range(0, len(corpus), batch_size):
+        EmbeddingModel.encode_batch(corpus[i:i + batch_size], batch_size=batch_size)
+    return len(corpus) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    corpus = build_corpus(n)
+
+    # 预热：加载模型并跑一次 forward，排除冷启动干扰
+    EmbeddingModel.encode_batch(corpus[:8])
+
+    print(f"📊 合成语料: {n} 条")
+    baseline = bench_per_chunk(corpus)
+    print(f"{'mode':<16}{'chunks/sec':>12}{'speedup':>10}")
+    print(f"{'per-chunk':<16}{baseline:>12.1f}{1.0:>10.2f}")
+    for bs in (1, 16, 64, 256):
+        cps = bench_batched(corpus, bs)
+        print(f"{'batch=' + str(bs):<16}{cps:>12.1f}{cps / baseline:>10.2f}")
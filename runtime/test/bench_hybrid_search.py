@@ -0,0 +1,77 @@
+# runtime/test/bench_hybrid_search.py
+# 混合检索基准 (Qdrant 本地模式 + 真实嵌入模型)：纯向量 search vs dense + BM25 RRF hybrid_search
+# 夹具语料：每条切片是同一模板下的设备故障说明，只有错误码 / 零件号 / 条款号不同 (dense 向量几乎无法区分)，
+# 另加一组自然语言问答，确认混合检索不拖累语义查询
+# 指标：Recall@1 / Recall@5 / MRR@10 与单次检索延迟中位数、P95
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_hybrid_search.py [切片数]
+import sys
+import time
+import uuid
+import statistics
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from config import Config
+from core.llm.embedding import EmbeddingModel
+from core.stores.qdrant_store import QdrantStore
+
+TOPICS = [
+    ("供电模块", "检查电源适配器输出电压并重新插拔主板供电线"),
+    ("散热风扇", "清理风扇滤网灰尘并确认转速传感器连接正常"),
+    ("网络接口", "更换网线并在管理界面重置网卡驱动"),
+    ("存储控制器", "备份数据后更新控制器固件并重建阵列"),
+]
+SEMANTIC = [
+    ("机房温度过高时应该怎么办", "机房空调失效导致温度升高时，应立即启用备用制冷并迁移高负载业务"),
+    ("如何申请访问生产数据库的权限", "访问生产数据库需提交工单，由数据负责人审批后开通只读账号"),
+    ("员工离职后账号如何处理", "员工离职当天由人事发起流程，运维在 24 小时内禁用其全部系统账号"),
+    ("数据备份保留多久", "业务数据每日增量备份，全量备份每周一次，备份文件保留五年"),
+]
+
+def build_corpus(n: int, rng):
+    docs, queries = [], []
+    for i in range(n):
+        topic, action = TOPICS[i % len(TOPICS)]
+        code, part, clause = f"E-{4000 + i}", f"PN-{rng.integers(10000, 99999)}-{i}", f"{i // 100 + 1}.{i % 100}.{i % 7}"
+        docs.append(f"设备{topic}故障：出现错误码 {code} 时，{action}。备件零件号 {part}，依据运维规范第 {clause} 条执行。")
+        if i % max(1, n // 40) == 0:
+            queries += [(f"错误码 {code} 怎么处理", i), (f"零件号 {part} 是什么备件", i), (f"规范第 {clause} 条", i)]
+    for question, answer in SEMANTIC:
+        docs.append(answer)
+        queries.append((question, len(docs) - 1))
+    return docs, queries
+
+def evaluate(name, search, queries, vectors):
+    ranks, latencies = [], []
+    for (query, expected), vector in zip(queries, vectors):
+        start = time.perf_counter()
+        hits = search(query, vector)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids = [h["metadata"]["doc_index"] for h in hits]
+        ranks.append(ids.index(expected) + 1 if expected in ids else None)
+    recall = lambda k: sum(1 for r in ranks if r and r <= k) / len(ranks)
+    mrr = sum(1.0 / r for r in ranks if r) / len(ranks)
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<10}{recall(1):>8.2f}{recall(5):>8.2f}{mrr:>8.3f}{statistics.median(latencies):>10.2f}{p95:>9.2f}")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    Config.HYBRID_SEARCH_ENABLED = True
+    rng = np.random.default_rng(42)
+    docs, queries = build_corpus(n, rng)
+
+    store = QdrantStore(QdrantClient(":memory:"))
+    vectors = EmbeddingModel.encode_batch(docs)
+    for start in range(0, len(docs), 256):
+        store.upsert_chunks([
+            {"id": str(uuid.uuid4()), "vector": np.asarray(vectors[i]).tolist(),
+             "payload": {"content": docs[i], "kb_id": 1, "doc_index": i}}
+            for i in range(start, min(start + 256, len(docs)))
+        ])
+    query_vectors = EmbeddingModel.encode_batch([q for q, _ in queries])
+
+    print(f"📊 本地模式，{len(docs)} 个切片，{len(queries)} 条查询 (其中 {len(SEMANTIC)} 条自然语言)")
+    print(f"{'mode':<10}{'R@1':>8}{'R@5':>8}{'MRR':>8}{'p50 ms':>10}{'p95 ms':>9}")
+    evaluate("dense", lambda q, v: store.search(v, [1], top_k=10), queries, query_vectors)
+    evaluate("hybrid", lambda q, v: store.hybrid_search(q, v, [1], top_k=10), queries, query_vectors)
@@ -0,0 +1,101 @@
+# runtime/test/bench_minio_stream.py
+# MinIO 下载路径基准：整份 read() + 写盘 (旧) vs 分块流式写盘 + MD5 校验 (新)
+# 用本地文件模拟 MinIO 对象 (stat_object / get_object(offset) / stream)，每种模式在独立子进程里跑，对比峰值 RSS
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_minio_stream.py [文件MB]
+import os
+import sys
+import time
+import hashlib
+import resource
+import subprocess
+from types import SimpleNamespace
+
+from core.stores.minio_store import MinioStore
+
+OBJECT_PATH = "/tmp/chimera_bench_object.pdf"
+
+def md5_file(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for part in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            md5.update(part)
+    return md5.hexdigest()
+
+class LocalObjectResponse:
+    """模拟 urllib3.HTTPResponse：read() 整份读取，stream(amt) 分块读取"""
+    def __init__(self, path, offset, etag, fail_at=None):
+        self._f = open(path, "rb")
+        self._f.seek(offset)
+        self._fail_at = fail_at
+        self.headers = {"ETag": f'"{etag}"'}
+
+    def read(self):
+        return self._f.read()
+
+    def stream(self, amt):
+        while True:
+            if self._fail_at is not None and self._f.tell() >= self._fail_at:
+                raise ConnectionResetError("模拟连接中断")
+            part = self._f.read(amt)
+            if not part:
+                return
+            yield part
+
+    def close(self):
+        self._f.close()
+
+    def release_conn(self):
+        pass
+
+class LocalMinioClient:
+    """本地 MinIO 替身：对象就是一个本地文件；可在首次请求的指定偏移处模拟断流"""
+    def __init__(self, path, fail_at=None):
+        self.path = path
+        self.fail_at = fail_at
+        self.etag = md5_file(path)
+
+    def stat_object(self, bucket, name):
+        return SimpleNamespace(size=os.path.getsize(self.path), etag=self.etag)
+
+    def get_object(self, bucket, name, offset=0, length=0):
+        fail_at, self.fail_at = self.fail_at, None
+        return LocalObjectResponse(self.path, offset, self.etag, fail_at)
+
+def make_store(fail_at=None) -> MinioStore:
+    store = MinioStore.__new__(MinioStore)
+    store.client = LocalMinioClient(OBJECT_PATH, fail_at)
+    store.bucket = "chimera-docs"
+    return store
+
+def run_mode(mode: str):
+    dest = f"/tmp/chimera_bench_dest_{mode}.pdf"
+    store = make_store(fail_at=os.path.getsize(OBJECT_PATH) // 2 if mode == "resume" else None)
+    start = time.perf_counter()
+    if mode == "old":
+        # 旧版 FileConnector.prefetch：整份读入内存再写盘
+        data = store.download_file("bench.pdf")
+        with open(dest, "wb") as f:
+            f.write(data)
+    else:
+        store.download_to_file("bench.pdf", dest)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    ok = md5_file(dest) == store.client.etag
+    os.remove(dest)
+    print(f"{mode:>8}{elapsed:>10.2f}{os.path.getsize(OBJECT_PATH) / 1024 / 1024 / elapsed:>10.0f}{peak_mb:>12.0f}{str(ok):>8}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2])
+        sys.exit(0)
+
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if not os.path.exists(OBJECT_PATH) or os.path.getsize(OBJECT_PATH) != size_mb * 1024 * 1024:
+        with open(OBJECT_PATH, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+    print(f"{'mode':>8}{'wall s':>10}{'MB/s':>10}{'peak RSS MB':>12}{'md5 ok':>8}")
+    for mode in ("old", "stream", "resume"):
+        subprocess.run([sys.executable, __file__, "--mode", mode], check=True)
+    os.remove(OBJECT_PATH)
@@ -0,0 +1,85 @@
+# runtime/test/bench_payload_index.py
+# payload 索引基准 (需要 Qdrant 服务，本地模式不支持 payload 索引)：
+# 固定总点数，知识库数量逐级增加，对比单个 kb_id 过滤检索的延迟
+#   none    : 无 payload 索引 (旧版)
+#   indexed : kb_id 等值索引 (QdrantStore.PAYLOAD_INDEXES)
+#   tenant  : kb_id 索引 + 按租户建 HNSW 子图 (QDRANT_TENANT_HNSW)
+# 另测 content_hash + kg_status 的 scroll 过滤 (ETLManager._check_kg_completed)
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_payload_index.py [点数] [知识库数...]
+# 默认连接 Config.QDRANT_HOST:QDRANT_PORT，基准集合用完即删
+import sys
+import time
+import uuid
+import hashlib
+import statistics
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from config import Config
+from core.stores.qdrant_store import QdrantStore
+
+DIM = 384
+
+def create(client, name, mode):
+    Config.QDRANT_TENANT_HNSW = mode == "tenant"
+    params = QdrantStore.collection_params(DIM)
+    params["sparse_vectors_config"] = None
+    client.create_collection(collection_name=name, **params)
+    if mode != "none":
+        for field, schema in QdrantStore.PAYLOAD_INDEXES.items():
+            client.create_payload_index(collection_name=name, field_name=field, field_schema=schema, wait=True)
+
+def load(client, name, n, num_kbs, rng):
+    for start in range(0, n, 1000):
+        size = min(1000, n - start)
+        vectors = rng.random((size, DIM), dtype=np.float32)
+        client.upsert(collection_name=name, wait=True, points=[
+            models.PointStruct(id=str(uuid.uuid4()), vector=vectors[i].tolist(), payload={
+                "kb_id": (start + i) % num_kbs, "source_id": (start + i) % (num_kbs * 3),
+                "content_hash": hashlib.md5(str(start + i).encode()).hexdigest(),
+                "kg_status": "completed" if i % 2 else "pending"})
+            for i in range(size)
+        ])
+    # 等待后台建图 / 建索引完成，只测稳态检索
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+def percentile(samples, p):
+    return sorted(samples)[max(0, int(len(samples) * p) - 1)]
+
+def bench(client, name, num_kbs, rng, repeat=50):
+    search_ms, scroll_ms = [], []
+    for i in range(repeat):
+        kb_filter = models.Filter(must=[models.FieldCondition(key="kb_id", match=models.MatchAny(any=[i % num_kbs]))])
+        start = time.perf_counter()
+        client.query_points(collection_name=name, query=rng.random(DIM).tolist(), query_filter=kb_filter, limit=25)
+        search_ms.append((time.perf_counter() - start) * 1000)
+
+        hash_filter = models.Filter(must=[
+            models.FieldCondition(key="content_hash", match=models.MatchValue(value=hashlib.md5(str(i).encode()).hexdigest())),
+            models.FieldCondition(key="kg_status", match=models.MatchValue(value="completed"))])
+        start = time.perf_counter()
+        client.scroll(collection_name=name, scroll_filter=hash_filter, limit=1)
+        scroll_ms.append((time.perf_counter() - start) * 1000)
+    return statistics.median(search_ms), percentile(search_ms, 0.95), statistics.median(scroll_ms)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    kb_counts = [int(x) for x in sys.argv[2:]] or [1, 10, 100, 1000]
+    client = QdrantClient(host=Config.QDRANT_HOST, port=Config.QDRANT_PORT)
+    rng = np.random.default_rng(42)
+
+    print(f"📊 {n} 个点，kb_id 过滤检索 top25 / content_hash+kg_status scroll")
+    print(f"{'KBs':>6}{'mode':>9}{'search p50':>12}{'search p95':>12}{'scroll p50':>12}")
+    for num_kbs in kb_counts:
+        for mode in ("none", "indexed", "tenant"):
+            name = f"bench_payload_{mode}_{num_kbs}"
+            try:
+                create(client, name, mode)
+                load(client, name, n, num_kbs, rng)
+                p50, p95, scroll = bench(client, name, num_kbs, rng)
+                print(f"{num_kbs:>6}{mode:>9}{p50:>10.2f}ms{p95:>10.2f}ms{scroll:>10.2f}ms")
+            finally:
+                client.delete_collection(collection_name=name)
@@ -0,0 +1,93 @@
+# runtime/test/bench_qdrant.py
+# QdrantStore 延迟基准 (Qdrant 本地模式，无需启动服务):
+#   1. 逐条 set_payload vs 单次 set_payload_bulk
+#   2. 同步串行检索 vs AsyncQdrantStore 并发检索
+# 设置 QDRANT_BENCH_URL=http://127.0.0.1:26333 时，额外对比 REST 检索 requests.post vs 连接池 Session
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_qdrant.py [点数]
+import os
+import sys
+import time
+import uuid
+import asyncio
+import statistics
+import numpy as np
+import requests
+from qdrant_client import QdrantClient, AsyncQdrantClient
+
+from core.stores.qdrant_store import QdrantStore
+from core.stores.async_qdrant_store import AsyncQdrantStore
+
+DIM = 384
+
+def make_points(n: int, rng):
+    vectors = rng.random((n, DIM), dtype=np.float32)
+    return [
+        {"id": str(uuid.uuid4()), "vector": vectors[i].tolist(),
+         "payload": {"content": f"chunk-{i}", "kb_id": i % 4, "kg_status": "pending"}}
+        for i in range(n)
+    ]
+
+def timed(fn, repeat: int = 1):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def bench_payload(store: QdrantStore, ids):
+    def per_id():
+        for pid in ids:
+            store.client.set_payload(store.collection_name, {"kg_status": "completed"}, [pid], wait=True)
+    def bulk():
+        store.set_payload_bulk(ids, {"kg_status": "completed"}, wait=True)
+    print(f"{'set_payload x' + str(len(ids)):<28}{timed(per_id, 3):>10.2f} ms")
+    print(f"{'set_payload_bulk':<28}{timed(bulk, 3):>10.2f} ms")
+
+def bench_search(store: QdrantStore, queries):
+    def serial():
+        for q in queries:
+            store.search(q, kb_ids=[0, 1], top_k=25)
+    print(f"{'search serial x' + str(len(queries)):<28}{timed(serial, 3):>10.2f} ms")
+
+async def bench_async_search(points, queries):
+    store = AsyncQdrantStore(AsyncQdrantClient(":memory:"))
+    await store.ensure_collection()
+    await store.upsert_chunks(points)
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        await asyncio.gather(*[store.search(q, kb_ids=[0, 1], top_k=25) for q in queries])
+        samples.append((time.perf_counter() - start) * 1000)
+    await store.close()
+    print(f"{'search async gather x' + str(len(queries)):<28}{statistics.median(samples):>10.2f} ms")
+
+def bench_rest_pool(url: str, queries):
+    body = lambda q: {"vector": q.tolist(), "limit": 25, "with_payload": True}
+    endpoint = f"{url}/collections/chimera_docs/points/search"
+    def no_pool():
+        for q in queries:
+            requests.post(endpoint, json=body(q), timeout=5)
+    session = requests.Session()
+    def pooled():
+        for q in queries:
+            session.post(endpoint, json=body(q), timeout=5)
+    print(f"{'REST requests.post':<28}{timed(no_pool, 3):>10.2f} ms")
+    print(f"{'REST pooled Session':<28}{timed(pooled, 3):>10.2f} ms")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = np.random.default_rng(42)
+    points = make_points(n, rng)
+    queries = [rng.random(DIM, dtype=np.float32) for _ in range(32)]
+
+    store = QdrantStore(QdrantClient(":memory:"))
+    store.upsert_chunks(points)
+
+    print(f"📊 本地模式，{n} 个点")
+    bench_payload(store, [p["id"] for p in points[:200]])
+    bench_search(store, queries)
+    asyncio.run(bench_async_search(points, queries))
+
+    if os.getenv("QDRANT_BENCH_URL"):
+        bench_rest_pool(os.getenv("QDRANT_BENCH_URL"), queries)
@@ -0,0 +1,61 @@
+# runtime/test/bench_skyline.py
+# Skyline 过滤基准：原 O(n²) 字典实现 vs NumPy 向量化 pareto_mask (n = 25 / 500 / 5000)
+# 同时校验两者输出完全一致
+# 用法 (在 runtime 目录下): PYTHONPATH=. python test/bench_skyline.py
+import copy
+import time
+import random
+
+from skills.reranker import CognitiveReranker
+
+def legacy_skyline_filter(vector_results, graph_scores, top_k=5):
+    """重构前的实现 (逐对 _is_dominated)，作为正确性与性能对照"""
+    candidates = []
+    max_v = max([hit.get('score', 0.1) for hit in vector_results]) or 1.0
+    max_g = max(graph_scores.values()) if graph_scores else 1.0
+    for hit in vector_results:
+        cid = str(hit.get('metadata', {}).get('chunk_id') or hit.get('id'))
+        level = hit.get('metadata', {}).get('level', 0)
+        candidates.append({"raw": hit, "metrics": {
+            "vector": hit.get('score', 0.0) / max_v,
+            "graph": graph_scores.get(cid, 0.0) / max_g,
+            "hierarchy": min(level / 5.0, 1.0)
+        }})
+    skyline = [c for c in candidates if not CognitiveReranker._is_dominated(c, candidates)]
+    for s in skyline:
+        m = s['metrics']
+        s['combined'] = m['vector'] * 0.4 + m['graph'] * 0.4 + m['hierarchy'] * 0.2
+    skyline.sort(key=lambda x: x['combined'], reverse=True)
+    final_results = [s['raw'] for s in skyline[:top_k]]
+    if len(final_results) < top_k:
+        existing_ids = {str(r.get('id')) for r in final_results}
+        vector_results.sort(key=lambda x: x.get('score', 0), reverse=True)
+        for v in vector_results:
+            if len(final_results) >= top_k: break
+            if str(v.get('id')) not in existing_ids:
+                final_results.append(v)
+    return final_results
+
+def make_candidates(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    hits = [{"id": f"c{i}", "score": round(rng.random(), 3),
+             "metadata": {"level": rng.randint(0, 5)}} for i in range(n)]
+    graph = {f"c{i}": round(rng.random(), 2) for i in range(n) if rng.random() < 0.4}
+    return hits, graph
+
+def timed(fn, hits, graph, repeat: int):
+    # skyline_filter 的兜底逻辑会原地排序 vector_results，每轮使用独立副本 (拷贝不计入耗时)
+    inputs = [copy.deepcopy(hits) for _ in range(repeat)]
+    start = time.perf_counter()
+    for h in inputs:
+        out = fn(h, graph, top_k=7)
+    return (time.perf_counter() - start) * 1000 / repeat, out
+
+if __name__ == "__main__":
+    print(f"{'n':>6}{'legacy ms':>14}{'numpy ms':>12}{'speedup':>10}{'identical':>11}")
+    for n, repeat in ((25, 200), (500, 5), (5000, 1)):
+        hits, graph = make_candidates(n)
+        legacy_ms, legacy_out = timed(legacy_skyline_filter, hits, graph, repeat)
+        new_ms, new_out = timed(CognitiveReranker.skyline_filter, hits, graph, repeat)
+        same = [h["id"] for h in legacy_out] == [h["id"] for h in new_out]
+        print(f"{n:>6}{legacy_ms:>14.3f}{new_ms:>12.3f}{legacy_ms / new_ms:>10.1f}{str(same):>11}")
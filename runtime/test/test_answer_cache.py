@@ -0,0 +1,77 @@
+# runtime/test/test_answer_cache.py
+# 语义答案缓存测试：相似度阈值命中 / kb_ids 指纹与顺序无关 / TTL 过期 / 重新同步失效 / 生成期间同步不入缓存 / 多进程共享文件
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_answer_cache.py
+import time
+
+import numpy as np
+import pytest
+
+from config import Config
+from core.stores.answer_cache import SemanticAnswerCache
+
+EVENTS = [
+    {"type": "reference", "payload": "[{\"content\": \"检查主板供电模块\"}]"},
+    {"type": "delta", "payload": "请检查"},
+    {"type": "delta", "payload": "主板供电。"},
+]
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticAnswerCache(str(tmp_path / "answers.db"), threshold=0.95, ttl_seconds=3600, max_entries=3)
+
+def unit(seed, dim=384):
+    return np.random.default_rng(seed).standard_normal(dim)
+
+def test_hit_above_threshold_only(cache):
+    q = unit(1)
+    assert cache.put([1, 2], "E-4012 怎么处理", q, EVENTS, cache.epochs([1, 2]))
+
+    # 近似问题 (小扰动) 命中，kb_ids 顺序与重复无关
+    events, score = cache.lookup([2, 1, 1], q + 0.05 * unit(2))
+    assert events == EVENTS and score >= 0.95
+    # 无关问题 / 不同知识库集合均不命中
+    assert cache.lookup([1, 2], unit(3)) is None
+    assert cache.lookup([1], q) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+def test_ttl_and_max_entries(cache, monkeypatch):
+    for seed in range(5):
+        cache.put([1], f"q{seed}", unit(seed), EVENTS, {})
+    # 每个 kb_ids 集合只保留最新 3 条
+    assert cache.lookup([1], unit(0)) is None
+    assert cache.lookup([1], unit(4)) is not None
+
+    later = time.time() + 3601
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.lookup([1], unit(4)) is None
+
+def test_resync_invalidates_every_set_containing_kb(cache):
+    cache.put([1], "a", unit(1), EVENTS, cache.epochs([1]))
+    cache.put([1, 2], "b", unit(2), EVENTS, cache.epochs([1, 2]))
+    cache.put([11], "c", unit(3), EVENTS, cache.epochs([11]))
+
+    assert cache.invalidate(1) == 2
+    assert cache.lookup([1], unit(1)) is None and cache.lookup([1, 2], unit(2)) is None
+    # kb 11 不受 kb 1 失效影响
+    assert cache.lookup([11], unit(3)) is not None
+
+def test_answer_generated_across_resync_is_not_stored(cache):
+    epochs = cache.epochs([1, 2])
+    cache.invalidate(2)
+    assert not cache.put([1, 2], "a", unit(1), EVENTS, epochs)
+    assert cache.lookup([1, 2], unit(1)) is None
+    assert cache.put([1, 2], "a", unit(1), EVENTS, cache.epochs([1, 2]))
+
+def test_invalidation_visible_to_other_process_handles(tmp_path):
+    path = str(tmp_path / "answers.db")
+    runtime = SemanticAnswerCache(path, threshold=0.95, ttl_seconds=3600, max_entries=10)
+    worker = SemanticAnswerCache(path, threshold=0.95, ttl_seconds=3600, max_entries=10)
+    runtime.put([7], "a", unit(1), EVENTS, runtime.epochs([7]))
+    worker.invalidate(7)
+    assert runtime.lookup([7], unit(1)) is None
+
+def test_disabled_cache_is_noop(monkeypatch):
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(SemanticAnswerCache, "_instance", None)
+    assert SemanticAnswerCache.get_instance() is None
+    SemanticAnswerCache.invalidate_kb(1)
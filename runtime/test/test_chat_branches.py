@@ -0,0 +1,69 @@
+# runtime/test/test_chat_branches.py
+# 检索支路并发测试：超时从支路开始执行算起 / 排队超时直接取消 / 运行中超时计入放弃数 / 异常降级 / 请求取消不再等待
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_chat_branches.py
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import workflows.chat_flow as chat_flow
+from core.cancellation import CancelToken
+from workflows.chat_flow import ChatWorkflow
+
+@pytest.fixture
+def release():
+    # 阻塞支路等待的事件：测试结束时总会放行，线程池才能正常关闭
+    event = threading.Event()
+    yield event
+    event.set()
+
+@pytest.fixture
+def pool(monkeypatch, release):
+    # 单线程池：先提交的阻塞任务使后续支路排队
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(chat_flow, "_RETRIEVAL_POOL", executor)
+    yield executor
+    release.set()
+    executor.shutdown(wait=True)
+
+def statuses(timings):
+    return {t["branch"]: t["status"] for t in timings}
+
+def test_timeout_counts_from_branch_start(pool):
+    pool.submit(time.sleep, 0.15)   # 其他请求占住线程
+    branches = {"vector": (lambda: time.sleep(0.1) or ["hit"], [])}
+    results, timings = ChatWorkflow._run_branches(branches, timeout_s=0.2)
+    # 排队 0.15s + 执行 0.1s 超过 0.2s，但执行本身没有超时
+    assert results == {"vector": ["hit"]} and statuses(timings) == {"vector": "ok"}
+
+def test_branch_still_queued_is_cancelled(pool, release):
+    pool.submit(release.wait)
+    ran = []
+    start = time.perf_counter()
+    results, timings = ChatWorkflow._run_branches({"graph_scores": (lambda: ran.append(1), {})}, timeout_s=0.1)
+    release.set()
+    pool.shutdown(wait=True)
+    assert time.perf_counter() - start < 1.0
+    assert results == {"graph_scores": {}} and statuses(timings) == {"graph_scores": "queued_timeout"}
+    assert ran == []
+
+def test_running_branch_timeout_is_tracked_until_it_returns(monkeypatch, release):
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(chat_flow, "_RETRIEVAL_POOL", pool)
+    branches = {"subgraph": (lambda: release.wait(), {"nodes": [], "edges": []}),
+                "graph_context": (lambda: 1 / 0, [])}
+    results, timings = ChatWorkflow._run_branches(branches, timeout_s=0.1)
+    assert results == {"subgraph": {"nodes": [], "edges": []}, "graph_context": []}
+    assert statuses(timings) == {"subgraph": "timeout", "graph_context": "error"}
+    assert chat_flow._abandoned["running"] == 1
+    release.set()
+    pool.shutdown(wait=True)
+    assert chat_flow._abandoned["running"] == 0
+
+def test_cancelled_request_stops_waiting(pool, release):
+    token = CancelToken()
+    threading.Timer(0.05, token.cancel).start()
+    start = time.perf_counter()
+    results, _ = ChatWorkflow._run_branches({"vector": (lambda: release.wait(), [])}, timeout_s=5.0, cancel_token=token)
+    assert time.perf_counter() - start < 1.0 and results == {"vector": []}
@@ -0,0 +1,120 @@
+# runtime/test/test_doc_parser.py
+# DoclingParser 测试：切片页码取自 doc_items 的 prov / 同步进度的页数统计 / 分页并行与整份转换切片一致 / 自适应 OCR 分段
+# 合成 PDF 只有原生文本层，不触发 OCR；首次运行会下载 Docling 版面模型
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_doc_parser.py
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from core.connectors.base import DocumentChunk
+from core.managers.etl_manager import SyncTracker
+import skills.doc_parser as doc_parser
+from skills.doc_parser import DoclingParser
+
+def fake_chunk(*pages):
+    items = [SimpleNamespace(prov=[SimpleNamespace(page_no=p)] if p else []) for p in pages]
+    return SimpleNamespace(meta=SimpleNamespace(doc_items=items))
+
+def test_page_number_from_prov():
+    assert DoclingParser._page_number(fake_chunk(3)) == 3
+    # 跨页切片记为结束页；没有 prov 的 item 忽略
+    assert DoclingParser._page_number(fake_chunk(4, None, 5)) == 5
+    assert DoclingParser._page_number(fake_chunk()) == 1
+    assert DoclingParser._page_number(fake_chunk(None)) == 1
+
+def test_sync_tracker_reports_max_page():
+    tracker = SyncTracker(SimpleNamespace(throughput=0.0))
+    for page in (1, 7, 3):
+        tracker.observe_chunk(DocumentChunk(content="x", metadata={"page_number": page}))
+    assert tracker.frame("processing")["pages"] == 7
+
+def make_pdf(pages, path):
+    """
+    生成最小 PDF：pages 中每项是一页的文本行列表 (写入原生文本层)，None 表示只有图形、没有文本层的页 (需 OCR)
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        if lines is None:
+            stream = "0.2 0.2 0.2 rg 72 300 468 400 re f"
+        else:
+            ops = [f"({line}) Tj T*" for line in lines]
+            stream = "BT /F1 12 Tf 16 TL 72 720 Td " + " ".join(ops) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = b"%PDF-1.4\n", []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+    return str(path)
+
+def section(page):
+    # 每页一个标题 + 两段完整的段落 (段落不跨页)
+    return [f"Section {page}. Maintenance notes",
+            f"Paragraph A of page {page}: check the power module before replacing the main board.",
+            f"Paragraph B of page {page}: record the error code E-{4000 + page} in the service log."]
+
+def test_page_parallel_chunks_match_whole_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PARSE_PROFILE", "fast")
+    pdf = make_pdf([section(p) for p in range(1, 7)], tmp_path / "manual.pdf")
+
+    whole = list(DoclingParser.parse_and_chunk(pdf, "manual.pdf"))
+    # 与 _parse_pages_in_pool 相同的拆分与合并，在当前进程内执行
+    parts = [DoclingParser.convert_pages(pdf, "manual.pdf", page_range, do_ocr=False)
+             for page_range in DoclingParser.page_ranges(6, 2)]
+    split = list(DoclingParser.merge_and_chunk(parts, "manual.pdf"))
+
+    assert whole
+    assert [c["content"] for c in split] == [c["content"] for c in whole]
+    assert [c["metadata"]["page_number"] for c in split] == [c["metadata"]["page_number"] for c in whole]
+
+def test_merge_failure_raises():
+    with pytest.raises(RuntimeError):
+        list(DoclingParser.merge_and_chunk([{"not": "a document"}, {}], "broken.pdf"))
+
+def test_ocr_plan_merges_runs_of_text_and_scanned_pages(tmp_path):
+    # 第 3 页只有一行短文本 (少于 OCR_MIN_TEXT_CHARS)，视同扫描页
+    pages = [section(1), section(2), ["p.3"], None, section(5), None]
+    pdf = make_pdf(pages, tmp_path / "mixed.pdf")
+    expected = [((1, 2), False), ((3, 4), True), ((5, 5), False), ((6, 6), True)]
+
+    assert DoclingParser.ocr_plan(pdf, "balanced") == expected
+    with open(pdf, "rb") as f:
+        assert DoclingParser.ocr_plan(f.read(), "fast") == expected
+    # always 档位整份 OCR；非 PDF 返回空计划
+    assert DoclingParser.ocr_plan(pdf, "accurate") == [((1, 6), True)]
+    assert DoclingParser.ocr_plan(b"not a pdf", "balanced") == []
+
+def test_convert_document_converts_each_run_in_page_order(tmp_path, monkeypatch):
+    pdf = make_pdf([section(1), None, None, section(4)], tmp_path / "mixed.pdf")
+    calls = []
+
+    class FakeConverter:
+        def __init__(self, do_ocr):
+            self.do_ocr = do_ocr
+        def convert(self, source, page_range=None):
+            calls.append((page_range, self.do_ocr))
+            return SimpleNamespace(document=page_range)
+
+    class FakeDocument:
+        @staticmethod
+        def concatenate(docs):
+            return list(docs)
+
+    monkeypatch.setattr(DoclingParser, "_get_converter", classmethod(lambda cls, profile, do_ocr: FakeConverter(do_ocr)))
+    monkeypatch.setattr(doc_parser, "DoclingDocument", FakeDocument)
+
+    document, stats = DoclingParser.convert_document(pdf, "mixed.pdf", "balanced")
+    assert calls == [((1, 1), False), ((2, 3), True), ((4, 4), False)]
+    assert document == [(1, 1), (2, 3), (4, 4)]
+    assert (stats["pages"], stats["ocr_pages"]) == (4, 2)
@@ -0,0 +1,98 @@
+# runtime/test/test_etl_pipeline.py
+# StagePipeline 行为测试：数据流转 / flush 排空 / 有界队列背压 / 错误与取消传播
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_etl_pipeline.py
+import time
+import threading
+
+from core.cancellation import CancelToken, OperationCancelled
+from core.managers.etl_pipeline import PipelineStage, StagePipeline
+
+def run(pipeline: StagePipeline):
+    pipeline.start()
+    try:
+        while not pipeline.wait(timeout=0.05):
+            pass
+    finally:
+        pipeline.stop()
+
+def test_items_flow_through_and_flush_drains_batches():
+    batch, out = [], []
+
+    def batcher(x, emit):
+        batch.append(x)
+        if len(batch) == 4:
+            emit(batch[:]); batch.clear()
+
+    def batch_flush(emit):
+        if batch:
+            emit(batch[:]); batch.clear()
+
+    stages = [
+        PipelineStage("parse", source=range(10)),
+        PipelineStage("double", lambda x, emit: emit(x * 2), workers=3),
+        PipelineStage("batch", batcher, flush=batch_flush),
+        PipelineStage("sink", lambda b, emit: out.append(b)),
+    ]
+    p = StagePipeline(stages, queue_size=2)
+    run(p)
+    assert sorted(x for b in out for x in b) == [x * 2 for x in range(10)]
+    assert [len(b) for b in out] == [4, 4, 2]
+    assert p.report()["double"]["items"] == 10
+
+def test_bounded_queue_applies_backpressure():
+    produced = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    gate = threading.Event()
+    stages = [PipelineStage("parse", source=source()),
+              PipelineStage("slow", lambda x, emit: gate.wait())]
+    p = StagePipeline(stages, queue_size=3).start()
+    time.sleep(0.3)
+    # 下游阻塞时，上游最多领先 队列长度 + 在途 个元素
+    assert len(produced) <= 3 + 2
+    gate.set()
+    while not p.wait(timeout=0.05):
+        pass
+    p.stop()
+    assert len(produced) == 20
+
+def test_stage_error_propagates():
+    def boom(x, emit):
+        if x == 3:
+            raise ValueError("bad chunk")
+        emit(x)
+
+    p = StagePipeline([PipelineStage("parse", source=range(100)),
+                       PipelineStage("boom", boom),
+                       PipelineStage("sink", lambda x, emit: None)])
+    try:
+        run(p)
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "bad chunk" in str(e)
+
+def test_cancel_token_stops_pipeline():
+    token = CancelToken()
+    closed = []
+
+    def source():
+        try:
+            for i in range(10_000):
+                time.sleep(0.001)
+                yield i
+        finally:
+            closed.append(True)
+
+    p = StagePipeline([PipelineStage("parse", source=source()),
+                       PipelineStage("sink", lambda x, emit: None)], cancel_token=token)
+    threading.Timer(0.05, token.cancel).start()
+    try:
+        run(p)
+        assert False, "expected OperationCancelled"
+    except OperationCancelled:
+        pass
+    assert closed == [True]
@@ -0,0 +1,106 @@
+# runtime/test/test_etl_sync.py
+# ETLManager 增量同步测试：重复同步同一数据源不重复抽取图谱 / kg_status 不被覆盖写回 pending / 差异统计 / 多 enrich worker 时领域识别仍取首个切片
+# Qdrant 本地模式 + 假的 LLM 智能体与图存储，无需外部服务
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_etl_sync.py
+import json
+import hashlib
+
+import pytest
+from qdrant_client import QdrantClient
+
+from config import Config
+from core.connectors.base import BaseConnector, DocumentChunk, ConnectorFactory
+from core.managers.kg_registry import KGRegistry
+from core.managers.etl_manager import ETLManager
+from core.stores.qdrant_store import QdrantStore
+
+TEXTS = [f"第 {i} 段：组件 A{i} 调用服务 B{i % 3}。" for i in range(6)]
+
+class TextConnector(BaseConnector):
+    def load(self):
+        for text in self.config["texts"]:
+            yield DocumentChunk(content=text, metadata={"content_hash": hashlib.md5(text.encode()).hexdigest(),
+                                                       "page_number": 1})
+
+class CountingExtractor:
+    def __init__(self):
+        self.chunks = 0
+        self.domains = set()
+    def run_batch(self, items, domain="general"):
+        self.chunks += len(items)
+        self.domains.add(domain)
+        return {"results": [{"entities": [{"name": "A"}], "relations": []} for _ in items]}
+
+class RecordingClassifier:
+    def __init__(self):
+        self.seen = []
+    def run(self, file_name, content):
+        self.seen.append(content)
+        return {"domain": "it_ops"}
+
+class PassInspector:
+    def run(self, text, res):
+        return res
+
+class PassResolver:
+    def run(self, entities, relations, global_ref=None):
+        return {"metrics": {"total_extracted": len(entities), "linked_count": 0}}
+
+class FakeNebula:
+    es_store = None
+    def __init__(self):
+        self.upserts = 0
+    def upsert_graph(self, res, chunk_id):
+        self.upserts += 1
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(Config, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "KG_BATCH_SIZE", 2)
+    extractor = CountingExtractor()
+    agents = {"extractor": extractor, "inspector": PassInspector(), "resolution": PassResolver()}
+    monkeypatch.setattr(KGRegistry, "_get_storage", classmethod(lambda cls: agents))
+    ConnectorFactory.register("test_text", TextConnector)
+    mgr = ETLManager(QdrantStore(QdrantClient(":memory:")), FakeNebula())
+    assert mgr.use_kg
+    return mgr, extractor
+
+def sync(mgr, mode, texts=TEXTS):
+    return list(mgr.sync_datasource(1, 7, "test_text", json.dumps({"texts": texts, "sync_mode": mode})))[-1]
+
+def kg_statuses(mgr):
+    return {p["kg_status"] for p in mgr.qdrant.scroll_source_points(1, 7).values()}
+
+def test_resync_does_not_repeat_kg_extraction(manager):
+    mgr, extractor = manager
+    first = sync(mgr, "incremental")
+    assert first["added"] == len(TEXTS) and extractor.chunks == len(TEXTS)
+    assert kg_statuses(mgr) == {"completed"}
+
+    # 全量重建会覆盖写入同 ID 的 point：已入图的切片必须保持 completed
+    full = sync(mgr, "full")
+    assert full["unchanged"] == len(TEXTS) and extractor.chunks == len(TEXTS)
+    assert kg_statuses(mgr) == {"completed"}
+
+    # 之后的增量同步不应再为未变切片调用 LLM
+    sync(mgr, "incremental")
+    assert extractor.chunks == len(TEXTS) and mgr.nebula.upserts == len(TEXTS)
+
+def test_incremental_resync_only_extracts_new_chunks(manager):
+    mgr, extractor = manager
+    sync(mgr, "incremental")
+    stats = sync(mgr, "incremental", TEXTS[1:] + ["新增段落：组件 Z 调用服务 Y。"])
+    assert (stats["added"], stats["unchanged"], stats["removed"]) == (1, len(TEXTS) - 1, 1)
+    assert extractor.chunks == len(TEXTS) + 1
+
+def test_domain_classified_from_first_chunk_with_parallel_enrich(manager, monkeypatch):
+    mgr, extractor = manager
+    monkeypatch.setattr(Config, "PIPELINE_ENRICH_WORKERS", 4)
+    classifier = RecordingClassifier()
+    KGRegistry._get_storage()["classifier"] = classifier
+    sync(mgr, "full")
+    assert classifier.seen == [TEXTS[0]]
+    assert extractor.domains == {"it_ops"}
+    points, _ = mgr.qdrant.client.scroll(mgr.qdrant.collection_name, limit=100, with_payload=["domain"])
+    assert {p.payload["domain"] for p in points} == {"it_ops"}
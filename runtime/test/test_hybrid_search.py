@@ -0,0 +1,103 @@
+# runtime/test/test_hybrid_search.py
+# 混合检索测试：BM25 分词与编码 / 入库写入稀疏向量 / RRF 融合召回精确匹配 / 旧集合退化为纯向量检索
+# Qdrant 本地模式，无需启动服务
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_hybrid_search.py
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from config import Config
+from core.llm.sparse_encoder import BM25Encoder
+from core.stores.qdrant_store import QdrantStore
+
+DOCS = [
+    "设备启动时若出现错误码 E-4012，请检查主板供电模块",
+    "零件号 GB/T-1804 适用于一般公差的线性尺寸",
+    "第 3.2.1 条规定了数据保留期限为五年",
+    "系统架构由网关、调度器和存储层组成",
+    "日常巡检应记录机房温度与湿度",
+]
+
+@pytest.fixture(autouse=True)
+def hybrid_on(monkeypatch):
+    monkeypatch.setattr(Config, "HYBRID_SEARCH_ENABLED", True)
+
+def load(store, rng):
+    store.upsert_chunks([
+        {"id": str(uuid.uuid4()), "vector": rng.random(store.vector_size).tolist(),
+         "payload": {"content": text, "kb_id": 1 if i < 4 else 2}}
+        for i, text in enumerate(DOCS)
+    ])
+
+def test_tokenizer_keeps_codes_and_cjk_bigrams():
+    tokens = BM25Encoder.tokenize("错误码 E-4012 见 GB/T-1804")
+    assert {"e-4012", "e", "4012", "gb/t-1804", "1804"} <= set(tokens)
+    assert {"错误", "误码", "见"} <= set(tokens)
+
+def test_document_weights_saturate():
+    indices, values = BM25Encoder.encode_document("e-4012 " * 50)
+    weights = dict(zip(indices, values))
+    assert max(weights.values()) < Config.BM25_K1 + 1
+    assert BM25Encoder.encode_query("E-4012 E-4012")[1] == [1.0] * 3
+    assert BM25Encoder.encode_document("") == ([], [])
+
+def test_exact_codes_rank_first_with_uninformative_dense_vectors():
+    rng = np.random.default_rng(7)
+    store = QdrantStore(QdrantClient(":memory:"))
+    assert store.sparse_enabled
+    load(store, rng)
+
+    for query, expected in [("E-4012 怎么处理", DOCS[0]), ("GB/T-1804", DOCS[1]), ("3.2.1 条", DOCS[2])]:
+        hits = store.hybrid_search(query, rng.random(store.vector_size), kb_ids=[1], top_k=3)
+        assert hits[0]["content"] == expected
+        assert all(h["metadata"]["kb_id"] == 1 for h in hits)
+
+def test_falls_back_to_dense_without_sparse_vectors():
+    client = QdrantClient(":memory:")
+    client.create_collection("chimera_docs", vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE))
+    store = QdrantStore(client)
+    assert not store.sparse_enabled
+    rng = np.random.default_rng(7)
+    load(store, rng)
+    hits = store.hybrid_search("E-4012", rng.random(store.vector_size), kb_ids=[1, 2], top_k=5)
+    assert len(hits) == 5 and all(0.0 <= h["score"] <= 1.0 for h in hits)
+
+def test_search_batch_one_round_trip_dedup_by_chunk_id():
+    rng = np.random.default_rng(11)
+    store = QdrantStore(QdrantClient(":memory:"))
+    load(store, rng)
+    calls = []
+    real = store.client.query_batch_points
+    store.client.query_batch_points = lambda **kw: calls.append(kw) or real(**kw)
+
+    queries = ["设备故障怎么排查", "E-4012", "GB/T-1804", "E-4012"]
+    hits = store.search_batch(queries, kb_ids=[1], top_k=3,
+                              query_vectors=[rng.random(store.vector_size) for _ in queries])
+
+    # 重复的查询只检索一次，三路查询一次往返
+    assert len(calls) == 1 and len(calls[0]["requests"]) == 3
+    contents = [h["content"] for h in hits]
+    assert DOCS[0] in contents and DOCS[1] in contents
+    assert len({h["id"] for h in hits}) == len(hits) <= 9
+    assert all(h["hit_count"] >= 1 for h in hits) and sum(h["hit_count"] for h in hits) == 9
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+
+def test_merge_results_fuses_by_rank_not_raw_score():
+    k = QdrantStore.MERGE_RRF_K
+    a = [{"id": "1", "score": 0.2, "content": "x"}, {"id": "2", "score": 0.9, "content": "y"}]
+    b = [{"id": "1", "score": 0.7, "content": "x"}]
+    merged = QdrantStore.merge_results([a, b])
+    assert [(h["id"], h["hit_count"]) for h in merged] == [("1", 2), ("2", 1)]
+    assert merged[0]["score"] == 1 / (k + 2) + 1 / (k + 1) and merged[1]["score"] == 1 / (k + 1)
+
+def test_merge_results_dense_only_query_does_not_outrank_hybrid_hits():
+    # 混合检索返回 RRF 融合分 (~0.03)，无 BM25 词元的查询返回余弦分 (~0.8)：按原始分合并时后者全部排在前面
+    hybrid = [{"id": "h1", "score": 0.033, "content": "a"}, {"id": "h2", "score": 0.016, "content": "b"}]
+    dense_only = [{"id": "d1", "score": 0.85, "content": "c"}, {"id": "d2", "score": 0.80, "content": "d"}]
+    merged = QdrantStore.merge_results([hybrid, dense_only])
+    assert [h["id"] for h in merged][:2] in (["h1", "d1"], ["d1", "h1"])
+    assert merged[0]["score"] == merged[1]["score"]
+    assert {h["id"] for h in merged[2:]} == {"h2", "d2"}
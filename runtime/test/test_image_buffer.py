@@ -0,0 +1,57 @@
+# runtime/test/test_image_buffer.py
+# ImageHandle 行为测试：无损往返 / 内存预算与溢写 / 显式释放 / 跨进程序列化
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_image_buffer.py
+import os
+import pickle
+
+import pytest
+from PIL import Image
+
+from config import Config
+from core.stores.image_buffer import ImageHandle
+
+@pytest.fixture(autouse=True)
+def isolated_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "IMAGE_SPILL_DIR", str(tmp_path / "spill"))
+    ImageHandle.reset_budget()
+    yield
+    ImageHandle.reset_budget()
+
+def gradient(w, h):
+    img = Image.new("RGB", (w, h))
+    img.putdata([(x % 256, y % 256, (x * y) % 256) for y in range(h) for x in range(w)])
+    return img
+
+def test_pixels_round_trip_losslessly():
+    img = gradient(64, 32)
+    handle = ImageHandle.from_pil(img)
+    assert handle.in_memory
+    assert handle.open().tobytes() == img.tobytes()
+    assert ImageHandle.memory_in_use() == 64 * 32 * 3
+
+def test_spills_to_disk_above_budget(monkeypatch):
+    monkeypatch.setattr(Config, "IMAGE_MEMORY_BUDGET_MB", 1)
+    first = ImageHandle.from_pil(gradient(500, 500))   # 750KB，在预算内
+    second = ImageHandle.from_pil(gradient(500, 500))  # 超出 1MB，溢写
+    assert first.in_memory and not second.in_memory
+    assert len(os.listdir(Config.IMAGE_SPILL_DIR)) == 1
+    assert second.open().tobytes() == gradient(500, 500).tobytes()
+
+    # 释放后归还预算、删除溢写文件；重复释放无副作用
+    first.release(); second.release(); second.release()
+    assert ImageHandle.memory_in_use() == 0
+    assert os.listdir(Config.IMAGE_SPILL_DIR) == []
+    with pytest.raises(ValueError):
+        first.open()
+
+def test_pickle_transfers_budget_to_receiver():
+    img = gradient(40, 40)
+    payload = pickle.dumps([{"content": "表格", "metadata": {"image": ImageHandle.from_pil(img)}}])
+    # 模拟解析子进程：结果序列化后开始下一个任务
+    ImageHandle.reset_budget()
+    chunks = pickle.loads(payload)
+    handle = chunks[0]["metadata"]["image"]
+    assert handle.in_memory and ImageHandle.memory_in_use() == 40 * 40 * 3
+    assert handle.open().tobytes() == img.tobytes()
+    handle.release()
+    assert ImageHandle.memory_in_use() == 0
@@ -0,0 +1,73 @@
+# runtime/test/test_local_cache.py
+# 本地两级 KV 缓存测试：超限淘汰到 90% (按访问时间 LRU) / 热层 LRU / 重新打开已有文件 / 多进程共享文件时按实际占用淘汰
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_local_cache.py
+import itertools
+
+import pytest
+
+import core.stores.local_cache as local_cache
+from core.stores.local_cache import LocalKVCache
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # 每次取时间都递增，访问顺序即 atime 顺序
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(local_cache.time, "time", lambda: float(next(ticks)))
+
+def value(i, size=100):
+    return bytes([i % 256]) * size
+
+def disk_keys(path):
+    return {k for (k,) in LocalKVCache(path, max_bytes=10**9)._conn.execute("SELECT k FROM kv")}
+
+def test_evicts_least_recently_used_down_to_90_percent(tmp_path):
+    path = str(tmp_path / "kv.db")
+    cache = LocalKVCache(path, max_bytes=1000)
+    for i in range(10):
+        cache.put(f"k{i}", value(i))
+    assert cache.stats()["disk_bytes"] == 1000 and cache.stats()["evictions"] == 0
+
+    # 读一次 k0，使其成为最近访问；再写入触发淘汰：1100 -> 900，淘汰最久未访问的 k1 / k2
+    assert cache.get("k0") == value(0)
+    cache.put("k10", value(10))
+    assert cache.stats()["disk_bytes"] == 900 and cache.stats()["evictions"] == 2
+    assert disk_keys(path) == {"k0"} | {f"k{i}" for i in range(3, 11)}
+
+def test_hot_tier_is_lru(tmp_path):
+    cache = LocalKVCache(str(tmp_path / "kv.db"), max_bytes=10**6, hot_size=2)
+    cache.put_many([("a", b"1"), ("b", b"2"), ("c", b"3")])
+    assert cache.stats()["hot_entries"] == 2
+
+    assert cache.get_many(["b", "c"]) == {"b": b"2", "c": b"3"}   # 热层命中
+    assert cache.get("a") == b"1"                                  # 磁盘命中，进入热层并挤出 b
+    assert cache.get("c") == b"3" and cache.get("b") == b"2"
+    stats = cache.stats()
+    assert (stats["hot_hits"], stats["disk_hits"], stats["misses"]) == (3, 2, 0)
+    assert cache.get("missing") is None and cache.stats()["misses"] == 1
+
+def test_reopen_existing_file(tmp_path):
+    path = str(tmp_path / "kv.db")
+    LocalKVCache(path, max_bytes=10**6).put_many([("x", value(1, 300)), ("y", value(2, 200))])
+
+    reopened = LocalKVCache(path, max_bytes=10**6, hot_size=4)
+    assert reopened.stats()["disk_bytes"] == 500
+    assert reopened.get_many(["x", "y"]) == {"x": value(1, 300), "y": value(2, 200)}
+    assert reopened.stats()["disk_hits"] == 2
+
+def test_shared_file_evicts_by_actual_size(tmp_path):
+    path = str(tmp_path / "kv.db")
+    # 模拟 Runtime 与 Worker 两个进程：各自只知道自己写入的字节数
+    runtime, worker = LocalKVCache(path, max_bytes=1000), LocalKVCache(path, max_bytes=1000)
+    runtime.put_many([(f"r{i}", value(i)) for i in range(6)])
+    worker.put_many([(f"w{i}", value(i)) for i in range(6)])
+
+    # 合计 1200 字节：worker 校准后发现超限，淘汰最早写入的 runtime 条目
+    assert len(disk_keys(path)) == 9
+    assert worker.stats()["disk_bytes"] == 900
+    assert disk_keys(path) == {f"r{i}" for i in range(3, 6)} | {f"w{i}" for i in range(6)}
+
+    # runtime 的估算已过期 (仍按自己写入的 600 字节计)：写入时先校准再淘汰，占用与磁盘一致
+    runtime.max_bytes = 500
+    runtime.put("r6", value(6))
+    assert runtime.stats()["disk_bytes"] == sum(len(v) for (v,) in runtime._conn.execute("SELECT v FROM kv"))
+    assert runtime.stats()["disk_bytes"] <= 450
@@ -0,0 +1,161 @@
+# runtime/test/test_qdrant_migration.py
+# 集合布局与在线迁移测试：量化 / 落盘参数 / 单次检索参数 / 新建即别名 / 别名切换 (首次与再次迁移) / 补算稀疏向量
+# Qdrant 本地模式，无需启动服务
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_qdrant_migration.py
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from config import Config
+from core.llm.sparse_encoder import BM25Encoder
+from core.stores.qdrant_store import QdrantStore
+from core.stores.qdrant_migration import migrate_collection
+
+@pytest.fixture(autouse=True)
+def layout(monkeypatch):
+    monkeypatch.setattr(Config, "HYBRID_SEARCH_ENABLED", True)
+    monkeypatch.setattr(Config, "QDRANT_QUANTIZATION", "int8")
+    monkeypatch.setattr(Config, "QDRANT_ON_DISK_VECTORS", True)
+    monkeypatch.setattr(Config, "QDRANT_HNSW_M", 32)
+    monkeypatch.setattr(Config, "QDRANT_SEGMENTS", 4)
+
+def legacy_store(n=50):
+    """旧版集合：float32、默认 HNSW、无稀疏向量，物理集合直接叫 chimera_docs"""
+    client = QdrantClient(":memory:")
+    client.create_collection("chimera_docs", vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE))
+    rng = np.random.default_rng(3)
+    client.upsert("chimera_docs", [
+        models.PointStruct(id=str(uuid.uuid4()), vector=rng.random(384).tolist(),
+                           payload={"content": f"错误码 E-{i} 处理说明", "kb_id": 1})
+        for i in range(n)
+    ])
+    return QdrantStore(client), rng
+
+def test_collection_params_follow_config(monkeypatch):
+    params = QdrantStore.collection_params(384)
+    assert params["quantization_config"].scalar.type == models.ScalarType.INT8
+    assert params["vectors_config"].on_disk and params["hnsw_config"].m == 32
+    assert params["optimizers_config"].default_segment_number == 4
+    body = QdrantStore._rest_collection_body(params)
+    assert body["vectors"]["size"] == 384 and body["quantization_config"]["scalar"]["type"] == "int8"
+    assert body["sparse_vectors"]["bm25"]["modifier"] == "idf"
+
+    monkeypatch.setattr(Config, "QDRANT_QUANTIZATION", "binary")
+    assert QdrantStore.collection_params(384)["quantization_config"].binary is not None
+
+def test_search_params_defaults_and_overrides():
+    params = QdrantStore.search_params()
+    assert params.hnsw_ef is None and params.quantization.rescore is True
+    params = QdrantStore.search_params(hnsw_ef=256, oversampling=4.0, rescore=False)
+    assert params.hnsw_ef == 256 and params.quantization.oversampling == 4.0 and params.quantization.rescore is False
+
+def test_first_migration_swaps_physical_collection_for_alias(monkeypatch):
+    store, rng = legacy_store()
+    assert not store.sparse_enabled
+    target = migrate_collection(store, batch_size=16)
+
+    assert store.resolve_alias() == target
+    assert store.client.count("chimera_docs").count == 50
+    info = store.client.get_collection(target)
+    # 本地模式不保存 HNSW / 量化配置 (精确检索)，这里只校验稀疏向量
+    assert info.config.params.sparse_vectors
+    # 迁移时补算了 BM25 向量：重新连接后直接启用混合检索，检索参数透传
+    reopened = QdrantStore(store.client)
+    assert reopened.sparse_enabled
+    # 稀疏支路：只有 E-7 命中 "e-7" / "7"，其余切片只命中 "e"
+    indices, values = BM25Encoder.encode_query("E-7")
+    sparse = store.client.query_points("chimera_docs", query=models.SparseVector(indices=indices, values=values),
+                                       using=QdrantStore.SPARSE_VECTOR_NAME, limit=1, with_payload=True).points
+    assert sparse[0].payload["content"] == "错误码 E-7 处理说明"
+    # 融合：两路各预取 top_k 个候选，E-7 是稀疏第一名；排在它前面的只能是同时进入两路候选的 (至多 top_k - 1 个)，
+    # 因此无论 dense 查询向量是什么，E-7 都在 top_k 之内
+    monkeypatch.setattr(Config, "HYBRID_PREFETCH_LIMIT", 0)
+    hits = reopened.hybrid_search("E-7", rng.random(384), kb_ids=[1], top_k=5, hnsw_ef=128, oversampling=3.0)
+    assert len(hits) == 5 and "错误码 E-7 处理说明" in [h["content"] for h in hits]
+    assert len(reopened.search(rng.random(384), [1], top_k=5, rescore=False)) == 5
+
+def test_second_migration_is_alias_swap_and_keeps_old_for_rollback():
+    store, _ = legacy_store(20)
+    first = migrate_collection(store, target="chimera_docs_v1")
+    second = migrate_collection(store, target="chimera_docs_v2")
+    assert store.resolve_alias() == second
+    assert store.client.collection_exists(first)
+    migrate_collection(store, target="chimera_docs_v3", drop_old=True)
+    assert not store.client.collection_exists(second)
+    assert store.client.count("chimera_docs").count == 20
+
+def test_fresh_collection_is_created_behind_alias():
+    client = QdrantClient(":memory:")
+    store = QdrantStore(client)
+    physical = store.resolve_alias()
+    assert physical != "chimera_docs" and client.collection_exists(physical)
+    assert store.sparse_enabled and QdrantStore(client).resolve_alias() == physical
+    # 新部署不走删集合的首次迁移路径：旧物理集合保留可回滚
+    target = migrate_collection(store, target="chimera_docs_v1")
+    assert store.resolve_alias() == target and client.collection_exists(physical)
+
+def test_first_migration_alias_failure_keeps_target_and_names_it(monkeypatch, caplog):
+    store, _ = legacy_store(10)
+    def fail(**kw):
+        raise ConnectionError("qdrant unavailable")
+    monkeypatch.setattr(store.client, "update_collection_aliases", fail)
+    with pytest.raises(RuntimeError, match="chimera_docs_new"):
+        migrate_collection(store, target="chimera_docs_new")
+    assert store.client.count("chimera_docs_new").count == 10
+    assert "chimera_docs_new" in caplog.text
+
+def test_count_mismatch_aborts_before_swap(monkeypatch):
+    store, rng = legacy_store(10)
+    real_upsert = store.client.upsert
+    def upsert_and_write_source(collection_name, points, **kw):
+        # 模拟拷贝期间 ETL 仍在写旧集合
+        real_upsert("chimera_docs", [models.PointStruct(id=str(uuid.uuid4()), vector=rng.random(384).tolist(), payload={})])
+        return real_upsert(collection_name=collection_name, points=points, **kw)
+    monkeypatch.setattr(store.client, "upsert", upsert_and_write_source)
+    with pytest.raises(RuntimeError):
+        migrate_collection(store, target="chimera_docs_new")
+    assert not store.client.collection_exists("chimera_docs_new")
+    assert store.resolve_alias() == "chimera_docs"
+
+class IndexRecordingClient:
+    """本地模式不支持 payload 索引：代理 QdrantClient，记录并回显 create_payload_index"""
+    def __init__(self):
+        self._client = QdrantClient(":memory:")
+        self.indexes = {}
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def get_collection(self, collection_name):
+        info = self._client.get_collection(collection_name)
+        info.payload_schema = dict(self.indexes.get(collection_name, {}))
+        return info
+
+    def create_payload_index(self, collection_name, field_name, field_schema, wait=True):
+        self.indexes.setdefault(collection_name, {})[field_name] = field_schema
+
+def test_payload_indexes_created_once_and_on_migration_target():
+    client = IndexRecordingClient()
+    store = QdrantStore(client)
+    fields = client.indexes[store.resolve_alias()]
+    assert set(fields) == {"kb_id", "source_id", "content_hash", "kg_status"}
+    assert fields["kb_id"].lookup and not fields["kb_id"].range
+    assert fields["content_hash"].type == models.KeywordIndexType.KEYWORD
+
+    # 已有索引不重复创建
+    created = []
+    client.create_payload_index = lambda *a, **kw: created.append(kw["field_name"])
+    QdrantStore(client)
+    assert created == []
+    del client.create_payload_index
+
+    target = migrate_collection(store, target="chimera_docs_v1")
+    assert set(client.indexes[target]) == set(fields)
+
+def test_tenant_hnsw_builds_per_kb_graphs(monkeypatch):
+    monkeypatch.setattr(Config, "QDRANT_TENANT_HNSW", True)
+    hnsw = QdrantStore.collection_params(384)["hnsw_config"]
+    assert hnsw.m == 0 and hnsw.payload_m == 32
@@ -0,0 +1,56 @@
+# runtime/test/test_reranker.py
+# Skyline 过滤测试：pareto_mask 与逐对比较的参考实现一致 (随机 / 大量并列 / 重复点，小 n 直比与分块两条路径) / extra_scores 额外维度
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_reranker.py
+import numpy as np
+import pytest
+
+from skills.reranker import CognitiveReranker
+
+def reference_mask(scores):
+    """逐对比较：存在另一点所有维度 >= 且至少一维 > 即被支配"""
+    rows = [tuple(r) for r in scores]
+    return np.array([
+        not any(all(o >= c for o, c in zip(other, cand)) and any(o > c for o, c in zip(other, cand)) for other in rows)
+        for cand in rows
+    ], dtype=bool)
+
+@pytest.mark.parametrize("n", [1, 2, 25, 64, 65, 300])
+@pytest.mark.parametrize("d", [2, 3, 5])
+def test_pareto_mask_matches_reference_on_random_scores(n, d):
+    scores = np.random.default_rng(n * 10 + d).random((n, d))
+    assert np.array_equal(CognitiveReranker.pareto_mask(scores), reference_mask(scores))
+
+@pytest.mark.parametrize("n", [25, 200])
+@pytest.mark.parametrize("levels", [2, 3])
+def test_pareto_mask_matches_reference_with_ties(n, levels):
+    # 每维只有少数取值：大量并列与完全重复的点 (重复的非支配点应全部保留)
+    scores = np.random.default_rng(n + levels).integers(0, levels, size=(n, 3)).astype(np.float64)
+    expected = reference_mask(scores)
+    assert np.array_equal(CognitiveReranker.pareto_mask(scores), expected)
+    # 小块迫使跨块比较
+    assert np.array_equal(CognitiveReranker.pareto_mask(scores, block_size=4), expected)
+
+def test_pareto_mask_empty():
+    assert CognitiveReranker.pareto_mask(np.zeros((0, 3))).shape == (0,)
+
+def test_skyline_filter_with_extra_scores():
+    rng = np.random.default_rng(5)
+    n = 40
+    hits = [{"id": f"c{i}", "score": float(rng.random()), "metadata": {"level": int(rng.integers(0, 6))}} for i in range(n)]
+    graph = {f"c{i}": float(rng.integers(0, 4)) for i in range(n)}
+    freshness = {f"c{i}": float(rng.integers(0, 3)) for i in range(n)}
+    weights = (0.3, 0.3, 0.1, 0.3)
+
+    result = CognitiveReranker.skyline_filter([dict(h) for h in hits], graph, top_k=5,
+                                              extra_scores={"freshness": freshness}, weights=weights)
+
+    # 参考：四个维度各自按最大值归一化后逐对求 Skyline，再按加权分降序
+    max_v = max(h["score"] for h in hits)
+    rows = [(h["score"] / max_v, graph[h["id"]] / 3.0, min(h["metadata"]["level"] / 5.0, 1.0), freshness[h["id"]] / 2.0)
+            for h in hits]
+    skyline = [i for i, keep in enumerate(reference_mask(np.array(rows))) if keep]
+    combined = {i: sum(w * x for w, x in zip(weights, rows[i])) for i in skyline}
+    expected = sorted(skyline, key=lambda i: -combined[i])[:5]
+    assert [r["id"] for r in result][:len(expected)] == [hits[i]["id"] for i in expected]
+    # 额外维度参与支配判断：前沿比只看前三维时更大 (只在 freshness 上占优的点也留下)
+    assert set(skyline) > set(np.flatnonzero(reference_mask(np.array(rows)[:, :3])))
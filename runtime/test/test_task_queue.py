@@ -0,0 +1,137 @@
+# runtime/test/test_task_queue.py
+# ReliableTaskQueue 行为测试 (fakeredis，无需启动 Redis)
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_task_queue.py
+#                      或: PYTHONPATH=. python test/test_task_queue.py
+import json
+import time
+
+import fakeredis
+
+from core.stores.task_queue import ReliableTaskQueue
+
+QUEUE = "chimera_etl_tasks"
+
+def make_queue(**kw):
+    r = fakeredis.FakeRedis()
+    q = ReliableTaskQueue(r, QUEUE, visibility_timeout=kw.pop("visibility_timeout", 60),
+                          max_retries=kw.pop("max_retries", 2), backoff_base=kw.pop("backoff_base", 0))
+    return r, q
+
+def push(r, ds_id):
+    # 与 Go 端 PushTask 一致：RPUSH 原始 JSON
+    r.rpush(QUEUE, json.dumps({"ds_id": ds_id, "kb_id": 1, "type": "file", "config_json": "{}"}))
+
+def test_fifo_and_ack():
+    r, q = make_queue()
+    push(r, 1); push(r, 2)
+    a, b = q.reserve(timeout=1), q.reserve(timeout=1)
+    assert [a.task["ds_id"], b.task["ds_id"]] == [1, 2]
+    assert q.stats()["processing"] == 2
+    q.ack(a); q.ack(b)
+    assert q.stats() == {"pending": 0, "processing": 0, "delayed": 0, "dead": 0}
+    assert r.hlen(q.leases_key) == 0
+
+def test_nack_retries_then_dead_letter():
+    r, q = make_queue(max_retries=2)
+    push(r, 7)
+    for attempt in range(3):
+        lease = q.reserve(timeout=1)
+        assert lease.attempts == attempt
+        q.nack(lease, "boom")
+        q.promote_delayed()  # backoff_base=0，立即可重投
+    assert q.stats() == {"pending": 0, "processing": 0, "delayed": 0, "dead": 1}
+    dead = q.dead_letters()[0]
+    assert dead["task"]["ds_id"] == 7 and dead["error"] == "boom"
+
+def test_backoff_delays_redelivery():
+    r, q = make_queue(backoff_base=30)
+    push(r, 3)
+    q.nack(q.reserve(timeout=1), "transient")
+    assert q.promote_delayed() == 0
+    assert q.stats()["delayed"] == 1 and q.reserve(timeout=1) is None
+
+def test_expired_lease_is_reclaimed():
+    r, q = make_queue(visibility_timeout=60)
+    push(r, 5)
+    lease = q.reserve(timeout=1)
+    # 模拟 Worker 崩溃：不再续约，租约过期
+    r.hset(q.leases_key, lease.raw, time.time() - 1)
+    assert q.reclaim_expired() == 1
+    q.promote_delayed()
+    again = q.reserve(timeout=1)
+    assert again.task["ds_id"] == 5 and again.attempts == 1
+    # 原 Worker 迟到的 ack / nack 不会影响新的投递
+    q.ack(lease)
+    q.nack(lease, "late")
+    assert q.stats()["processing"] == 1 and q.stats()["delayed"] == 0
+
+def test_heartbeat_keeps_lease():
+    r, q = make_queue(visibility_timeout=60)
+    push(r, 9)
+    lease = q.reserve(timeout=1)
+    r.hset(q.leases_key, lease.raw, time.time() - 1)
+    assert q.heartbeat(lease)
+    assert q.reclaim_expired() == 0
+
+def test_orphan_without_lease_gets_grace_period():
+    r, q = make_queue()
+    push(r, 4)
+    # BLMOVE 后、登记租约前崩溃
+    r.lmove(QUEUE, q.processing_key, "LEFT", "RIGHT")
+    assert q.reclaim_expired() == 0
+    assert r.hlen(q.leases_key) == 1
+
+def test_identical_messages_get_separate_leases():
+    r, q = make_queue(visibility_timeout=60)
+    # Go 端 task_id 精确到秒：同一秒内重复提交的任务内容完全相同
+    push(r, 6); push(r, 6)
+    first, second = q.reserve(timeout=1), q.reserve(timeout=1)
+    assert first.delivery_id != second.delivery_id
+    assert r.hlen(q.leases_key) == 2
+
+    # 一条完成不影响另一条的租约
+    q.ack(first)
+    assert q.stats()["processing"] == 1
+    assert q.heartbeat(second) and not q.heartbeat(first)
+
+    # 另一条超时回收：重投的消息不带旧的投递 ID
+    r.hset(q.leases_key, second.raw, time.time() - 1)
+    assert q.reclaim_expired() == 1
+    q.promote_delayed()
+    again = q.reserve(timeout=1)
+    assert again.attempts == 1 and again.delivery_id not in (first.delivery_id, second.delivery_id)
+    assert q.stats() == {"pending": 0, "processing": 1, "delayed": 0, "dead": 0}
+
+def test_maintain_between_blmove_and_envelope_swap_does_not_duplicate():
+    r, q = make_queue(visibility_timeout=60)
+    push(r, 8)
+    blmove = r.blmove
+    orphans = []
+    def blmove_then_maintain(*args, **kw):
+        # 其他 Worker 的 maintain() 恰好在 BLMOVE 之后、替换投递副本之前运行：为原始消息补登租约
+        raw = blmove(*args, **kw)
+        q.reclaim_expired()
+        orphans.append(raw.decode())
+        return raw
+    r.blmove = blmove_then_maintain
+    lease = q.reserve(timeout=1)
+    assert r.hexists(q.leases_key, orphans[0])
+
+    # 补登的租约过期，而真正的投递仍在心跳：只清理孤儿租约，不重投
+    r.hset(q.leases_key, orphans[0], time.time() - 1)
+    assert q.heartbeat(lease)
+    assert q.reclaim_expired() == 0
+    assert q.stats() == {"pending": 0, "processing": 1, "delayed": 0, "dead": 0}
+    assert r.hkeys(q.leases_key) == [lease.raw.encode()]
+
+def test_invalid_payload_goes_to_dead_letter():
+    r, q = make_queue()
+    r.rpush(QUEUE, "not-json")
+    assert q.reserve(timeout=1) is None
+    assert q.stats() == {"pending": 0, "processing": 0, "delayed": 0, "dead": 1}
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
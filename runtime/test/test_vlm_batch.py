@@ -0,0 +1,116 @@
+# runtime/test/test_vlm_batch.py
+# VLMService 批量推理测试：提示词构造 / 缩放 / 按窗口合批 / 结果按原顺序回填 / 描述缓存 (假引擎，无需 GPU 与 vllm)
+# 用法 (在 runtime 目录下): PYTHONPATH=. python -m pytest -q test/test_vlm_batch.py
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from config import Config
+from core.stores.local_cache import LocalKVCache
+from skills.vlm_service import VLMService, MAX_PIXELS
+
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    # 默认不落盘，避免用例之间 (及与本机缓存目录) 互相命中
+    monkeypatch.setattr(VLMService, "_cache", None)
+    monkeypatch.setattr(Config, "VLM_CACHE_ENABLED", False)
+
+class FakeLLM:
+    """记录每次 generate 的输入，按输入顺序返回 '<类型>:<宽>x<高>'"""
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, inputs, sampling_params=None):
+        self.calls.append(inputs)
+        outputs = []
+        for inp in inputs:
+            kind = "table" if "表格" in inp["prompt"] else "figure"
+            w, h = inp["multi_modal_data"]["image"].size
+            outputs.append(SimpleNamespace(outputs=[SimpleNamespace(text=f"{kind}:{w}x{h}")]))
+        return outputs
+
+def png_bytes(w, h):
+    buf = io.BytesIO()
+    Image.new("RGB", (w, h), "white").save(buf, format="PNG")
+    return buf.getvalue()
+
+def test_batches_by_window_and_keeps_order(monkeypatch):
+    monkeypatch.setattr(Config, "VLM_BATCH_SIZE", 3)
+    llm = FakeLLM()
+    vlm = VLMService(model=llm)
+    requests = [{"image": png_bytes(10 + i, 10), "is_table": i % 2 == 0, "breadcrumb": f"第{i}节"} for i in range(7)]
+
+    out = vlm.describe_images(requests)
+
+    assert [len(c) for c in llm.calls] == [3, 3, 1]
+    assert out == [f"{'table' if i % 2 == 0 else 'figure'}:{10 + i}x10" for i in range(7)]
+    assert "第0节" in llm.calls[0][0]["prompt"]
+
+def test_prompts_differ_for_tables_and_figures():
+    table = VLMService.build_prompt("3.2 实验结果", is_table=True)
+    figure = VLMService.build_prompt("2.1 系统架构")
+    assert "Markdown" in table and "3.2 实验结果" in table
+    assert "架构组件" in figure and "2.1 系统架构" in figure
+    for p in (table, figure):
+        assert p.count("<|image_pad|>") == 1 and p.endswith("<|im_start|>assistant\n")
+
+def test_large_images_are_downscaled(tmp_path):
+    path = tmp_path / "big.png"
+    Image.new("RGB", (2000, 1000)).save(path)
+    image = VLMService.prepare_image(str(path))
+    w, h = image.size
+    assert w * h <= MAX_PIXELS and abs(w / h - 2) < 0.01
+    assert VLMService.prepare_image(Image.new("RGB", (100, 50))).size == (100, 50)
+
+def test_bad_image_fails_alone(monkeypatch):
+    monkeypatch.setattr(Config, "VLM_BATCH_SIZE", 8)
+    llm = FakeLLM()
+    vlm = VLMService(model=llm)
+    out = vlm.describe_images([{"image": png_bytes(20, 20)}, {"image": "/nonexistent.png"}, {"image": png_bytes(30, 20)}])
+    assert out[0] == "figure:20x20" and out[2] == "figure:30x20"
+    assert out[1].startswith("[视觉解析异常]")
+    assert len(llm.calls) == 1 and len(llm.calls[0]) == 2
+
+def test_engine_failure_marks_whole_window():
+    class Broken:
+        def generate(self, inputs, sampling_params=None):
+            raise RuntimeError("CUDA out of memory")
+    out = VLMService(model=Broken()).describe_images([{"image": png_bytes(8, 8)}] * 2)
+    assert all(o.startswith("[视觉解析异常]") and "out of memory" in o for o in out)
+
+def test_cache_skips_gpu_for_unchanged_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(VLMService, "_cache", LocalKVCache(str(tmp_path / "vlm.db"), max_bytes=1 << 20, name="VLMCache"))
+    logo, chart = png_bytes(40, 40), png_bytes(64, 48)
+
+    llm = FakeLLM()
+    vlm = VLMService(model=llm)
+    first = vlm.describe_images([{"image": logo}, {"image": chart, "is_table": True}, {"image": logo}])
+    # 同一窗口内重复的图只推理一次
+    assert len(llm.calls) == 1 and len(llm.calls[0]) == 2
+    assert first[0] == first[2] == "figure:40x40"
+
+    # 文档新版本：未变的图全部命中缓存，只有新图进 GPU
+    second = vlm.describe_images([{"image": chart, "is_table": True}, {"image": logo}, {"image": png_bytes(50, 50)}])
+    assert len(llm.calls) == 2 and len(llm.calls[1]) == 1
+    assert second == ["table:64x48", "figure:40x40", "figure:50x50"]
+
+    # 同一张图换成表格模式 / 换模型，不能串用描述
+    assert vlm.cache_key(Image.open(io.BytesIO(logo)), is_table=True) != vlm.cache_key(Image.open(io.BytesIO(logo)))
+    other = VLMService(model=llm)
+    other.model_path = "other-vlm"
+    other.describe_images([{"image": logo}])
+    assert len(llm.calls) == 3
+
+def test_failures_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(VLMService, "_cache", LocalKVCache(str(tmp_path / "vlm.db"), max_bytes=1 << 20, name="VLMCache"))
+    class Flaky(FakeLLM):
+        def generate(self, inputs, sampling_params=None):
+            if not self.calls:
+                self.calls.append(inputs)
+                raise RuntimeError("engine busy")
+            return super().generate(inputs, sampling_params)
+    vlm = VLMService(model=Flaky())
+    assert vlm.describe_image(png_bytes(12, 12)).startswith("[视觉解析异常]")
+    assert vlm.describe_image(png_bytes(12, 12)) == "figure:12x12"
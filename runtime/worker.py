@@ -1,16 +1,183 @@
 import time
 import json
+import queue
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import redis
 from config import Config
 from core.stores.qdrant_store import QdrantStore
 from core.managers.etl_manager import ETLManager
+from core.stores.task_queue import ReliableTaskQueue, Lease
+from core.connectors.base import ConnectorFactory
+from core.telemetry.metrics import StageGauges
 from loader import load_enterprise_plugins
 import core.connectors.file
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("ETL-Worker")
 
+METRICS_KEY = "chimera_etl_metrics"
+
+class ETLWorker:
+    """
+    多槽位 ETL Worker：
+    - 出队线程：容量 (槽位 + 预取) 未满时才出队 (可靠队列 BLMOVE + 租约)，避免把任务囤在单个 Worker 里
+    - 预取线程池：构造连接器并提前下载源文件 (I/O 与正在执行的任务重叠)
+    - 执行槽位：N 个线程各自跑一个 sync_datasource，Docling 解析在进程池中并行，
+      GPU 上的 VLM / 嵌入模型由多个任务交替喂数据
+    - 指标线程：定期上报各阶段队列深度 (日志 + Redis Hash chimera_etl_metrics)，
+      并执行队列维护 (回收过期租约、提升到期的重试任务)
+    任务从出队到 ack/nack 全程持有租约并后台续约；Worker 崩溃后任务会被其他 Worker 重新执行
+    (Point ID 确定性 + 增量同步，重复执行是幂等的)
+    """
+    def __init__(self, etl_mgr: ETLManager, r: redis.Redis, queue_name: str,
+                 concurrency: int = None, prefetch: int = None):
+        self.etl_mgr = etl_mgr
+        self.r = r
+        self.queue_name = queue_name
+        self.queue = ReliableTaskQueue(r, queue_name)
+        self.concurrency = max(1, concurrency or Config.WORKER_CONCURRENCY)
+        self.prefetch = max(0, Config.WORKER_PREFETCH if prefetch is None else prefetch)
+
+        self._capacity = threading.Semaphore(self.concurrency + self.prefetch)
+        self._ready = queue.Queue()
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=max(1, self.prefetch), thread_name_prefix="etl-prefetch")
+        self._stop = threading.Event()
+
+    def run(self):
+        threads = [threading.Thread(target=self._fetch_loop, name="etl-fetch", daemon=True),
+                   threading.Thread(target=self._report_loop, name="etl-metrics", daemon=True)]
+        threads += [threading.Thread(target=self._slot_loop, args=(i,), name=f"etl-slot-{i}", daemon=True)
+                    for i in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        logger.info(f"🔥 ETL Worker is ready, listening on queue: {self.queue_name} "
+                    f"(slots={self.concurrency}, prefetch={self.prefetch}, parse_processes={Config.PARSE_PROCESSES})")
+        try:
+            while not self._stop.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info("🛑 [Worker] 收到退出信号，停止接收新任务")
+            self._stop.set()
+
+    def _fetch_loop(self):
+        while not self._stop.is_set():
+            # 槽位与预取缓冲都满时阻塞在这里，不再从 Redis 取任务
+            self._capacity.acquire()
+            try:
+                # 4. 阻塞式出队 (BLMOVE 到 processing 列表并登记租约，带超时以便响应退出)
+                lease = self.queue.reserve(timeout=5)
+            except Exception as e:
+                logger.error(f"❌ [Worker] Redis 出队失败: {e}")
+                self._capacity.release()
+                time.sleep(2)
+                continue
+            if lease is None:
+                self._capacity.release()
+                continue
+            StageGauges.inc("prefetching")
+            self._prefetch_pool.submit(self._prefetch, lease)
+
+    def _prefetch(self, lease: Lease):
+        connector = None
+        # 从预取开始到 ack/nack 一直续约 (等待槽位期间同样需要)
+        stop_heartbeat = self.queue.start_heartbeat(lease)
+        try:
+            task = lease.task
+            connector_cls = ConnectorFactory.get_connector(task['type'])
+            connector = connector_cls(task['kb_id'], task['ds_id'], json.loads(task['config_json']))
+            start = time.perf_counter()
+            connector.prefetch()
+            StageGauges.observe("prefetching", time.perf_counter() - start)
+            StageGauges.inc("ready")
+            self._ready.put((lease, connector, stop_heartbeat))
+        except Exception as e:
+            logger.error(f"❌ [Worker] 任务预取失败: {e}")
+            stop_heartbeat()
+            self._settle(lease, e)
+            if connector is not None:
+                connector.close()
+            self._capacity.release()
+        finally:
+            StageGauges.dec("prefetching")
+
+    def _slot_loop(self, slot_id: int):
+        while not self._stop.is_set():
+            try:
+                lease, connector, stop_heartbeat = self._ready.get(timeout=1)
+            except queue.Empty:
+                continue
+            StageGauges.dec("ready")
+            error = None
+            try:
+                self._run_task(slot_id, lease, connector)
+            except Exception as e:
+                error = e
+            finally:
+                stop_heartbeat()
+                self._settle(lease, error)
+                self._capacity.release()
+
+    def _settle(self, lease: Lease, error: Exception = None):
+        """成功 ack；失败 nack (延迟重试或进入死信)"""
+        try:
+            if error is None:
+                self.queue.ack(lease)
+            else:
+                self.queue.nack(lease, f"{type(error).__name__}: {error}")
+        except Exception as e:
+            logger.error(f"❌ [Worker] 任务确认失败 (租约到期后会被重新投递): {e}")
+
+    def _run_task(self, slot_id: int, lease: Lease, connector):
+        task = lease.task
+        ds_id = task['ds_id']
+        retry_note = f" (retry #{lease.attempts})" if lease.attempts else ""
+        logger.info(f"🚀 [Worker-{slot_id}] Received task for DS:{ds_id}{retry_note}")
+        stage = None
+        try:
+            with StageGauges.track("running"):
+                # 5. 执行同步任务 (Manager 现在是生成器)
+                iterator = self.etl_mgr.sync_datasource(
+                    kb_id=task['kb_id'],
+                    source_id=ds_id,
+                    source_type=task['type'],
+                    config_json=task['config_json'],
+                    connector=connector
+                )
+
+                # 消费生成器，执行同步；按进度帧的阶段统计各阶段在途任务数
+                for progress in iterator:
+                    new_stage = progress.get("stage")
+                    if new_stage != stage:
+                        if stage: StageGauges.dec(f"stage.{stage}")
+                        if new_stage: StageGauges.inc(f"stage.{new_stage}")
+                        stage = new_stage
+
+            logger.info(f"✅ [Worker-{slot_id}] Task completed for DS:{ds_id}")
+        except Exception as e:
+            logger.error(f"❌ [Worker-{slot_id}] Error processing task: {e}")
+            raise
+        finally:
+            if stage: StageGauges.dec(f"stage.{stage}")
+            connector.close()
+
+    def _report_loop(self):
+        while not self._stop.wait(Config.WORKER_METRICS_INTERVAL):
+            try:
+                self.queue.maintain()
+                q = self.queue.stats()
+                StageGauges.set("redis_backlog", q["pending"])
+                StageGauges.set("queue_processing", q["processing"])
+                StageGauges.set("queue_delayed", q["delayed"])
+                StageGauges.set("queue_dead", q["dead"])
+                snap = StageGauges.snapshot()
+                logger.info(f"📊 [Worker-Metrics] {snap}")
+                self.r.hset(METRICS_KEY, mapping={k: str(v) for k, v in snap.items()})
+                self.r.expire(METRICS_KEY, Config.WORKER_METRICS_INTERVAL * 6)
+            except Exception as e:
+                logger.warning(f"⚠️ [Worker-Metrics] 上报失败: {e}")
+
 def run_worker():
     # 1. 加载企业插件 (确保图谱能力被激活)
     load_enterprise_plugins()
@@ -47,35 +214,7 @@ def run_worker():
         logger.error(f"❌ VLM 初始化失败，Worker 停止: {e}")
         return # 👈 关键：失败就停止，不要空转
 
-    logger.info(f"🔥 ETL Worker is ready, listening on queue: {queue_name}")
-
-    while True:
-        try:
-            # 4. 阻塞式弹出任务 (BLPOP)
-            _, task_json = r.blpop(queue_name)
-            task = json.loads(task_json)
-
-            ds_id = task['ds_id']
-            logger.info(f"🚀 [Worker] Received task for DS:{ds_id}")
-
-            # 5. 执行同步任务 (Manager 现在是生成器)
-            iterator = etl_mgr.sync_datasource(
-                kb_id=task['kb_id'],
-                source_id=ds_id,
-                source_type=task['type'],
-                config_json=task['config_json']
-            )
-
-            # 消费生成器，执行同步
-            for progress in iterator:
-                # 后续可在此更新任务进度到 Redis
-                pass
-
-            logger.info(f"✅ [Worker] Task completed for DS:{ds_id}")
-
-        except Exception as e:
-            logger.error(f"❌ [Worker] Error processing task: {e}")
-            time.sleep(2)
+    ETLWorker(etl_mgr, r, queue_name).run()
 
 if __name__ == "__main__":
     run_worker()
\ No newline at end of file
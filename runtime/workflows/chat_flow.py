@@ -1,10 +1,15 @@
 import json
+import time
 import logging
 import os
+import threading
 import yaml
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import TypedDict, List, Dict, Any, Generator, Optional
 from langgraph.graph import StateGraph, END
 from jinja2 import Template
+from opentelemetry import context as otel_context
+from config import Config
 
 # Core & Skills
 from core.llm.embedding import EmbeddingModel
@@ -13,12 +18,22 @@ from core.stores.qdrant_store import QdrantStore
 from skills.reranker import CognitiveReranker
 from agents.chat.query_analysis import QueryAnalysisAgent
 from core.telemetry.tracing import trace_agent
+from core.cancellation import CancelToken, OperationCancelled, check_cancelled
 
 logger = logging.getLogger(__name__)
 
+# 检索支路共享线程池 (进程级)，避免每轮对话都创建/销毁线程
+# 超时被放弃的支路仍占用线程直到底层调用返回，额外预留 RETRIEVAL_ABANDON_HEADROOM 个线程，避免拖慢后续请求
+_RETRIEVAL_POOL = ThreadPoolExecutor(max_workers=Config.RETRIEVAL_WORKERS + Config.RETRIEVAL_ABANDON_HEADROOM,
+                                     thread_name_prefix="chimera-retrieve")
+# 已超时但仍在运行的支路数
+_abandoned = {"running": 0}
+_abandoned_lock = threading.Lock()
+
 # --- 1. 状态定义 ---
 class AgentState(TypedDict):
     query: str
+    kb_ids: List[int]               # 本次请求检索的知识库 (随状态传递，工作流本身与 KB 无关)
     history: List[Any]              # 原始 gRPC Message 对象列表
     query_entities: List[str]       # 提取的实体/关键词
     retrieved_docs: List[Dict]      # 经过 Skyline 过滤后的黄金文档片段
@@ -26,27 +41,44 @@ class AgentState(TypedDict):
     subgraph_data: Dict[str, List]  # 用于前端可视化的点边原始数据
     full_context: str               # 最终拼装的上下文字符串
     answer: str                     # 生成的结果
+    retrieval_timings: List[Dict]   # 各检索支路耗时 {branch, duration_ms, status}
+    cancel_token: Any               # 请求级取消令牌 (CancelToken 或 None)
 
 class ChatWorkflow:
-    def __init__(self, nebula: Any, qdrant: QdrantStore, kb_ids: List[int]):
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, nebula: Any, qdrant: QdrantStore):
         """
         :param nebula: 企业版 NebulaStore 实例或 None
         :param qdrant: QdrantStore 实例
-        :param kb_ids: 知识库 ID 列表
         """
         self.nebula = nebula
         self.qdrant = qdrant
-        self.kb_ids = kb_ids
 
         self.embed_model = EmbeddingModel.get_instance()
-        self.llm = LLMClient()
+        self.llm = LLMClient.get_instance()
         self.query_analyzer = QueryAnalysisAgent()
 
-        # 加载生成 Prompt
+        # 加载生成 Prompt，并预编译为 Jinja2 Template
         self.synthesis_prompt_config = self._load_prompt("chat/synthesis.yaml")
+        self.synthesis_system_tmpl = Template(self.synthesis_prompt_config.get("system", ""))
+        self.synthesis_user_tmpl = Template(self.synthesis_prompt_config.get("user", ""))
         # 构建图
         self.app = self._build_graph()
 
+    @classmethod
+    def get_instance(cls, nebula: Any, qdrant: QdrantStore) -> "ChatWorkflow":
+        """
+        进程级单例：Prompt 读取、Agent/Client 初始化与 StateGraph 编译只做一次，
+        kb_ids 等请求级参数通过 state 传入
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls(nebula, qdrant)
+        return cls._instance
+
     def _load_prompt(self, filename):
         """增强的提示词加载逻辑，支持多路径搜索"""
         base_dir = os.getcwd()
@@ -81,52 +113,148 @@ class ChatWorkflow:
     @trace_agent("Node:Query_Analysis")
     def node_query_analysis(self, state: AgentState):
         """步骤 1: 提取关键词并进行意图锚定"""
+        check_cancelled(state.get("cancel_token"))
         logger.info(f"🧠 [Chat-1] 分析意图: {state['query']}")
         entities = self.query_analyzer.run(state["query"])
         return {"query_entities": entities}
 
     @trace_agent("Node:Dual_Retrieval")
     def node_retrieve(self, state: AgentState):
-        """步骤 2: 双螺旋检索 + 多维 Skyline 过滤"""
+        """步骤 2: 双螺旋检索 (各支路并发) + 多维 Skyline 过滤"""
         query = state["query"]
+        kb_ids = state.get("kb_ids", [])
         entities = state.get("query_entities", [])
-
-        # 2.1 初始化容器
-        graph_context = []
-        graph_chunk_hits = {}
-        subgraph_raw = {"nodes": [], "edges": []}
-
-        # 2.2 企业版图谱支流 (Enterprise)
+        cancel_token = state.get("cancel_token")
+        check_cancelled(cancel_token)
+
+        # 2.1 支路定义：name -> (callable, 降级默认值)
+        branches = {
+            # 开源版向量支流 (Core)：原始问题 + 抽取实体一次批量编码、一次批量检索，每路召回 Top-25，
+            # 按 chunk id 去重合并后供 Skyline 算法精选
+            # 每路都是 dense + BM25 混合召回 (精确匹配编号类查询)，集合无稀疏向量时自动退化为纯向量检索
+            "vector": (lambda: self.qdrant.search_batch(self._expand_queries(query, entities), kb_ids, top_k=25), []),
+        }
+        # 企业版图谱支流 (Enterprise)：三路互不依赖，各自独立并发
         if self.nebula:
-            try:
+            branches.update({
                 # Stage-1: 获取图谱背景文本 (Cog-RAG)
-                graph_context = self.nebula.retrieve_topic_context(entities)
+                "graph_context": (lambda: self.nebula.retrieve_topic_context(entities), []),
                 # 获取图谱评分 (用于 Skyline 过滤)
-                graph_chunk_hits = self.nebula.get_chunk_scores_by_entities(entities)
+                "graph_scores": (lambda: self.nebula.get_chunk_scores_by_entities(entities), {}),
                 # 任务 4.1: 获取可视化原始点边
-                subgraph_raw = self.nebula.get_subgraph_raw(entities)
-                logger.info(f"🕸️ [Chat-2] 图谱命中了 {len(graph_context)} 个背景事实")
-            except Exception as e:
-                logger.error(f"⚠️ Nebula Retrieval Error: {e}")
-
-        # 2.3 开源版向量支流 (Core)
-        query_vec = self.embed_model.encode(query)
-        # 召回候选集 (Top-25)，供 Skyline 算法精选
-        raw_vector_hits = self.qdrant.search(query_vec, self.kb_ids, top_k=25)
+                "subgraph": (lambda: self.nebula.get_subgraph_raw(entities), {"nodes": [], "edges": []}),
+            })
+
+        # 2.2 并发执行：总耗时取决于最慢的支路，而不是各支路之和
+        # 单路超时不超过请求剩余的 deadline
+        timeout_s = Config.RETRIEVAL_BRANCH_TIMEOUT_MS / 1000.0
+        if cancel_token and cancel_token.remaining() is not None:
+            timeout_s = min(timeout_s, cancel_token.remaining())
+        results, timings = self._run_branches(branches, timeout_s, cancel_token)
+        check_cancelled(cancel_token)
+        graph_context = results.get("graph_context", [])
+        if self.nebula:
+            logger.info(f"🕸️ [Chat-2] 图谱命中了 {len(graph_context)} 个背景事实")
 
-        # 2.4 多维 Skyline 过滤 (Task 3.3)
+        # 2.3 多维 Skyline 过滤 (Task 3.3)
         refined_docs = CognitiveReranker.skyline_filter(
-            vector_results=raw_vector_hits,
-            graph_scores=graph_chunk_hits,
+            vector_results=results["vector"],
+            graph_scores=results.get("graph_scores", {}),
             top_k=7
         )
 
         return {
             "retrieved_docs": refined_docs,
             "graph_context": graph_context,
-            "subgraph_data": subgraph_raw
+            "subgraph_data": results.get("subgraph", {"nodes": [], "edges": []}),
+            "retrieval_timings": timings
         }
 
+    @staticmethod
+    def _expand_queries(query: str, entities: List[Any]) -> List[str]:
+        """查询扩展：原始问题在前，其后是抽取出的实体 (去重，最多 RETRIEVAL_MAX_QUERIES 路)"""
+        queries = [query] + [e for e in entities if isinstance(e, str)]
+        return list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))[:max(1, Config.RETRIEVAL_MAX_QUERIES)]
+
+    @staticmethod
+    def _run_branches(branches: Dict[str, Any], timeout_s: float, cancel_token: Optional[CancelToken] = None):
+        """
+        在共享线程池中并发执行各检索支路；单路超时或异常时降级为默认值，不影响其他支路
+        超时从支路实际开始执行算起 (线程池繁忙时排队不计入)；排队超过 timeout_s 仍未开始的支路直接取消
+        请求取消时不再等待剩余支路
+        :return: (结果字典, 耗时列表)
+        """
+        parent_ctx = otel_context.get_current()
+        started: Dict[str, float] = {}
+
+        def _timed(name, fn):
+            started[name] = time.perf_counter()
+            # 线程池不会自动继承 OTel 上下文，手动挂到当前 Span 下
+            token = otel_context.attach(parent_ctx)
+            try:
+                return fn(), int((time.perf_counter() - started[name]) * 1000)
+            finally:
+                otel_context.detach(token)
+
+        submitted = time.perf_counter()
+        pending = {name: _RETRIEVAL_POOL.submit(_timed, name, fn) for name, (fn, _) in branches.items()}
+        # 取消时唤醒下面的 wait()
+        cancelled = Future()
+        unregister = cancel_token.on_cancel(lambda: cancelled.set_result(None)) if cancel_token else (lambda: None)
+
+        results, timings = {}, []
+        while pending:
+            for name, fut in list(pending.items()):
+                default = branches[name][1]
+                if fut.done():
+                    del pending[name]
+                    try:
+                        results[name], cost = fut.result()
+                        timings.append({"branch": name, "duration_ms": cost, "status": "ok"})
+                    except Exception as e:
+                        results[name] = default
+                        cost = int((time.perf_counter() - started.get(name, submitted)) * 1000)
+                        timings.append({"branch": name, "duration_ms": cost, "status": "error"})
+                        logger.error(f"⚠️ [Retrieve] 支路 {name} 失败: {e}")
+                elif time.perf_counter() >= started.get(name, submitted) + timeout_s:
+                    del pending[name]
+                    results[name] = default
+                    ChatWorkflow._abandon_branch(name, fut, timeout_s, timings)
+
+            if pending and cancel_token is not None and cancel_token.cancelled:
+                for name, fut in pending.items():
+                    results[name] = branches[name][1]
+                    fut.cancel()
+                break
+            if pending:
+                deadline = min(started.get(name, submitted) + timeout_s for name in pending)
+                wait(list(pending.values()) + [cancelled], timeout=max(0.0, deadline - time.perf_counter()),
+                     return_when=FIRST_COMPLETED)
+        unregister()
+        return results, timings
+
+    @staticmethod
+    def _abandon_branch(name: str, fut, timeout_s: float, timings: List[Dict[str, Any]]):
+        if fut.cancel():
+            # 还在排队：取消后不占用线程
+            timings.append({"branch": name, "duration_ms": 0, "status": "queued_timeout"})
+            logger.warning(f"⏱️ [Retrieve] 支路 {name} 排队超过 {int(timeout_s * 1000)}ms 未开始，降级为空结果")
+            return
+        # 已在运行：无法中断，结果丢弃；线程在底层调用返回后归还
+        with _abandoned_lock:
+            _abandoned["running"] += 1
+            running = _abandoned["running"]
+
+        def _release(_):
+            with _abandoned_lock:
+                _abandoned["running"] -= 1
+        fut.add_done_callback(_release)
+
+        timings.append({"branch": name, "duration_ms": int(timeout_s * 1000), "status": "timeout"})
+        logger.warning(f"⏱️ [Retrieve] 支路 {name} 超时 ({int(timeout_s * 1000)}ms)，降级为空结果 (仍在运行的超时支路: {running})")
+        if running > Config.RETRIEVAL_ABANDON_HEADROOM:
+            logger.warning(f"⚠️ [Retrieve] 超时支路数超过预留线程 ({Config.RETRIEVAL_ABANDON_HEADROOM})，新请求的支路可能排队")
+
     @trace_agent("Node:Context_Fusion")
     def node_generate_prep(self, state: AgentState):
         """步骤 3: 认知融合上下文拼装"""
@@ -158,12 +286,14 @@ class ChatWorkflow:
 
     # --- 3. 运行逻辑 (Stream Handling) ---
 
-    def run_stream(self, initial_state: dict) -> Generator[Dict[str, Any], None, None]:
+    def run_stream(self, initial_state: dict, cancel_token: Optional[CancelToken] = None) -> Generator[Dict[str, Any], None, None]:
         """
         执行工作流并产生标准化事件流
+        :param cancel_token: 取消令牌；各节点入口检查，LLM 生成阶段取消时立即断开上游流
         """
         # 1. 执行图逻辑（同步调用，直到 generate_prep 结束）
-        final_state = self.app.invoke(initial_state)
+        final_state = self.app.invoke({**initial_state, "cancel_token": cancel_token})
+        check_cancelled(cancel_token)
 
         # 2. 推送中间思考过程（ thought ）给前端
         if final_state.get("query_entities"):
@@ -173,6 +303,15 @@ class ChatWorkflow:
                 "content": f"正在检索实体: {', '.join(final_state['query_entities'])}"
             }
 
+        # 2.1 推送各检索支路耗时
+        for t in final_state.get("retrieval_timings", []):
+            yield {
+                "type": "thought",
+                "node": f"Retrieve:{t['branch']}",
+                "content": f"检索支路 {t['branch']} {'完成' if t['status'] == 'ok' else '已降级 (' + t['status'] + ')'}",
+                "duration": t["duration_ms"]
+            }
+
         # 3. 推送任务 4.1 子图数据 (用于 ECharts 绘图)
         if final_state.get("subgraph_data") and final_state["subgraph_data"].get("nodes"):
             yield {
@@ -188,23 +327,23 @@ class ChatWorkflow:
             }
 
         # 5. 调用 LLM 进行最终生成 (LLM Stream)
-        sys_tmpl = self.synthesis_prompt_config.get("system", "")
-        user_tmpl = self.synthesis_prompt_config.get("user", "")
-
-        # 注入由 generate_prep 准备好的上下文
-        system_prompt = Template(sys_tmpl).render(full_context=final_state["full_context"])
-        user_prompt_content = Template(user_tmpl).render(query=final_state["query"])
+        # 注入由 generate_prep 准备好的上下文 (模板已在初始化时预编译)
+        system_prompt = self.synthesis_system_tmpl.render(full_context=final_state["full_context"])
+        user_prompt_content = self.synthesis_user_tmpl.render(query=final_state["query"])
 
         try:
             for event in self.llm.stream_chat(
                     query=user_prompt_content,
                     system_prompt=system_prompt,
-                    history=initial_state.get("history", []) # 透传历史记录
+                    history=initial_state.get("history", []), # 透传历史记录
+                    cancel_token=cancel_token
             ):
                 if event["type"] == "content":
                     yield {"type": "delta", "content": event["data"]}
                 elif event["type"] == "usage":
                     yield {"type": "usage", "usage": event["data"]}
+        except OperationCancelled:
+            raise
         except Exception as e:
             logger.error(f"❌ LLM Generation Failed: {e}")
             yield {"type": "error", "content": str(e)}
\ No newline at end of file
@@ -1,7 +1,7 @@
 // Code generated by protoc-gen-go. DO NOT EDIT.
 // versions:
 // 	protoc-gen-go v1.36.11
-// 	protoc        v6.32.0
+// 	protoc        v3.21.12
 // source: api/runtime/v1/runtime.proto
 
 package v1
@@ -286,7 +286,7 @@ type RunSummary struct {
 	PromptTokens     int32                  `protobuf:"varint,2,opt,name=prompt_tokens,json=promptTokens,proto3" json:"prompt_tokens,omitempty"`
 	CompletionTokens int32                  `protobuf:"varint,3,opt,name=completion_tokens,json=completionTokens,proto3" json:"completion_tokens,omitempty"`
 	TotalDurationMs  int64                  `protobuf:"varint,4,opt,name=total_duration_ms,json=totalDurationMs,proto3" json:"total_duration_ms,omitempty"` // Python 侧计算的总耗时
-	FinalStatus      string                 `protobuf:"bytes,5,opt,name=final_status,json=finalStatus,proto3" json:"final_status,omitempty"`                // "success" | "failed"
+	FinalStatus      string                 `protobuf:"bytes,5,opt,name=final_status,json=finalStatus,proto3" json:"final_status,omitempty"`                // "success" | "error" | "cancelled" | "cache_hit" (语义缓存回放)
 	unknownFields    protoimpl.UnknownFields
 	sizeCache        protoimpl.SizeCache
 }
@@ -426,13 +426,17 @@ func (x *SyncRequest) GetConfigJson() string {
 }
 
 type SyncResponse struct {
-	state         protoimpl.MessageState `protogen:"open.v1"`
-	Success       bool                   `protobuf:"varint,1,opt,name=success,proto3" json:"success,omitempty"`
-	ErrorMsg      string                 `protobuf:"bytes,2,opt,name=error_msg,json=errorMsg,proto3" json:"error_msg,omitempty"`
-	ChunksCount   int32                  `protobuf:"varint,3,opt,name=chunks_count,json=chunksCount,proto3" json:"chunks_count,omitempty"`
-	PageCount     int32                  `protobuf:"varint,4,opt,name=page_count,json=pageCount,proto3" json:"page_count,omitempty"`
-	unknownFields protoimpl.UnknownFields
-	sizeCache     protoimpl.SizeCache
+	state       protoimpl.MessageState `protogen:"open.v1"`
+	Success     bool                   `protobuf:"varint,1,opt,name=success,proto3" json:"success,omitempty"`
+	ErrorMsg    string                 `protobuf:"bytes,2,opt,name=error_msg,json=errorMsg,proto3" json:"error_msg,omitempty"`
+	ChunksCount int32                  `protobuf:"varint,3,opt,name=chunks_count,json=chunksCount,proto3" json:"chunks_count,omitempty"`
+	PageCount   int32                  `protobuf:"varint,4,opt,name=page_count,json=pageCount,proto3" json:"page_count,omitempty"`
+	// 增量同步统计 (按切片内容哈希比对)
+	AddedCount     int32 `protobuf:"varint,5,opt,name=added_count,json=addedCount,proto3" json:"added_count,omitempty"`
+	UnchangedCount int32 `protobuf:"varint,6,opt,name=unchanged_count,json=unchangedCount,proto3" json:"unchanged_count,omitempty"`
+	RemovedCount   int32 `protobuf:"varint,7,opt,name=removed_count,json=removedCount,proto3" json:"removed_count,omitempty"`
+	unknownFields  protoimpl.UnknownFields
+	sizeCache      protoimpl.SizeCache
 }
 
 func (x *SyncResponse) Reset() {
@@ -493,6 +497,129 @@ func (x *SyncResponse) GetPageCount() int32 {
 	return 0
 }
 
+func (x *SyncResponse) GetAddedCount() int32 {
+	if x != nil {
+		return x.AddedCount
+	}
+	return 0
+}
+
+func (x *SyncResponse) GetUnchangedCount() int32 {
+	if x != nil {
+		return x.UnchangedCount
+	}
+	return 0
+}
+
+func (x *SyncResponse) GetRemovedCount() int32 {
+	if x != nil {
+		return x.RemovedCount
+	}
+	return 0
+}
+
+type SyncProgress struct {
+	state protoimpl.MessageState `protogen:"open.v1"`
+	// stage: "parsing" | "processing" | "finalizing" | "cleanup" | "done" | "failed"
+	Stage             string  `protobuf:"bytes,1,opt,name=stage,proto3" json:"stage,omitempty"`
+	ChunksProcessed   int32   `protobuf:"varint,2,opt,name=chunks_processed,json=chunksProcessed,proto3" json:"chunks_processed,omitempty"`
+	PageCount         int32   `protobuf:"varint,3,opt,name=page_count,json=pageCount,proto3" json:"page_count,omitempty"`
+	EmbedChunksPerSec float64 `protobuf:"fixed64,4,opt,name=embed_chunks_per_sec,json=embedChunksPerSec,proto3" json:"embed_chunks_per_sec,omitempty"`
+	KgChunksPerSec    float64 `protobuf:"fixed64,5,opt,name=kg_chunks_per_sec,json=kgChunksPerSec,proto3" json:"kg_chunks_per_sec,omitempty"`
+	ElapsedMs         int64   `protobuf:"varint,6,opt,name=elapsed_ms,json=elapsedMs,proto3" json:"elapsed_ms,omitempty"`
+	Done              bool    `protobuf:"varint,7,opt,name=done,proto3" json:"done,omitempty"`
+	// 仅在 done=true 的最后一帧存在
+	Result        *SyncResponse `protobuf:"bytes,8,opt,name=result,proto3" json:"result,omitempty"`
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *SyncProgress) Reset() {
+	*x = SyncProgress{}
+	mi := &file_api_runtime_v1_runtime_proto_msgTypes[7]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *SyncProgress) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*SyncProgress) ProtoMessage() {}
+
+func (x *SyncProgress) ProtoReflect() protoreflect.Message {
+	mi := &file_api_runtime_v1_runtime_proto_msgTypes[7]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use SyncProgress.ProtoReflect.Descriptor instead.
+func (*SyncProgress) Descriptor() ([]byte, []int) {
+	return file_api_runtime_v1_runtime_proto_rawDescGZIP(), []int{7}
+}
+
+func (x *SyncProgress) GetStage() string {
+	if x != nil {
+		return x.Stage
+	}
+	return ""
+}
+
+func (x *SyncProgress) GetChunksProcessed() int32 {
+	if x != nil {
+		return x.ChunksProcessed
+	}
+	return 0
+}
+
+func (x *SyncProgress) GetPageCount() int32 {
+	if x != nil {
+		return x.PageCount
+	}
+	return 0
+}
+
+func (x *SyncProgress) GetEmbedChunksPerSec() float64 {
+	if x != nil {
+		return x.EmbedChunksPerSec
+	}
+	return 0
+}
+
+func (x *SyncProgress) GetKgChunksPerSec() float64 {
+	if x != nil {
+		return x.KgChunksPerSec
+	}
+	return 0
+}
+
+func (x *SyncProgress) GetElapsedMs() int64 {
+	if x != nil {
+		return x.ElapsedMs
+	}
+	return 0
+}
+
+func (x *SyncProgress) GetDone() bool {
+	if x != nil {
+		return x.Done
+	}
+	return false
+}
+
+func (x *SyncProgress) GetResult() *SyncResponse {
+	if x != nil {
+		return x.Result
+	}
+	return nil
+}
+
 var File_api_runtime_v1_runtime_proto protoreflect.FileDescriptor
 
 const file_api_runtime_v1_runtime_proto_rawDesc = "" +
@@ -531,16 +658,32 @@ const file_api_runtime_v1_runtime_proto_rawDesc = "" +
 	"\rdatasource_id\x18\x02 \x01(\x03R\fdatasourceId\x12\x12\n" +
 	"\x04type\x18\x03 \x01(\tR\x04type\x12\x1f\n" +
 	"\vconfig_json\x18\x04 \x01(\tR\n" +
-	"configJson\"\x87\x01\n" +
+	"configJson\"\xf6\x01\n" +
 	"\fSyncResponse\x12\x18\n" +
 	"\asuccess\x18\x01 \x01(\bR\asuccess\x12\x1b\n" +
 	"\terror_msg\x18\x02 \x01(\tR\berrorMsg\x12!\n" +
 	"\fchunks_count\x18\x03 \x01(\x05R\vchunksCount\x12\x1d\n" +
 	"\n" +
-	"page_count\x18\x04 \x01(\x05R\tpageCount2\xa2\x01\n" +
+	"page_count\x18\x04 \x01(\x05R\tpageCount\x12\x1f\n" +
+	"\vadded_count\x18\x05 \x01(\x05R\n" +
+	"addedCount\x12'\n" +
+	"\x0funchanged_count\x18\x06 \x01(\x05R\x0eunchangedCount\x12#\n" +
+	"\rremoved_count\x18\a \x01(\x05R\fremovedCount\"\xaf\x02\n" +
+	"\fSyncProgress\x12\x14\n" +
+	"\x05stage\x18\x01 \x01(\tR\x05stage\x12)\n" +
+	"\x10chunks_processed\x18\x02 \x01(\x05R\x0fchunksProcessed\x12\x1d\n" +
+	"\n" +
+	"page_count\x18\x03 \x01(\x05R\tpageCount\x12/\n" +
+	"\x14embed_chunks_per_sec\x18\x04 \x01(\x01R\x11embedChunksPerSec\x12)\n" +
+	"\x11kg_chunks_per_sec\x18\x05 \x01(\x01R\x0ekgChunksPerSec\x12\x1d\n" +
+	"\n" +
+	"elapsed_ms\x18\x06 \x01(\x03R\telapsedMs\x12\x12\n" +
+	"\x04done\x18\a \x01(\bR\x04done\x120\n" +
+	"\x06result\x18\b \x01(\v2\x18.chimera.v1.SyncResponseR\x06result2\xf1\x01\n" +
 	"\x0eRuntimeService\x12I\n" +
 	"\bRunAgent\x12\x1b.chimera.v1.RunAgentRequest\x1a\x1c.chimera.v1.RunAgentResponse\"\x000\x01\x12E\n" +
-	"\x0eSyncDataSource\x12\x17.chimera.v1.SyncRequest\x1a\x18.chimera.v1.SyncResponse\"\x00B\"Z Chimera/server/api/runtime/v1;v1b\x06proto3"
+	"\x0eSyncDataSource\x12\x17.chimera.v1.SyncRequest\x1a\x18.chimera.v1.SyncResponse\"\x00\x12M\n" +
+	"\x14SyncDataSourceStream\x12\x17.chimera.v1.SyncRequest\x1a\x18.chimera.v1.SyncProgress\"\x000\x01B\"Z Chimera/server/api/runtime/v1;v1b\x06proto3"
 
 var (
 	file_api_runtime_v1_runtime_proto_rawDescOnce sync.Once
@@ -554,7 +697,7 @@ func file_api_runtime_v1_runtime_proto_rawDescGZIP() []byte {
 	return file_api_runtime_v1_runtime_proto_rawDescData
 }
 
-var file_api_runtime_v1_runtime_proto_msgTypes = make([]protoimpl.MessageInfo, 7)
+var file_api_runtime_v1_runtime_proto_msgTypes = make([]protoimpl.MessageInfo, 8)
 var file_api_runtime_v1_runtime_proto_goTypes = []any{
 	(*RunAgentRequest)(nil),  // 0: chimera.v1.RunAgentRequest
 	(*Message)(nil),          // 1: chimera.v1.Message
@@ -563,20 +706,24 @@ var file_api_runtime_v1_runtime_proto_goTypes = []any{
 	(*RunSummary)(nil),       // 4: chimera.v1.RunSummary
 	(*SyncRequest)(nil),      // 5: chimera.v1.SyncRequest
 	(*SyncResponse)(nil),     // 6: chimera.v1.SyncResponse
+	(*SyncProgress)(nil),     // 7: chimera.v1.SyncProgress
 }
 var file_api_runtime_v1_runtime_proto_depIdxs = []int32{
 	1, // 0: chimera.v1.RunAgentRequest.history:type_name -> chimera.v1.Message
 	3, // 1: chimera.v1.RunAgentResponse.meta:type_name -> chimera.v1.AgentMeta
 	4, // 2: chimera.v1.RunAgentResponse.summary:type_name -> chimera.v1.RunSummary
-	0, // 3: chimera.v1.RuntimeService.RunAgent:input_type -> chimera.v1.RunAgentRequest
-	5, // 4: chimera.v1.RuntimeService.SyncDataSource:input_type -> chimera.v1.SyncRequest
-	2, // 5: chimera.v1.RuntimeService.RunAgent:output_type -> chimera.v1.RunAgentResponse
-	6, // 6: chimera.v1.RuntimeService.SyncDataSource:output_type -> chimera.v1.SyncResponse
-	5, // [5:7] is the sub-list for method output_type
-	3, // [3:5] is the sub-list for method input_type
-	3, // [3:3] is the sub-list for extension type_name
-	3, // [3:3] is the sub-list for extension extendee
-	0, // [0:3] is the sub-list for field type_name
+	6, // 3: chimera.v1.SyncProgress.result:type_name -> chimera.v1.SyncResponse
+	0, // 4: chimera.v1.RuntimeService.RunAgent:input_type -> chimera.v1.RunAgentRequest
+	5, // 5: chimera.v1.RuntimeService.SyncDataSource:input_type -> chimera.v1.SyncRequest
+	5, // 6: chimera.v1.RuntimeService.SyncDataSourceStream:input_type -> chimera.v1.SyncRequest
+	2, // 7: chimera.v1.RuntimeService.RunAgent:output_type -> chimera.v1.RunAgentResponse
+	6, // 8: chimera.v1.RuntimeService.SyncDataSource:output_type -> chimera.v1.SyncResponse
+	7, // 9: chimera.v1.RuntimeService.SyncDataSourceStream:output_type -> chimera.v1.SyncProgress
+	7, // [7:10] is the sub-list for method output_type
+	4, // [4:7] is the sub-list for method input_type
+	4, // [4:4] is the sub-list for extension type_name
+	4, // [4:4] is the sub-list for extension extendee
+	0, // [0:4] is the sub-list for field type_name
 }
 
 func init() { file_api_runtime_v1_runtime_proto_init() }
@@ -590,7 +737,7 @@ func file_api_runtime_v1_runtime_proto_init() {
 			GoPackagePath: reflect.TypeOf(x{}).PkgPath(),
 			RawDescriptor: unsafe.Slice(unsafe.StringData(file_api_runtime_v1_runtime_proto_rawDesc), len(file_api_runtime_v1_runtime_proto_rawDesc)),
 			NumEnums:      0,
-			NumMessages:   7,
+			NumMessages:   8,
 			NumExtensions: 0,
 			NumServices:   1,
 		},
@@ -1,7 +1,7 @@
 // Code generated by protoc-gen-go-grpc. DO NOT EDIT.
 // versions:
 // - protoc-gen-go-grpc v1.6.0
-// - protoc             v6.32.0
+// - protoc             v3.21.12
 // source: api/runtime/v1/runtime.proto
 
 package v1
@@ -19,8 +19,9 @@ import (
 const _ = grpc.SupportPackageIsVersion9
 
 const (
-	RuntimeService_RunAgent_FullMethodName       = "/chimera.v1.RuntimeService/RunAgent"
-	RuntimeService_SyncDataSource_FullMethodName = "/chimera.v1.RuntimeService/SyncDataSource"
+	RuntimeService_RunAgent_FullMethodName             = "/chimera.v1.RuntimeService/RunAgent"
+	RuntimeService_SyncDataSource_FullMethodName       = "/chimera.v1.RuntimeService/SyncDataSource"
+	RuntimeService_SyncDataSourceStream_FullMethodName = "/chimera.v1.RuntimeService/SyncDataSourceStream"
 )
 
 // RuntimeServiceClient is the client API for RuntimeService service.
@@ -29,6 +30,8 @@ const (
 type RuntimeServiceClient interface {
 	RunAgent(ctx context.Context, in *RunAgentRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[RunAgentResponse], error)
 	SyncDataSource(ctx context.Context, in *SyncRequest, opts ...grpc.CallOption) (*SyncResponse, error)
+	// 流式同步：持续推送进度帧，最后一帧 done=true 并携带 SyncResponse；客户端取消即中止同步
+	SyncDataSourceStream(ctx context.Context, in *SyncRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[SyncProgress], error)
 }
 
 type runtimeServiceClient struct {
@@ -68,12 +71,33 @@ func (c *runtimeServiceClient) SyncDataSource(ctx context.Context, in *SyncReque
 	return out, nil
 }
 
+func (c *runtimeServiceClient) SyncDataSourceStream(ctx context.Context, in *SyncRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[SyncProgress], error) {
+	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
+	stream, err := c.cc.NewStream(ctx, &RuntimeService_ServiceDesc.Streams[1], RuntimeService_SyncDataSourceStream_FullMethodName, cOpts...)
+	if err != nil {
+		return nil, err
+	}
+	x := &grpc.GenericClientStream[SyncRequest, SyncProgress]{ClientStream: stream}
+	if err := x.ClientStream.SendMsg(in); err != nil {
+		return nil, err
+	}
+	if err := x.ClientStream.CloseSend(); err != nil {
+		return nil, err
+	}
+	return x, nil
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type RuntimeService_SyncDataSourceStreamClient = grpc.ServerStreamingClient[SyncProgress]
+
 // RuntimeServiceServer is the server API for RuntimeService service.
 // All implementations must embed UnimplementedRuntimeServiceServer
 // for forward compatibility.
 type RuntimeServiceServer interface {
 	RunAgent(*RunAgentRequest, grpc.ServerStreamingServer[RunAgentResponse]) error
 	SyncDataSource(context.Context, *SyncRequest) (*SyncResponse, error)
+	// 流式同步：持续推送进度帧，最后一帧 done=true 并携带 SyncResponse；客户端取消即中止同步
+	SyncDataSourceStream(*SyncRequest, grpc.ServerStreamingServer[SyncProgress]) error
 	mustEmbedUnimplementedRuntimeServiceServer()
 }
 
@@ -90,6 +114,9 @@ func (UnimplementedRuntimeServiceServer) RunAgent(*RunAgentRequest, grpc.ServerS
 func (UnimplementedRuntimeServiceServer) SyncDataSource(context.Context, *SyncRequest) (*SyncResponse, error) {
 	return nil, status.Error(codes.Unimplemented, "method SyncDataSource not implemented")
 }
+func (UnimplementedRuntimeServiceServer) SyncDataSourceStream(*SyncRequest, grpc.ServerStreamingServer[SyncProgress]) error {
+	return status.Error(codes.Unimplemented, "method SyncDataSourceStream not implemented")
+}
 func (UnimplementedRuntimeServiceServer) mustEmbedUnimplementedRuntimeServiceServer() {}
 func (UnimplementedRuntimeServiceServer) testEmbeddedByValue()                        {}
 
@@ -140,6 +167,17 @@ func _RuntimeService_SyncDataSource_Handler(srv interface{}, ctx context.Context
 	return interceptor(ctx, in, info, handler)
 }
 
+func _RuntimeService_SyncDataSourceStream_Handler(srv interface{}, stream grpc.ServerStream) error {
+	m := new(SyncRequest)
+	if err := stream.RecvMsg(m); err != nil {
+		return err
+	}
+	return srv.(RuntimeServiceServer).SyncDataSourceStream(m, &grpc.GenericServerStream[SyncRequest, SyncProgress]{ServerStream: stream})
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type RuntimeService_SyncDataSourceStreamServer = grpc.ServerStreamingServer[SyncProgress]
+
 // RuntimeService_ServiceDesc is the grpc.ServiceDesc for RuntimeService service.
 // It's only intended for direct use with grpc.RegisterService,
 // and not to be introspected or modified (even as a copy)
@@ -158,6 +196,11 @@ var RuntimeService_ServiceDesc = grpc.ServiceDesc{
 			Handler:       _RuntimeService_RunAgent_Handler,
 			ServerStreams: true,
 		},
+		{
+			StreamName:    "SyncDataSourceStream",
+			Handler:       _RuntimeService_SyncDataSourceStream_Handler,
+			ServerStreams: true,
+		},
 	},
 	Metadata: "api/runtime/v1/runtime.proto",
 }
@@ -3,6 +3,8 @@ package service
 import (
 	pb "Chimera/server/api/runtime/v1"
 	"context"
+	"errors"
+	"io"
 )
 
 type RuntimeAdapter struct {
@@ -17,6 +19,31 @@ func (a *RuntimeAdapter) SyncDataSource(ctx context.Context, req *pb.SyncRequest
 	return a.client.SyncDataSource(ctx, req)
 }
 
+// SyncDataSourceStream 流式同步：每个进度帧回调 onProgress (可为 nil)，返回最后一帧 (done=true) 携带的同步结果
+// (含 added/unchanged/removed 增量统计)；ctx 取消或超时会中止 Python 侧的同步
+func (a *RuntimeAdapter) SyncDataSourceStream(ctx context.Context, req *pb.SyncRequest, onProgress func(*pb.SyncProgress)) (*pb.SyncResponse, error) {
+	stream, err := a.client.SyncDataSourceStream(ctx, req)
+	if err != nil {
+		return nil, err
+	}
+	for {
+		frame, err := stream.Recv()
+		if err == io.EOF {
+			// Python 侧在客户端取消时不发送完成帧
+			return nil, errors.New("同步流在完成帧之前结束")
+		}
+		if err != nil {
+			return nil, err
+		}
+		if onProgress != nil {
+			onProgress(frame)
+		}
+		if frame.GetDone() {
+			return frame.GetResult(), nil
+		}
+	}
+}
+
 // StreamChat 方法
 func (a *RuntimeAdapter) StreamChat(ctx context.Context, req *pb.RunAgentRequest) (pb.RuntimeService_RunAgentClient, error) {
 	return a.client.RunAgent(ctx, req)